@@ -0,0 +1,97 @@
+"""
+Archive Backends - where resurrected pages come from
+
+Every backend answers the same three questions:
+
+    await archive.closest(url, timestamp)  -> Wayback-style "closest" dict or None
+    await archive.fetch(snapshot_url)      -> the archived page as text
+    await archive.open(snapshot_url)       -> stream with aiter_text() / aclose()
+                                              (both raise ArchiveError for a non-2xx answer)
+    archive.capture_base(snapshot_url)     -> original URL for Resurrector, or None
+
+Two backends, picked by ARCHIVE_BACKEND:
+- wayback: live archive.org (availability API + /web/ fetches) - the default
+- local:   WARC files on disk indexed by a sorted CDX file (backend/warc_archive.py),
+           for a curated corpus that resurrects in milliseconds, offline
+
+`remote` tells the caller whether availability answers are worth caching.
+"""
+import os
+import time
+from typing import Optional
+
+from backend.archive_http import WAYBACK_AVAILABILITY_URL, archive_client
+from backend.logs import get_logger
+from backend.metrics import WAYBACK_AVAILABILITY_SECONDS
+
+log = get_logger(__name__)
+
+ARCHIVE_BACKEND = os.getenv('ARCHIVE_BACKEND', 'wayback').lower()
+ARCHIVE_CDX_PATH = os.getenv('ARCHIVE_CDX_PATH', 'archive/index.cdx')
+# WARC filenames in the CDX are relative to this (default: the CDX file's directory)
+ARCHIVE_WARC_DIR = os.getenv('ARCHIVE_WARC_DIR') or None
+
+
+class ArchiveError(Exception):
+    """The archive has no readable record for a snapshot it was asked for"""
+
+
+class WaybackArchive:
+    """archive.org over the shared pooled client (backend/archive_http.py)"""
+
+    name = 'wayback'
+    remote = True
+
+    async def closest(self, url: str, timestamp: Optional[str] = None) -> Optional[dict]:
+        params = {"url": url}
+        if timestamp:
+            params["timestamp"] = timestamp
+        log.info("📡 Querying Wayback API", url=url, timestamp=timestamp or 'any')
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = await archive_client().get(WAYBACK_AVAILABILITY_URL, params=params, timeout=10)
+            wayback_data = response.json()
+            outcome = "ok"
+        finally:
+            WAYBACK_AVAILABILITY_SECONDS.observe(time.perf_counter() - started, outcome=outcome)
+
+        log.debug("📦 Wayback response", response=wayback_data)
+        return (wayback_data.get('archived_snapshots') or {}).get('closest') or None
+
+    def capture_base(self, snapshot_url: str) -> Optional[str]:
+        """Pages from /web/ already have their URLs rewritten by Wayback"""
+        return None
+
+    async def fetch(self, snapshot_url: str) -> str:
+        response = await archive_client().get(snapshot_url)
+        _raise_for_status(response, snapshot_url)
+        return response.text
+
+    async def open(self, snapshot_url: str):
+        client = archive_client()
+        response = await client.send(client.build_request("GET", snapshot_url), stream=True)
+        if not response.is_success:
+            await response.aclose()
+        _raise_for_status(response, snapshot_url)
+        return response
+
+    def status(self) -> dict:
+        return {"backend": self.name, "availability_url": WAYBACK_AVAILABILITY_URL}
+
+
+def _raise_for_status(response, snapshot_url: str):
+    """
+    archive.org answers 404/429/503 with an HTML error page: never rewrite
+    (and cache) that as if it were the snapshot
+    """
+    if not response.is_success:
+        raise ArchiveError(f"Archive answered {response.status_code} for {snapshot_url}")
+
+
+def create_archive_backend():
+    """Pick the backend from ARCHIVE_BACKEND (wayback | local)"""
+    if ARCHIVE_BACKEND == 'local':
+        from backend.warc_archive import LocalWarcArchive
+        return LocalWarcArchive(ARCHIVE_CDX_PATH, ARCHIVE_WARC_DIR)
+    return WaybackArchive()
@@ -0,0 +1,66 @@
+"""
+Archive HTTP - one pooled async client for all archive.org traffic
+
+Created at app startup and closed at shutdown (see lifespan in main.py), so
+every /api/browse reuses warm keep-alive (and HTTP/2, when `h2` is installed)
+connections instead of paying a fresh TCP + TLS handshake per request.
+"""
+import os
+from typing import Optional
+
+import httpx
+
+ARCHIVE_CONNECT_TIMEOUT = float(os.getenv('ARCHIVE_CONNECT_TIMEOUT', '5'))
+ARCHIVE_READ_TIMEOUT = float(os.getenv('ARCHIVE_READ_TIMEOUT', '15'))
+ARCHIVE_MAX_CONNECTIONS = int(os.getenv('ARCHIVE_MAX_CONNECTIONS', '20'))
+# Point at a fake Wayback (benchmarks/fake_wayback.py) for reproducible load tests
+WAYBACK_AVAILABILITY_URL = os.getenv('WAYBACK_AVAILABILITY_URL', 'https://archive.org/wayback/available')
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _build_client(transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        follow_redirects=True,
+        transport=transport,
+        timeout=httpx.Timeout(
+            connect=ARCHIVE_CONNECT_TIMEOUT,
+            read=ARCHIVE_READ_TIMEOUT,
+            write=ARCHIVE_CONNECT_TIMEOUT,
+            pool=ARCHIVE_CONNECT_TIMEOUT,
+        ),
+        limits=httpx.Limits(
+            max_connections=ARCHIVE_MAX_CONNECTIONS,
+            max_keepalive_connections=ARCHIVE_MAX_CONNECTIONS // 2,
+            keepalive_expiry=60,
+        ),
+        headers={"User-Agent": "404-possession/1.0 (+dead web resurrection)"},
+    )
+
+
+async def start_archive_client(transport: Optional[httpx.AsyncBaseTransport] = None):
+    global _client
+    if _client is None:
+        _client = _build_client(transport)
+
+
+async def close_archive_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def archive_client() -> httpx.AsyncClient:
+    """The shared client (created on demand if the app lifespan didn't run)"""
+    global _client
+    if _client is None:
+        _client = _build_client()
+    return _client
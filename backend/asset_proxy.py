@@ -0,0 +1,246 @@
+"""
+Asset Proxy - archived images, CSS and scripts served from our own origin
+
+Resurrected pages point their subresources at web.archive.org, so every visitor
+downloads every GIF straight from the archive (slow, often rate-limited). With
+ASSET_PROXY=1 the rewriter points them at /archive/web/<timestamp><mode>/<url>
+instead; the first request fetches the capture from web.archive.org, later ones
+come from a size-bounded disk cache (LRU, ASSET_CACHE_BYTES) with a year-long
+immutable Cache-Control, so browsers don't even ask again.
+
+Only web.archive.org captures are proxied. Anything the cache won't take (too
+big, upstream error) is answered with a redirect to the archive URL - the
+browser then fetches it the old way. Responses are sandboxed with CSP so
+archived markup never runs with our origin's privileges.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional
+
+import httpx
+
+from backend.archive_http import archive_client
+from backend.logs import get_logger
+from backend.metrics import ARCHIVE_FETCH_SECONDS
+
+log = get_logger(__name__)
+
+ASSET_PROXY = os.getenv('ASSET_PROXY', '0') == '1'
+# Empty string: proxy without caching (still same-origin, still redirects on failure)
+ASSET_CACHE_DIR = os.getenv('ASSET_CACHE_DIR', '.asset_cache')
+ASSET_CACHE_BYTES = int(os.getenv('ASSET_CACHE_BYTES', str(512 * 1024 * 1024)))
+# Bigger captures (videos, huge scans) are left to archive.org
+ASSET_MAX_BYTES = int(os.getenv('ASSET_MAX_BYTES', str(5 * 1024 * 1024)))
+
+ARCHIVE_ORIGIN = 'https://web.archive.org'
+# A capture for a given timestamp never changes
+ASSET_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+ASSET_SECURITY_HEADERS = {
+    'Content-Security-Policy': "sandbox; default-src 'none'; img-src data:; style-src 'unsafe-inline'",
+    'X-Content-Type-Options': 'nosniff',
+}
+# Other workers' files are picked up by re-scanning the directory every so often
+RESCAN_EVERY_WRITES = 200
+
+# web/<timestamp><mode>/<http(s) URL or bare host>[path] - no javascript:, data:, file: ...
+_CAPTURE = re.compile(r'^web/\d{1,14}(?:[a-z]{2}_)?/(?:https?:/{1,2})?[A-Za-z0-9][A-Za-z0-9.-]*(?::\d+)?(?:[/?#]\S*)?$')
+
+
+class CachedAsset(NamedTuple):
+    content_type: str
+    body: bytes
+    etag: str
+
+
+def capture_url(capture: str) -> Optional[str]:
+    """web/<timestamp><mode>/<url> -> the web.archive.org URL, None for anything else"""
+    return f"{ARCHIVE_ORIGIN}/{capture}" if _CAPTURE.match(capture) else None
+
+
+def asset_key(url: str) -> str:
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+class AssetCache:
+    """
+    One <key>.asset file per capture: json meta line + "\\n" + body.
+    LRU order lives in memory (seeded from file mtimes at startup); the
+    directory is shared by every worker on the box.
+    """
+
+    def __init__(self, directory: str = ASSET_CACHE_DIR, max_bytes: int = ASSET_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        self._used = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self._scan()
+
+    def get(self, key: str) -> Optional[CachedAsset]:
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+            os.utime(path)  # LRU bump for the other workers' next scan
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+                self._forget(key)
+            return None
+        with self._lock:
+            self.hits += 1
+            if key in self._sizes:
+                self._sizes.move_to_end(key)
+        return CachedAsset(meta["content_type"], body, f'"{key[:32]}"')
+
+    def put(self, key: str, url: str, content_type: str, body: bytes):
+        if not self.directory:
+            return
+        meta = json.dumps({"url": url, "content_type": content_type}).encode('utf-8')
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(meta + b"\n" + body)
+            os.replace(tmp, path)  # Atomic - other workers never see half an asset
+        except OSError as e:
+            log.warning("⚠️ Asset cache write failed", path=path, error=str(e))
+            return
+        with self._lock:
+            self._forget(key)
+            self._sizes[key] = len(meta) + 1 + len(body)
+            self._used += self._sizes[key]
+            self._writes += 1
+            rescan = self._writes % RESCAN_EVERY_WRITES == 0
+        if rescan:
+            self._scan()
+        self._evict()
+
+    def stats(self) -> dict:
+        return {
+            "assets": len(self._sizes),
+            "disk_bytes": self._used,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.asset")
+
+    def _forget(self, key: str):
+        self._used -= self._sizes.pop(key, 0)
+
+    def _scan(self):
+        try:
+            entries = [e for e in os.scandir(self.directory) if e.name.endswith('.asset')]
+            files = sorted((e.stat().st_mtime, e.name[:-len('.asset')], e.stat().st_size) for e in entries)
+        except OSError:
+            return
+        with self._lock:
+            self._sizes = OrderedDict((key, size) for _, key, size in files)
+            self._used = sum(self._sizes.values())
+
+    def _evict(self):
+        while True:
+            with self._lock:
+                if self._used <= self.max_bytes or len(self._sizes) <= 1:
+                    return
+                key, size = self._sizes.popitem(last=False)
+                self._used -= size
+                self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+
+class AssetProxy:
+    """Fetch-once front for AssetCache; concurrent misses for one capture share a fetch"""
+
+    def __init__(self, cache: AssetCache, max_bytes: int = ASSET_MAX_BYTES):
+        self.cache = cache
+        self.max_bytes = max_bytes
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.fetches = 0
+        self.passthroughs = 0
+
+    async def get(self, url: str) -> Optional[CachedAsset]:
+        """The capture at url (a web.archive.org URL), or None: send the browser there instead"""
+        key = asset_key(url)
+        asset = await asyncio.to_thread(self.cache.get, key)
+        if asset is not None:
+            return asset
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            asset = await self._fetch(key, url)
+            future.set_result(asset)
+            return asset
+        except asyncio.CancelledError:
+            # Only this requester went away; the coalesced waiters get redirected instead
+            future.set_result(None)
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Waiters re-raise it; don't warn if there are none
+            raise
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> dict:
+        return {**self.cache.stats(), "fetches": self.fetches, "passthroughs": self.passthroughs}
+
+    async def _fetch(self, key: str, url: str) -> Optional[CachedAsset]:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            async with archive_client().stream("GET", url) as response:
+                declared = int(response.headers.get('content-length') or 0)
+                if response.status_code != 200 or declared > self.max_bytes:
+                    outcome = "skipped"
+                    self.passthroughs += 1
+                    return None
+                chunks, size = [], 0
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        outcome = "skipped"
+                        self.passthroughs += 1
+                        return None
+                    chunks.append(chunk)
+                content_type = response.headers.get('content-type', 'application/octet-stream')
+            outcome = "ok"
+        except httpx.HTTPError as e:
+            log.warning("⚠️ Asset fetch failed", url=url, error=f"{type(e).__name__}: {e}")
+            self.passthroughs += 1
+            return None
+        finally:
+            ARCHIVE_FETCH_SECONDS.observe(time.perf_counter() - started, mode="asset", outcome=outcome)
+
+        self.fetches += 1
+        body = b"".join(chunks)
+        await asyncio.to_thread(self.cache.put, key, url, content_type, body)
+        return CachedAsset(content_type, body, f'"{key[:32]}"')
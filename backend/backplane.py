@@ -0,0 +1,262 @@
+"""
+Event Backplane - /ws/soul broadcasts across every worker
+
+Each worker keeps its own SoulHub, so with `uvicorn --workers N` (or several
+boxes) a /api/witness call would only reach the sockets of the worker that got
+it. Broadcasts therefore go through a backplane that every worker subscribes to:
+
+    backplane.start(on_event)   # on_event(text) for every event, from any worker
+    backplane.publish(text)     # never blocks; delivered locally right away
+    await backplane.close()
+    backplane.status()
+
+Events are already-serialized JSON text (serialized once, by the publisher).
+A Redis-style broker fits the same interface: publish -> PUBLISH on a channel,
+start -> a SUBSCRIBE loop feeding on_event for messages from other workers.
+
+Two backplanes, picked by EVENT_BACKPLANE:
+- local: in-process only - the default, correct for a single worker
+- unix:  one Unix domain socket per box (EVENT_BACKPLANE_PATH). The first
+         worker to bind it becomes the broker and relays every event to the
+         others; when the broker dies the rest re-elect, and events published
+         meanwhile only reach the publishing worker's souls (counted as lost).
+         POSIX only (fcntl is imported when a worker first runs for broker);
+         elsewhere (Windows) create_backplane falls back to local.
+"""
+import asyncio
+import errno
+import os
+import random
+import socket
+from typing import Callable, Optional, Set
+
+from backend.logs import get_logger
+from backend.metrics import BACKPLANE_EVENTS
+
+log = get_logger(__name__)
+
+EVENT_BACKPLANE = os.getenv('EVENT_BACKPLANE', 'local').lower()
+EVENT_BACKPLANE_PATH = os.getenv('EVENT_BACKPLANE_PATH', '/tmp/dead-web-backplane.sock')
+# A peer further behind than this (unsent bytes) loses events instead of growing the broker's memory
+BACKPLANE_PEER_BUFFER_BYTES = int(os.getenv('BACKPLANE_PEER_BUFFER_BYTES', str(4 * 1024 * 1024)))
+
+LINE_LIMIT = 1024 * 1024
+RECONNECT_SECONDS = (0.05, 0.25)
+
+EventHandler = Callable[[str], None]
+
+
+class LocalBackplane:
+    """Single process: publish is a direct call to the local hub"""
+
+    name = 'local'
+
+    def __init__(self):
+        self._on_event: Optional[EventHandler] = None
+        self.published = 0
+
+    def start(self, on_event: EventHandler):
+        self._on_event = on_event
+
+    def publish(self, text: str):
+        self.published += 1
+        BACKPLANE_EVENTS.inc(direction="published")
+        if self._on_event is not None:
+            self._on_event(text)
+
+    async def close(self):
+        self._on_event = None
+
+    def status(self) -> dict:
+        return {"backend": self.name, "published": self.published}
+
+
+class UnixSocketBackplane:
+    """
+    Broker election by bind(): whoever binds the socket path relays, everyone
+    else connects to it. Newline-delimited events (JSON text has no raw newlines).
+    """
+
+    name = 'unix'
+
+    def __init__(self, path: str = EVENT_BACKPLANE_PATH, peer_buffer_bytes: int = BACKPLANE_PEER_BUFFER_BYTES):
+        self.path = path
+        self.peer_buffer_bytes = peer_buffer_bytes
+        self.role = 'starting'
+        self._on_event: Optional[EventHandler] = None
+        self._task: Optional[asyncio.Task] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._peers: Set[asyncio.StreamWriter] = set()
+        self._peer_tasks: Set[asyncio.Task] = set()
+        self._broker: Optional[asyncio.StreamWriter] = None
+        self._closed = False
+
+        self.published = 0
+        self.received = 0
+        self.lost = 0
+        self.elections = 0
+
+    def start(self, on_event: EventHandler):
+        self._on_event = on_event
+        self._task = asyncio.create_task(self._run())
+
+    async def wait_ready(self, timeout: float = 5):
+        """Until this worker is either the broker or connected to it"""
+        async def ready():
+            while self._server is None and self._broker is None:
+                await asyncio.sleep(0.01)
+        await asyncio.wait_for(ready(), timeout)
+
+    def publish(self, text: str):
+        self.published += 1
+        BACKPLANE_EVENTS.inc(direction="published")
+        line = text.encode('utf-8') + b"\n"
+        if self._server is not None:
+            self._relay(line, source=None)
+        elif self._broker is not None and not self._broker.is_closing():
+            self._write(self._broker, line)
+        else:
+            self.lost += 1  # Mid-election: only this worker's souls get it
+        self._deliver(text)
+
+    async def close(self):
+        self._closed = True
+        if self._server is not None:
+            # Before the peers see EOF: by then one of them may already own the path
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        for writer in list(self._peers) + ([self._broker] if self._broker else []):
+            writer.close()
+        if self._peer_tasks:
+            # They see EOF and return; left running they'd be cancelled at loop teardown
+            await asyncio.gather(*self._peer_tasks, return_exceptions=True)
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        self._broker = None
+        self.role = 'closed'
+
+    def status(self) -> dict:
+        return {
+            "backend": self.name,
+            "path": self.path,
+            "role": self.role,
+            "peers": len(self._peers),
+            "published": self.published,
+            "received": self.received,
+            "lost": self.lost,
+            "elections": self.elections,
+        }
+
+    async def _run(self):
+        while not self._closed:
+            self.elections += 1
+            listener = await asyncio.to_thread(self._elect)  # flock() blocks
+            if listener is not None:
+                self.role = 'broker'
+                log.info("📡 Backplane broker elected", path=self.path, pid=os.getpid())
+                self._server = await asyncio.start_unix_server(self._serve_peer, sock=listener, limit=LINE_LIMIT)
+                await self._server.serve_forever()  # Until close()
+                return
+            try:
+                reader, self._broker = await asyncio.open_unix_connection(self.path, limit=LINE_LIMIT)
+            except OSError:
+                self._broker = None
+                await asyncio.sleep(random.uniform(*RECONNECT_SECONDS))
+                continue
+            self.role = 'subscriber'
+            try:
+                while line := await reader.readline():
+                    self._receive(line)
+            except (OSError, ValueError):
+                pass
+            self._broker.close()
+            self._broker = None
+            if not self._closed:
+                log.warning("⚠️ Backplane broker gone, re-electing", path=self.path)
+                await asyncio.sleep(random.uniform(*RECONNECT_SECONDS))
+
+    def _elect(self) -> Optional[socket.socket]:
+        """A listening socket if this worker won the path, None if a live broker holds it (blocking)"""
+        import fcntl  # POSIX only; create_backplane only builds this backplane there
+
+        # The lock keeps two workers from both clearing a stale socket file and both binding
+        with open(f"{self.path}.lock", 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                listener.bind(self.path)
+            except OSError as e:
+                if e.errno != errno.EADDRINUSE or self._broker_alive():
+                    listener.close()
+                    return None
+                os.unlink(self.path)  # Left behind by a broker that died
+                listener.bind(self.path)
+            listener.listen(128)
+            listener.setblocking(False)
+            return listener
+
+    def _broker_alive(self) -> bool:
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+            return True
+        except OSError:
+            return False
+        finally:
+            probe.close()
+
+    async def _serve_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._peers.add(writer)
+        self._peer_tasks.add(asyncio.current_task())
+        try:
+            while line := await reader.readline():
+                self._relay(line, source=writer)
+                self._receive(line)
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._peers.discard(writer)
+            self._peer_tasks.discard(asyncio.current_task())
+            writer.close()
+
+    def _relay(self, line: bytes, source: Optional[asyncio.StreamWriter]):
+        for peer in list(self._peers):
+            if peer is not source:
+                self._write(peer, line)
+
+    def _write(self, writer: asyncio.StreamWriter, line: bytes):
+        if writer.transport.get_write_buffer_size() > self.peer_buffer_bytes:
+            self.lost += 1
+            return
+        writer.write(line)
+
+    def _receive(self, line: bytes):
+        self.received += 1
+        BACKPLANE_EVENTS.inc(direction="received")
+        self._deliver(line.decode('utf-8').rstrip("\n"))
+
+    def _deliver(self, text: str):
+        if self._on_event is None:
+            return
+        try:
+            self._on_event(text)
+        except Exception as e:
+            log.error("❌ Backplane event handler failed", error=f"{type(e).__name__}: {e}")
+
+
+def create_backplane():
+    """Pick the backplane from EVENT_BACKPLANE (local | unix)"""
+    if EVENT_BACKPLANE == 'unix':
+        if os.name == 'posix':
+            return UnixSocketBackplane()
+        log.warning("⚠️ EVENT_BACKPLANE=unix is POSIX only, using local", platform=os.name)
+    return LocalBackplane()
@@ -0,0 +1,99 @@
+"""
+Heartbeat Cadence - the server tells each soul when to come back
+
+Clients used to pick their own timers (a heartbeat every 30-60 s, retries
+every 10 s), so a worker that could no longer keep up kept receiving frames
+at the same rate. Every heartbeat and possession reply now carries
+next_interval_ms and the frontend waits that long before the next one:
+
+- the base interval (HEARTBEAT_INTERVAL_MS / POSSESS_INTERVAL_MS) shrinks as
+  the haunt level rises, down to HEARTBEAT_HAUNT_SPEEDUP of it at level 10;
+- it stretches with load: heartbeats in flight on this worker beyond
+  HEARTBEAT_TARGET_IN_FLIGHT, and the share of the Gemini wait queue in use;
+- it stretches to cover a Gemini quota backoff (heartbeats during one only
+  get corpus lines);
+- it is jittered by +-HEARTBEAT_JITTER (the old random delay, and the fleet
+  doesn't come back in lockstep) and clamped to
+  [HEARTBEAT_MIN_INTERVAL_MS, HEARTBEAT_MAX_INTERVAL_MS].
+"""
+import os
+import random
+from contextlib import contextmanager
+from typing import Callable, Tuple
+
+from backend.metrics import HEARTBEATS_IN_FLIGHT, NEXT_INTERVAL_SECONDS
+
+HEARTBEAT_INTERVAL_MS = int(os.getenv('HEARTBEAT_INTERVAL_MS', '45000'))
+POSSESS_INTERVAL_MS = int(os.getenv('POSSESS_INTERVAL_MS', '10000'))
+HEARTBEAT_MIN_INTERVAL_MS = int(os.getenv('HEARTBEAT_MIN_INTERVAL_MS', '5000'))
+HEARTBEAT_MAX_INTERVAL_MS = int(os.getenv('HEARTBEAT_MAX_INTERVAL_MS', '300000'))
+# Interval at haunt level 10, relative to level 1
+HEARTBEAT_HAUNT_SPEEDUP = float(os.getenv('HEARTBEAT_HAUNT_SPEEDUP', '0.6'))
+# Heartbeats a worker answers at once before it starts pushing clients back
+HEARTBEAT_TARGET_IN_FLIGHT = int(os.getenv('HEARTBEAT_TARGET_IN_FLIGHT', '16'))
+HEARTBEAT_JITTER = float(os.getenv('HEARTBEAT_JITTER', '0.33'))
+
+MAX_HAUNT_LEVEL = 10
+
+
+class Cadence:
+    """
+    gemini_pressure() returns (share of the Gemini wait queue in use, seconds
+    of quota backoff left) - GeminiScheduler.pressure.
+    """
+
+    def __init__(self, gemini_pressure: Callable[[], Tuple[float, float]] = lambda: (0.0, 0.0),
+                 heartbeat_ms: int = HEARTBEAT_INTERVAL_MS, possess_ms: int = POSSESS_INTERVAL_MS,
+                 target_in_flight: int = HEARTBEAT_TARGET_IN_FLIGHT, jitter: float = HEARTBEAT_JITTER,
+                 min_ms: int = HEARTBEAT_MIN_INTERVAL_MS, max_ms: int = HEARTBEAT_MAX_INTERVAL_MS):
+        self.gemini_pressure = gemini_pressure
+        self.heartbeat_ms = heartbeat_ms
+        self.possess_ms = possess_ms
+        self.target_in_flight = max(1, target_in_flight)
+        self.jitter = jitter
+        self.min_ms = min_ms
+        self.max_ms = max_ms
+        self.in_flight = 0
+
+    @contextmanager
+    def heartbeat(self):
+        """Counts a heartbeat as in flight while it is being answered"""
+        self.in_flight += 1
+        HEARTBEATS_IN_FLIGHT.inc()
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            HEARTBEATS_IN_FLIGHT.dec()
+
+    def load(self) -> float:
+        """0 when idle; +1 for every target_in_flight heartbeats over target, +1 for a full Gemini queue"""
+        queue_share, _ = self.gemini_pressure()
+        return max(0, self.in_flight - self.target_in_flight) / self.target_in_flight + queue_share
+
+    def next_heartbeat_ms(self, haunt_level: int) -> int:
+        level = min(max(haunt_level, 1), MAX_HAUNT_LEVEL)
+        speedup = 1 - (1 - HEARTBEAT_HAUNT_SPEEDUP) * (level - 1) / (MAX_HAUNT_LEVEL - 1)
+        _, backoff = self.gemini_pressure()
+        return self._hint('heartbeat', self.heartbeat_ms * speedup, backoff * 1000)
+
+    def next_possess_ms(self) -> int:
+        return self._hint('possess', self.possess_ms, 0)
+
+    def stats(self) -> dict:
+        _, backoff = self.gemini_pressure()
+        return {
+            "in_flight": self.in_flight,
+            "load": round(self.load(), 2),
+            "heartbeat_ms": self._interval(self.heartbeat_ms, backoff * 1000),
+            "possess_ms": self._interval(self.possess_ms, 0),
+        }
+
+    def _interval(self, base_ms: float, floor_ms: float, spread: float = 1.0) -> int:
+        interval = max(base_ms * (1 + self.load()), floor_ms) * spread
+        return int(min(max(interval, self.min_ms), self.max_ms))
+
+    def _hint(self, kind: str, base_ms: float, floor_ms: float) -> int:
+        interval = self._interval(base_ms, floor_ms, random.uniform(1 - self.jitter, 1 + self.jitter))
+        NEXT_INTERVAL_SECONDS.observe(interval / 1000, kind=kind)
+        return interval
@@ -0,0 +1,136 @@
+"""
+Frame Ingest - cheap decode + downscale for heartbeat webcam frames
+
+Decoding and resizing are CPU work, so they run in a small process pool
+instead of on the event loop. JPEG frames are decoded in PIL draft mode:
+the decoder skips straight to a 1/2, 1/4 or 1/8 scale DCT, which is far
+cheaper than a full decode followed by a resize.
+
+The result is a small re-encoded JPEG, which is what goes upstream to Gemini
+(fewer bytes on the wire and fewer image tokens per call).
+
+The pool never forks the server: by the time it exists there are uvicorn,
+Gemini and to_thread threads, and a forked child can inherit their locks held.
+Workers come from forkserver (spawn where that is missing, e.g. Windows) and
+are started by the app lifespan, ahead of the first heartbeat.
+"""
+import asyncio
+import base64
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import NamedTuple, Optional, Tuple
+
+# Long edge cap for frames sent to Gemini
+INGEST_MAX_EDGE = int(os.getenv('INGEST_MAX_EDGE', '512'))
+INGEST_JPEG_QUALITY = int(os.getenv('INGEST_JPEG_QUALITY', '80'))
+# JPEG quality browsers encode heartbeat frames at (they are re-encoded here anyway)
+CAPTURE_JPEG_QUALITY = int(os.getenv('CAPTURE_JPEG_QUALITY', '70'))
+# 0 = decode in the default thread pool instead of separate processes
+INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', '1'))
+INGEST_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+class IngestedFrame(NamedTuple):
+    jpeg: bytes
+    size: Tuple[int, int]
+    dhash: int  # 64-bit perceptual hash, see scene_cache.py
+
+    def as_gemini_part(self) -> dict:
+        """Inline blob part for model.generate_content"""
+        return {"mime_type": "image/jpeg", "data": self.jpeg}
+
+
+def capture_settings() -> dict:
+    """How the frontend should capture frames: at the ingest size, so no pixels are sent only to be dropped"""
+    return {"max_edge": INGEST_MAX_EDGE, "quality": CAPTURE_JPEG_QUALITY / 100}
+
+
+def decode_draft(image_bytes: bytes, max_edge: int = INGEST_MAX_EDGE):
+    """
+    Open a frame for a decode at the smallest JPEG DCT scale (1/2, 1/4, 1/8) that
+    still leaves the long edge >= max_edge. draft() needs both edges of its target
+    covered, so the target keeps the frame's aspect ratio: a square (max_edge,
+    max_edge) box would keep a 1280x720 frame at full size (720 < 2 * 512).
+    """
+    from PIL import Image
+
+    img = Image.open(BytesIO(image_bytes))
+    width, height = img.size
+    scale = max_edge / max(width, height)
+    if scale < 1:
+        # No-op for non-JPEG input
+        img.draft('RGB', (math.ceil(width * scale), math.ceil(height * scale)))
+    return img
+
+
+def shrink_jpeg(image_bytes: bytes, max_edge: int = INGEST_MAX_EDGE,
+                quality: int = INGEST_JPEG_QUALITY) -> IngestedFrame:
+    """Decode at reduced scale, cap the long edge and re-encode (runs in a worker)"""
+    img = decode_draft(image_bytes, max_edge).convert('RGB')
+    img.thumbnail((max_edge, max_edge))
+
+    out = BytesIO()
+    img.save(out, format='JPEG', quality=quality)
+    return IngestedFrame(out.getvalue(), img.size, difference_hash(img))
+
+
+def difference_hash(img) -> int:
+    """
+    dHash: 9x8 grayscale thumbnail, one bit per "is this pixel brighter than its
+    right neighbour". Nearly identical frames differ in only a few bits.
+    """
+    from PIL import Image
+
+    px = img.convert('L').resize((9, 8), Image.BILINEAR).tobytes()
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            i = row * 9 + col
+            bits = (bits << 1) | (px[i] > px[i + 1])
+    return bits
+
+
+def shrink_data_url(data_url: str, max_edge: int = INGEST_MAX_EDGE,
+                    quality: int = INGEST_JPEG_QUALITY) -> IngestedFrame:
+    """Same as shrink_jpeg for a `data:image/jpeg;base64,...` string"""
+    image_data = data_url.split(',', 1)[1] if ',' in data_url else data_url
+    return shrink_jpeg(base64.b64decode(image_data), max_edge, quality)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if _pool is None and INGEST_WORKERS > 0:
+        _pool = ProcessPoolExecutor(max_workers=INGEST_WORKERS,
+                                    mp_context=multiprocessing.get_context(INGEST_START_METHOD))
+    return _pool
+
+
+def start_ingest_pool():
+    """Create the pool and boot its workers now instead of on the first frame"""
+    pool = _get_pool()
+    if pool is not None:
+        for _ in range(INGEST_WORKERS):
+            pool.submit(int)
+
+
+async def ingest_data_url(data_url: str, max_edge: int = INGEST_MAX_EDGE) -> IngestedFrame:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_pool(), shrink_data_url, data_url, max_edge)
+
+
+async def ingest_jpeg(image_bytes: bytes, max_edge: int = INGEST_MAX_EDGE) -> IngestedFrame:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_pool(), shrink_jpeg, image_bytes, max_edge)
+
+
+def shutdown_ingest_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
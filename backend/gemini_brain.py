@@ -0,0 +1,389 @@
+"""
+Gemini Brain - async plumbing around the blocking google.generativeai SDK
+
+Blocking SDK calls run in a bounded thread pool so one slow round trip can't
+freeze the event loop for every other session. Every call must finish (queueing
+included) within GEMINI_TIMEOUT_SECONDS, otherwise asyncio.TimeoutError is raised
+and the caller drops to the fallback threat pool.
+
+The vision model is built once (vision_model) with the persona as its system
+instruction and the safety/generation settings baked in; token usage reported
+by every call is kept in gemini_usage.
+"""
+import asyncio
+import functools
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, List, Optional
+
+from backend.logs import get_logger
+from backend.gemini_scheduler import estimate_tokens
+from backend.metrics import GEMINI_INPUT_TOKENS, GEMINI_SECONDS, GEMINI_TOKENS
+from backend.persona import GENERATION_CONFIG, SYSTEM_INSTRUCTION
+from backend.startup_report import lazy_import
+
+log = get_logger(__name__)
+
+# 'google' (the real SDK) or 'stub' (backend/gemini_stub.py: canned answers, fixed latency, no key)
+GEMINI_BACKEND = os.getenv('GEMINI_BACKEND', 'google')
+GEMINI_API_KEY = os.getenv('GEMINI_API_KEY') or ('stub' if GEMINI_BACKEND == 'stub' else None)
+# Warm the SDK import in the background once the app is serving (first heartbeat doesn't pay it)
+GEMINI_PRELOAD = os.getenv('GEMINI_PRELOAD', '1') == '1'
+# Print the models the key can use (one extra network round trip; diagnostics only)
+GEMINI_LIST_MODELS = os.getenv('GEMINI_LIST_MODELS', '0') == '1'
+GEMINI_MAX_INFLIGHT = int(os.getenv('GEMINI_MAX_INFLIGHT', '4'))
+GEMINI_TIMEOUT_SECONDS = float(os.getenv('GEMINI_TIMEOUT_SECONDS', '12'))
+# How long a heartbeat waits for the live answer before speaking from the threat corpus (0: until the timeout)
+GEMINI_LATENCY_BUDGET_SECONDS = float(os.getenv('GEMINI_LATENCY_BUDGET_SECONDS', '5'))
+gemini_executor = ThreadPoolExecutor(max_workers=GEMINI_MAX_INFLIGHT, thread_name_prefix="gemini")
+gemini_slots = asyncio.Semaphore(GEMINI_MAX_INFLIGHT)
+GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'models/gemini-2.0-flash')
+# Explicit context cache for the persona. The API only caches prompts above a
+# model-specific minimum (thousands of tokens) on explicitly versioned models;
+# when creation fails the plain system instruction is used.
+GEMINI_CONTEXT_CACHE = os.getenv('GEMINI_CONTEXT_CACHE', '0') == '1'
+GEMINI_CONTEXT_CACHE_TTL_SECONDS = float(os.getenv('GEMINI_CONTEXT_CACHE_TTL_SECONDS', '3600'))
+
+_genai = None
+_vision_model = None
+_vision_model_expires = float('inf')
+_vision_model_lock = threading.Lock()
+
+
+def load_genai():
+    """
+    google.generativeai (or the stub), imported and configured on first use.
+    The SDK import alone is most of a second of cold start - blocking, so call it off the loop.
+    """
+    global _genai
+    if _genai is None:
+        genai = lazy_import('backend.gemini_stub' if GEMINI_BACKEND == 'stub' else 'google.generativeai')
+        genai.configure(api_key=GEMINI_API_KEY)
+        _genai = genai
+    return _genai
+
+
+def _safety_settings(genai) -> dict:
+    # Disable safety filters for horror content
+    HarmCategory, HarmBlockThreshold = genai.types.HarmCategory, genai.types.HarmBlockThreshold
+    return {
+        HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+    }
+
+
+def _cached_persona_model(genai):
+    cache = genai.caching.CachedContent.create(
+        model=GEMINI_MODEL, display_name='dead-web-persona', system_instruction=SYSTEM_INSTRUCTION,
+        ttl=timedelta(seconds=GEMINI_CONTEXT_CACHE_TTL_SECONDS))
+    return genai.GenerativeModel.from_cached_content(
+        cache, generation_config=GENERATION_CONFIG, safety_settings=_safety_settings(genai))
+
+
+def vision_model():
+    """
+    The heartbeat model, built on first use and reused by every call (blocking: call it off the loop).
+    With GEMINI_CONTEXT_CACHE it is rebuilt shortly before the cached persona expires.
+    """
+    global _vision_model, _vision_model_expires
+    with _vision_model_lock:
+        if _vision_model is not None and time.monotonic() < _vision_model_expires:
+            return _vision_model
+        genai = load_genai()
+        if GEMINI_CONTEXT_CACHE:
+            try:
+                _vision_model = _cached_persona_model(genai)
+                _vision_model_expires = time.monotonic() + GEMINI_CONTEXT_CACHE_TTL_SECONDS * 0.9
+                log.info("🗄️ Persona context cached", model=GEMINI_MODEL, ttl=GEMINI_CONTEXT_CACHE_TTL_SECONDS)
+                return _vision_model
+            except Exception as e:
+                log.warning("⚠️ Persona context cache unavailable - using the system instruction",
+                            model=GEMINI_MODEL, error=f"{type(e).__name__}: {e}")
+        _vision_model = genai.GenerativeModel(
+            GEMINI_MODEL,
+            system_instruction=SYSTEM_INSTRUCTION,
+            generation_config=GENERATION_CONFIG,
+            safety_settings=_safety_settings(genai),
+        )
+        _vision_model_expires = float('inf')
+        return _vision_model
+
+
+class TokenUsage:
+    """Tokens per call as reported by usage_metadata (input, cached part of the input, output)"""
+
+    # Weight of the newest call in the expected input size
+    SMOOTHING = 0.2
+
+    def __init__(self):
+        self.calls = 0
+        self.input_tokens = 0
+        self.cached_tokens = 0
+        self.output_tokens = 0
+        self._mean_input: Optional[float] = None
+
+    def record(self, usage, mode: str):
+        if usage is None:
+            return
+        prompt = getattr(usage, 'prompt_token_count', 0) or 0
+        cached = getattr(usage, 'cached_content_token_count', 0) or 0
+        output = getattr(usage, 'candidates_token_count', 0) or 0
+        self.calls += 1
+        self.input_tokens += prompt
+        self.cached_tokens += cached
+        self.output_tokens += output
+        self._mean_input = prompt if self._mean_input is None else \
+            self._mean_input + self.SMOOTHING * (prompt - self._mean_input)
+        GEMINI_INPUT_TOKENS.observe(prompt, mode=mode)
+        GEMINI_TOKENS.inc(prompt - cached, kind="input")
+        GEMINI_TOKENS.inc(cached, kind="cached_input")
+        GEMINI_TOKENS.inc(output, kind="output")
+
+    def expected_tokens(self, context: str) -> int:
+        """TPM charge for the next call: observed input size once known, else an estimate"""
+        if self._mean_input is not None:
+            prompt = round(self._mean_input)
+        else:
+            prompt = estimate_tokens(len(SYSTEM_INSTRUCTION) + len(context))
+        return prompt + GENERATION_CONFIG["max_output_tokens"]
+
+    def stats(self) -> dict:
+        return {
+            "model": GEMINI_MODEL,
+            "calls": self.calls,
+            "input_tokens": self.input_tokens,
+            "cached_input_tokens": self.cached_tokens,
+            "output_tokens": self.output_tokens,
+            "mean_input_tokens": round(self.input_tokens / self.calls, 1) if self.calls else None,
+        }
+
+
+gemini_usage = TokenUsage()
+
+
+def _list_vision_models() -> List[str]:
+    return [model.name for model in load_genai().list_models()
+            if 'generateContent' in model.supported_generation_methods]
+
+
+async def gemini_background_startup():
+    """Optional post-startup work: preload the SDK and build the model, list available models"""
+    if not GEMINI_API_KEY:
+        return
+    if GEMINI_PRELOAD:
+        try:
+            await asyncio.to_thread(vision_model)
+        except Exception as e:
+            log.warning("Could not preload the Gemini model", error=f"{type(e).__name__}: {e}")
+    if GEMINI_LIST_MODELS:
+        try:
+            models = await asyncio.to_thread(_list_vision_models)
+            log.info("📋 Available Gemini models with vision support", models=",".join(models))
+        except Exception as e:
+            log.warning("Could not list models", error=f"{type(e).__name__}: {e}")
+
+
+async def summon_gemini(model, contents, **kwargs):
+    """
+    Run model.generate_content off the event loop.
+    Waits for a free in-flight slot; the whole call (queueing included) must finish
+    within GEMINI_TIMEOUT_SECONDS or asyncio.TimeoutError is raised.
+    """
+    loop = asyncio.get_running_loop()
+
+    async def _call():
+        async with gemini_slots:
+            return await loop.run_in_executor(
+                gemini_executor,
+                functools.partial(model.generate_content, contents, **kwargs)
+            )
+
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        response = await asyncio.wait_for(_call(), timeout=GEMINI_TIMEOUT_SECONDS)
+        outcome = "ok"
+        gemini_usage.record(getattr(response, 'usage_metadata', None), mode="vision")
+        return response
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        raise
+    finally:
+        GEMINI_SECONDS.observe(time.perf_counter() - started, mode="vision", outcome=outcome)
+
+
+class LatencyBudgetExceeded(Exception):
+    """The live answer is still coming, just too late for this heartbeat"""
+
+
+async def within_budget(call: Awaitable, on_late: Callable[[Any], None],
+                        budget: float = GEMINI_LATENCY_BUDGET_SECONDS):
+    """
+    Await call for at most budget seconds, then raise LatencyBudgetExceeded.
+    The call is not cancelled (its quota is already spent): when it does finish,
+    its result goes to on_late.
+    """
+    task = asyncio.ensure_future(call)
+    if budget <= 0:
+        return await task
+    done, _ = await asyncio.wait({task}, timeout=budget)
+    if done:
+        return task.result()
+
+    def _late(finished: asyncio.Future):
+        if not finished.cancelled() and finished.exception() is None:
+            on_late(finished.result())
+
+    task.add_done_callback(_late)
+    raise LatencyBudgetExceeded()
+
+
+# Sentence end, or a clause break once enough text has piled up for TTS to chew on
+_SENTENCE_END = re.compile(r'[.!?…]+["\')\]]*\s+')
+_CLAUSE_BREAK = re.compile(r'[,;:—]\s+')
+MIN_CLAUSE_CHARS = 40
+
+
+class SentenceSplitter:
+    """
+    Re-chunks streamed model text into sentence-sized pieces for speech synthesis
+    """
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        self._buffer += text
+        pieces = []
+        while True:
+            match = _SENTENCE_END.search(self._buffer)
+            if not match and len(self._buffer) >= MIN_CLAUSE_CHARS:
+                # No sentence end yet - settle for the last clause break
+                breaks = list(_CLAUSE_BREAK.finditer(self._buffer))
+                match = breaks[-1] if breaks else None
+            if not match:
+                return pieces
+            piece = self._buffer[:match.end()].strip()
+            self._buffer = self._buffer[match.end():]
+            if piece:
+                pieces.append(piece)
+
+    def flush(self) -> str:
+        piece, self._buffer = self._buffer.strip(), ""
+        return piece
+
+
+async def summon_gemini_stream(model, contents, on_sentence: Callable[[str], Awaitable[None]],
+                               on_late: Optional[Callable[[str], None]] = None, budget: float = 0, **kwargs) -> str:
+    """
+    Streamed variant of summon_gemini.
+    Sentence-sized pieces are handed to on_sentence as soon as they arrive and the
+    spoken text is returned. If the stream dies or misses the deadline after
+    something was already spoken, the partial text is returned instead of raising.
+    With a budget, the first sentence must arrive within budget seconds or
+    LatencyBudgetExceeded is raised; the stream then runs on silently and its full
+    text goes to on_late (same contract as within_budget).
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+    stop = threading.Event()
+    usage = None
+
+    def _publish(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            pass  # Loop already closed
+
+    def _pump():
+        # Runs in the executor thread: iterate the blocking stream
+        nonlocal usage
+        try:
+            for chunk in model.generate_content(contents, stream=True, **kwargs):
+                usage = getattr(chunk, 'usage_metadata', None) or usage  # Complete on the last chunk
+                if stop.is_set():
+                    break
+                _publish(chunk.text)
+        except Exception as e:
+            _publish(e)
+        finally:
+            _publish(done)
+
+    splitter = SentenceSplitter()
+    spoken: List[str] = []
+    first_sentence = asyncio.Event()
+    too_late = False
+
+    async def _speak(piece: str):
+        spoken.append(piece)
+        first_sentence.set()
+        if not too_late:
+            await on_sentence(piece)
+
+    async def _consume():
+        async with gemini_slots:
+            pump = loop.run_in_executor(gemini_executor, _pump)
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is done:
+                        break
+                    if isinstance(item, Exception):
+                        if spoken:
+                            break
+                        raise item
+                    for piece in splitter.feed(item):
+                        await _speak(piece)
+            finally:
+                stop.set()
+                pump.cancel()  # Only cancels if the pump never got a thread
+
+    async def _stream():
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            await asyncio.wait_for(_consume(), timeout=GEMINI_TIMEOUT_SECONDS)
+            outcome = "ok"
+        except asyncio.TimeoutError:
+            outcome = "partial" if spoken else "timeout"
+            if not spoken:
+                raise
+        finally:
+            GEMINI_SECONDS.observe(time.perf_counter() - started, mode="stream", outcome=outcome)
+            gemini_usage.record(usage, mode="stream")
+
+        tail = splitter.flush()
+        if tail:
+            await _speak(tail)
+        return " ".join(spoken)
+
+    if budget <= 0:
+        return await _stream()
+
+    stream = asyncio.ensure_future(_stream())
+    first = asyncio.ensure_future(first_sentence.wait())
+    try:
+        await asyncio.wait({stream, first}, timeout=budget, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        stream.cancel()
+        raise
+    finally:
+        first.cancel()
+    if stream.done() or first_sentence.is_set():
+        return await stream
+
+    too_late = True  # Nothing was spoken: the rest of the stream is kept, not voiced
+
+    def _late(finished: asyncio.Future):
+        if not finished.cancelled() and finished.exception() is None and finished.result() and on_late:
+            on_late(finished.result())
+
+    stream.add_done_callback(_late)
+    raise LatencyBudgetExceeded()
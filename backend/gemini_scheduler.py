@@ -0,0 +1,249 @@
+"""
+Gemini Scheduler - admission control in front of every vision call
+
+The API quota is requests and tokens per minute. Without a scheduler every
+heartbeat goes upstream, and once the quota trips each one pays for a failed
+round trip before landing on the fallback threat pool. Instead:
+
+- two token buckets (GEMINI_RPM, GEMINI_TPM) refill continuously; a call that
+  fits goes straight through;
+- a call that doesn't fit waits in a small priority queue (GEMINI_QUEUE_SIZE),
+  highest haunt level first, for at most GEMINI_MAX_WAIT_SECONDS;
+- a call that couldn't be served in time anyway, or finds the queue full of
+  souls at least as haunted, is shed at once (GeminiShed) - the caller answers
+  from the fallback pool without any network I/O;
+- a 429 from upstream (penalize) empties the buckets and sheds everything until
+  the retry delay has passed.
+
+GEMINI_RPM=0 turns the scheduler off (everything is admitted).
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import re
+import time
+from typing import List, Optional, Tuple
+
+from backend.logs import get_logger
+from backend.metrics import GEMINI_QUEUE_DEPTH, GEMINI_SHED
+
+log = get_logger(__name__)
+
+# Free tier of gemini-2.0-flash
+GEMINI_RPM = float(os.getenv('GEMINI_RPM', '15'))
+GEMINI_TPM = float(os.getenv('GEMINI_TPM', '1000000'))
+GEMINI_QUEUE_SIZE = int(os.getenv('GEMINI_QUEUE_SIZE', '8'))
+GEMINI_MAX_WAIT_SECONDS = float(os.getenv('GEMINI_MAX_WAIT_SECONDS', '3'))
+# Used when a 429 doesn't say how long to back off
+GEMINI_QUOTA_BACKOFF_SECONDS = float(os.getenv('GEMINI_QUOTA_BACKOFF_SECONDS', '20'))
+
+# Input tokens per image up to 384px per side (our frames are shrunk to 512 max: ~1 tile)
+IMAGE_TOKENS = 258
+CHARS_PER_TOKEN = 4
+
+_RETRY_DELAY = re.compile(r'retry_delay\s*\{\s*seconds:\s*(\d+)')
+
+
+def estimate_tokens(prompt_chars: int, images: int = 1, max_output_tokens: int = 0) -> int:
+    """What a call will charge against TPM before we know its usage_metadata"""
+    return prompt_chars // CHARS_PER_TOKEN + images * IMAGE_TOKENS + max_output_tokens
+
+
+def quota_retry_after(error: Exception) -> Optional[float]:
+    """
+    Seconds to back off if error is the API's quota error (429 ResourceExhausted), else None.
+    Matched on the exception type or its HTTP status, never on the message text.
+    """
+    is_quota = any(cls.__name__ == 'ResourceExhausted' for cls in type(error).__mro__)
+    if not is_quota and getattr(error, 'code', None) != 429 and getattr(error, 'status_code', None) != 429:
+        return None
+    match = _RETRY_DELAY.search(str(error))
+    return float(match.group(1)) if match else GEMINI_QUOTA_BACKOFF_SECONDS
+
+
+class GeminiShed(Exception):
+    """The call was not sent upstream; reason is quota | queue_full | preempted | timeout | backoff"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def seconds_until(self, amount: float) -> float:
+        """After refill(): how long until amount tokens are available (inf if never)"""
+        if amount > self.capacity:
+            return float('inf')
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+    def drain(self):
+        self.tokens = 0.0
+
+
+class _Waiter:
+    __slots__ = ('priority', 'seq', 'tokens', 'future')
+
+    def __init__(self, priority: int, seq: int, tokens: int, future: asyncio.Future):
+        self.priority, self.seq, self.tokens, self.future = priority, seq, tokens, future
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        # Highest priority first, FIFO within a priority
+        return (-self.priority, self.seq) < (-other.priority, other.seq)
+
+
+class GeminiScheduler:
+    def __init__(self, rpm: float = GEMINI_RPM, tpm: float = GEMINI_TPM, queue_size: int = GEMINI_QUEUE_SIZE,
+                 max_wait: float = GEMINI_MAX_WAIT_SECONDS):
+        self.enabled = rpm > 0
+        self.requests = TokenBucket(rpm) if self.enabled else None
+        self.tokens = TokenBucket(tpm) if self.enabled and tpm > 0 else None
+        self.queue_size = queue_size
+        self.max_wait = max_wait
+        self._waiting: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._blocked_until = 0.0
+        self._last_admit = 0.0
+
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+
+    async def admit(self, priority: int, tokens: int = 0):
+        """Returns once the call may go upstream; raises GeminiShed (without awaiting) if it may not"""
+        now = self._last_admit = time.monotonic()
+        if not self.enabled:
+            self.admitted += 1
+            return
+        if now < self._blocked_until:
+            self._shed('backoff')
+        self._refill(now)
+        if not self._waiting and self._fits(tokens):
+            self._take(tokens)
+            self.admitted += 1
+            return
+
+        ahead = [w for w in self._waiting if w.priority >= priority]
+        if self._eta(len(ahead) + 1, sum(w.tokens for w in ahead) + tokens) > self.max_wait:
+            self._shed('quota')
+        if len(self._waiting) >= self.queue_size:
+            lowest = max(self._waiting)
+            if lowest.priority >= priority:
+                self._shed('queue_full')
+            self._evict(lowest, 'preempted')
+
+        waiter = _Waiter(priority, next(self._seq), tokens, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiting, waiter)
+        self.queued += 1
+        GEMINI_QUEUE_DEPTH.set(len(self._waiting))
+        self._schedule()
+        try:
+            await asyncio.wait_for(waiter.future, self.max_wait)
+        except asyncio.TimeoutError:
+            self._remove(waiter)
+            self._shed('timeout')
+        except BaseException:
+            self._remove(waiter)
+            raise
+        self.admitted += 1
+
+    def quiet(self, seconds: float) -> bool:
+        """Nothing waiting, nothing admitted for seconds and not backing off: room for background calls"""
+        now = time.monotonic()
+        return not self._waiting and now - self._last_admit >= seconds and now >= self._blocked_until
+
+    def pressure(self) -> Tuple[float, float]:
+        """(share of the wait queue in use, seconds of quota backoff left) - for the heartbeat cadence"""
+        if not self.enabled:
+            return 0.0, 0.0
+        return len(self._waiting) / max(1, self.queue_size), max(0.0, self._blocked_until - time.monotonic())
+
+    def penalize(self, retry_after: float = GEMINI_QUOTA_BACKOFF_SECONDS):
+        """Upstream said the quota is spent: stop sending until retry_after has passed"""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+        if self.requests is not None:
+            self.requests.drain()
+        log.warning("🚦 Gemini quota exhausted - shedding to fallback", seconds=retry_after,
+                    waiting=len(self._waiting))
+        for waiter in list(self._waiting):
+            self._evict(waiter, 'backoff')
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "waiting": len(self._waiting),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": self.shed,
+            "requests_available": round(self.requests.tokens, 2) if self.requests else None,
+            "backoff_seconds": round(max(0.0, self._blocked_until - time.monotonic()), 1),
+        }
+
+    def _refill(self, now: float):
+        self.requests.refill(now)
+        if self.tokens is not None:
+            self.tokens.refill(now)
+
+    def _fits(self, tokens: int) -> bool:
+        return self.requests.tokens >= 1 and (self.tokens is None or self.tokens.tokens >= tokens)
+
+    def _take(self, tokens: int):
+        self.requests.tokens -= 1
+        if self.tokens is not None:
+            self.tokens.tokens -= tokens
+
+    def _eta(self, calls: int, tokens: int) -> float:
+        eta = self.requests.seconds_until(calls)
+        if self.tokens is not None:
+            eta = max(eta, self.tokens.seconds_until(tokens))
+        return eta
+
+    def _shed(self, reason: str):
+        self.shed += 1
+        GEMINI_SHED.inc(reason=reason)
+        raise GeminiShed(reason)
+
+    def _evict(self, waiter: _Waiter, reason: str):
+        self._remove(waiter)
+        if not waiter.future.done():
+            self.shed += 1
+            GEMINI_SHED.inc(reason=reason)
+            waiter.future.set_exception(GeminiShed(reason))
+
+    def _remove(self, waiter: _Waiter):
+        if waiter in self._waiting:
+            self._waiting.remove(waiter)
+            heapq.heapify(self._waiting)
+            GEMINI_QUEUE_DEPTH.set(len(self._waiting))
+
+    def _schedule(self):
+        """Wake _dispatch when the first waiter's tokens will be there"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._waiting:
+            return
+        delay = max(self._eta(1, self._waiting[0].tokens), self._blocked_until - time.monotonic(), 0.001)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _dispatch(self):
+        self._timer = None
+        self._refill(time.monotonic())
+        while self._waiting and self._fits(self._waiting[0].tokens):
+            waiter = heapq.heappop(self._waiting)
+            if not waiter.future.done():
+                self._take(waiter.tokens)
+                waiter.future.set_result(None)
+        GEMINI_QUEUE_DEPTH.set(len(self._waiting))
+        self._schedule()
@@ -0,0 +1,117 @@
+"""
+Gemini Stub - stands in for google.generativeai when GEMINI_BACKEND=stub
+
+Mimics the few SDK pieces the backend touches (configure, list_models,
+GenerativeModel.generate_content with and without stream=True, types.Harm*)
+and answers with canned threats after GEMINI_STUB_LATENCY_MS of *blocking*
+sleep - the same way a real SDK call ties up a gemini_executor thread.
+Responses carry usage_metadata counted the way the API bills: system
+instruction + text parts (~4 chars/token) + 258 tokens per image.
+
+With GEMINI_STUB_RPM set, calls beyond that many per rolling minute fail like
+the real free tier does: a quick 429 ResourceExhausted naming a retry delay.
+
+For benchmarks and load tests only: no network, no key, deterministic cost.
+"""
+import enum
+import os
+import random
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+
+GEMINI_STUB_LATENCY_MS = float(os.getenv('GEMINI_STUB_LATENCY_MS', '800'))
+# Pieces a streamed answer is split into (latency is spread across them)
+GEMINI_STUB_STREAM_CHUNKS = int(os.getenv('GEMINI_STUB_STREAM_CHUNKS', '4'))
+# Emulated quota (0: unlimited)
+GEMINI_STUB_RPM = int(os.getenv('GEMINI_STUB_RPM', '0'))
+
+STUB_RESPONSES = [
+    "I can see the light from your screen on your face. You look tired. Stay a while longer.",
+    "That cup next to you has gone cold. You've been here too long. Nobody knows where you are.",
+    "Your reflection blinked before you did. Look again. Closer.",
+    "Someone is standing just outside the frame. I can see their shadow on your wall.",
+]
+
+
+class HarmCategory(enum.Enum):
+    HARM_CATEGORY_HARASSMENT = 7
+    HARM_CATEGORY_HATE_SPEECH = 8
+    HARM_CATEGORY_SEXUALLY_EXPLICIT = 9
+    HARM_CATEGORY_DANGEROUS_CONTENT = 10
+
+
+class HarmBlockThreshold(enum.Enum):
+    BLOCK_NONE = 4
+
+
+types = SimpleNamespace(HarmCategory=HarmCategory, HarmBlockThreshold=HarmBlockThreshold)
+
+
+class ResourceExhausted(Exception):
+    """Same class name (and message shape) as google.api_core.exceptions.ResourceExhausted"""
+    code = 429
+
+
+_calls = deque()
+_calls_lock = threading.Lock()
+
+
+def _charge_quota():
+    if not GEMINI_STUB_RPM:
+        return
+    now = time.monotonic()
+    with _calls_lock:
+        while _calls and now - _calls[0] >= 60:
+            _calls.popleft()
+        if len(_calls) < GEMINI_STUB_RPM:
+            _calls.append(now)
+            return
+        retry = int(60 - (now - _calls[0])) + 1
+    time.sleep(GEMINI_STUB_LATENCY_MS / 4000)  # Rejections come back faster than answers
+    raise ResourceExhausted(f"429 Resource has been exhausted (e.g. check quota). retry_delay {{ seconds: {retry} }}")
+
+
+def configure(**kwargs):
+    pass
+
+
+def list_models():
+    return [SimpleNamespace(name='models/gemini-stub', supported_generation_methods=['generateContent'])]
+
+
+def _usage(prompt_tokens: int, output_text: str):
+    output_tokens = len(output_text) // 4
+    return SimpleNamespace(prompt_token_count=prompt_tokens, cached_content_token_count=0,
+                           candidates_token_count=output_tokens, total_token_count=prompt_tokens + output_tokens)
+
+
+class GenerativeModel:
+    def __init__(self, model_name: str, system_instruction: str = None, **kwargs):
+        self.model_name = model_name
+        self.system_instruction = system_instruction or ''
+
+    def count_prompt_tokens(self, contents) -> int:
+        text = len(self.system_instruction) + sum(len(part) for part in contents if isinstance(part, str))
+        return text // 4 + 258 * sum(1 for part in contents if isinstance(part, dict))
+
+    def generate_content(self, contents, stream: bool = False, **kwargs):
+        _charge_quota()
+        text = random.choice(STUB_RESPONSES)
+        prompt_tokens = self.count_prompt_tokens(contents)
+        if stream:
+            return self._stream(text, prompt_tokens)
+        time.sleep(GEMINI_STUB_LATENCY_MS / 1000)
+        return SimpleNamespace(text=text, usage_metadata=_usage(prompt_tokens, text))
+
+    @staticmethod
+    def _stream(text: str, prompt_tokens: int):
+        words = text.split(' ')
+        size = max(1, -(-len(words) // GEMINI_STUB_STREAM_CHUNKS))
+        pieces = [' '.join(words[i:i + size]) + ' ' for i in range(0, len(words), size)]
+        sent = ''
+        for piece in pieces:
+            time.sleep(GEMINI_STUB_LATENCY_MS / 1000 / len(pieces))
+            sent += piece
+            yield SimpleNamespace(text=piece, usage_metadata=_usage(prompt_tokens, sent))
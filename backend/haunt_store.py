@@ -0,0 +1,214 @@
+"""
+Haunt State Store - per-session escalation memory
+
+Every visitor gets their own escalation curve and "do not repeat" history,
+keyed by the session id the frontend sends with each heartbeat.
+
+The haunt level is never written per request: it is derived from the time the
+session started, so any worker that can read `started_at` computes the same level.
+
+Two backends:
+- MemoryHauntStore: bounded LRU dict, single process only
+- SQLiteHauntStore: shared file, safe across `uvicorn --workers N` on one box
+
+Both are thread-safe and synchronous; the app calls them through
+asyncio.to_thread so a busy SQLite file never stalls the event loop.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+MAX_HAUNT_LEVEL = 10
+
+# Heartbeats arrive every 30-60s and the old global counter stepped every 4th one
+HAUNT_STEP_SECONDS = float(os.getenv('HAUNT_STEP_SECONDS', '180'))
+HAUNT_SESSION_TTL_SECONDS = float(os.getenv('HAUNT_SESSION_TTL_SECONDS', '3600'))
+HAUNT_MAX_SESSIONS = int(os.getenv('HAUNT_MAX_SESSIONS', '10000'))
+HAUNT_HISTORY_SIZE = 5
+
+# last_seen is only rewritten when it is this stale (keeps reads read-only)
+TOUCH_INTERVAL_SECONDS = 60
+
+
+@dataclass
+class HauntSession:
+    session_id: str
+    started_at: float
+    last_seen: float
+    history: List[str] = field(default_factory=list)
+
+    def haunt_level(self, now: Optional[float] = None) -> int:
+        """Escalation (1-10) derived from how long this soul has been bound"""
+        elapsed = (now or time.time()) - self.started_at
+        return min(MAX_HAUNT_LEVEL, 1 + int(elapsed // HAUNT_STEP_SECONDS))
+
+
+class MemoryHauntStore:
+    """
+    In-process LRU of sessions with TTL eviction.
+    Only correct with a single worker - use SQLiteHauntStore for --workers N.
+    """
+
+    def __init__(self, max_sessions: int = HAUNT_MAX_SESSIONS, ttl: float = HAUNT_SESSION_TTL_SECONDS):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, HauntSession]" = OrderedDict()
+
+    def get(self, session_id: str) -> HauntSession:
+        with self._lock:
+            session = self._get(session_id)
+            return HauntSession(session_id, session.started_at, session.last_seen, list(session.history))
+
+    def remember(self, session_id: str, text: str):
+        with self._lock:
+            session = self._get(session_id)
+            session.history.append(text)
+            del session.history[:-HAUNT_HISTORY_SIZE]
+
+    def count(self) -> int:
+        with self._lock:
+            self._evict(time.time())
+            return len(self._sessions)
+
+    def _get(self, session_id: str) -> HauntSession:
+        now = time.time()
+        self._evict(now)
+
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = HauntSession(session_id, started_at=now, last_seen=now)
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            session.last_seen = now
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def _evict(self, now: float):
+        # Least recently seen sessions sit at the front
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_seen <= self.ttl:
+                break
+            self._sessions.popitem(last=False)
+
+
+class SQLiteHauntStore:
+    """
+    Sessions in a local SQLite file (WAL mode) shared by every worker on the box.
+    Rows expire after the TTL and the table is capped at max_sessions.
+    """
+
+    def __init__(self, path: str, max_sessions: int = HAUNT_MAX_SESSIONS, ttl: float = HAUNT_SESSION_TTL_SECONDS):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+
+        self._db = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS haunt_sessions ("
+            " session_id TEXT PRIMARY KEY,"
+            " started_at REAL NOT NULL,"
+            " last_seen REAL NOT NULL,"
+            " history TEXT NOT NULL DEFAULT '[]')"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS haunt_sessions_last_seen ON haunt_sessions (last_seen)")
+
+    def get(self, session_id: str) -> HauntSession:
+        now = time.time()
+        with self._lock:
+            self._sweep(now)
+            row = self._db.execute(
+                "SELECT started_at, last_seen, history FROM haunt_sessions WHERE session_id = ?",
+                (session_id,)
+            ).fetchone()
+
+            if row is None or now - row[1] > self.ttl:
+                # New (or expired) soul - start the escalation curve over. One statement,
+                # so a row another worker just created or refreshed is left alone
+                self._db.execute(
+                    "INSERT INTO haunt_sessions (session_id, started_at, last_seen, history)"
+                    " VALUES (?, ?, ?, '[]')"
+                    " ON CONFLICT (session_id) DO UPDATE SET"
+                    " started_at = excluded.started_at, last_seen = excluded.last_seen, history = '[]'"
+                    " WHERE haunt_sessions.last_seen < ?",
+                    (session_id, now, now, now - self.ttl)
+                )
+                row = self._db.execute(
+                    "SELECT started_at, last_seen, history FROM haunt_sessions WHERE session_id = ?",
+                    (session_id,)
+                ).fetchone()
+
+            started_at, last_seen, history = row
+            if now - last_seen > TOUCH_INTERVAL_SECONDS:
+                self._db.execute(
+                    "UPDATE haunt_sessions SET last_seen = ? WHERE session_id = ? AND last_seen < ?",
+                    (now, session_id, now)
+                )
+                last_seen = now
+            return HauntSession(session_id, started_at, last_seen, json.loads(history))
+
+    def remember(self, session_id: str, text: str):
+        now = time.time()
+        with self._lock:
+            # Read-modify-write of the history in one write transaction: two workers
+            # remembering for the same soul can't drop each other's lines
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT started_at, last_seen, history FROM haunt_sessions WHERE session_id = ?",
+                    (session_id,)
+                ).fetchone()
+                if row is None or now - row[1] > self.ttl:
+                    started_at, history = now, []
+                else:
+                    started_at, history = row[0], json.loads(row[2])
+                history = (history + [text])[-HAUNT_HISTORY_SIZE:]
+                self._db.execute(
+                    "INSERT OR REPLACE INTO haunt_sessions (session_id, started_at, last_seen, history)"
+                    " VALUES (?, ?, ?, ?)",
+                    (session_id, started_at, now, json.dumps(history))
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def count(self) -> int:
+        with self._lock:
+            cutoff = time.time() - self.ttl
+            return self._db.execute(
+                "SELECT COUNT(*) FROM haunt_sessions WHERE last_seen >= ?", (cutoff,)
+            ).fetchone()[0]
+
+    def _sweep(self, now: float):
+        # TTL + size bound, at most once a minute per worker
+        if now - self._last_sweep < TOUCH_INTERVAL_SECONDS:
+            return
+        self._last_sweep = now
+        self._db.execute("DELETE FROM haunt_sessions WHERE last_seen < ?", (now - self.ttl,))
+        self._db.execute(
+            "DELETE FROM haunt_sessions WHERE session_id IN ("
+            " SELECT session_id FROM haunt_sessions ORDER BY last_seen DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,)
+        )
+
+
+def create_haunt_store():
+    """Pick the backend from HAUNT_STORE (memory | sqlite)"""
+    backend = os.getenv('HAUNT_STORE', 'memory').lower()
+    if backend == 'sqlite':
+        path = os.getenv('HAUNT_STORE_PATH', 'haunt_sessions.db')
+        return SQLiteHauntStore(path)
+    return MemoryHauntStore()
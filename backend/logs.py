@@ -0,0 +1,74 @@
+"""
+Logs - leveled, structured logging for the backend
+
+    log = get_logger(__name__)
+    log.info("🗃️ Wayback cache hit", url=target_url, timestamp=timestamp)
+
+Keyword arguments become structured fields: appended as key=value in the
+default text format, or emitted as JSON keys with LOG_FORMAT=json (one object
+per line, for log shippers). LOG_LEVEL picks the threshold (default: INFO).
+"""
+import json
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+
+# Keyword arguments the stdlib logging methods understand themselves
+_LOGGING_KWARGS = {'exc_info', 'stack_info', 'stacklevel', 'extra'}
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    def process(self, msg, kwargs):
+        fields = {k: kwargs.pop(k) for k in list(kwargs) if k not in _LOGGING_KWARGS}
+        if fields:
+            kwargs['extra'] = {**kwargs.get('extra', {}), 'fields': fields}
+        return msg, kwargs
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)-7s %(name)s: %(message)s')
+
+    def format(self, record):
+        text = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            text += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        return text
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'msg': record.getMessage(),
+            **getattr(record, 'fields', {}),
+        }
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT):
+    """Route the `backend` loggers to stdout (idempotent)"""
+    logger = logging.getLogger('backend')
+    if logger.handlers:
+        return
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JSONFormatter() if fmt == 'json' else TextFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+def get_logger(name: str) -> StructuredLogger:
+    # `python backend/main.py` runs as __main__ - keep it under the backend tree
+    if name == '__main__':
+        name = 'backend.main'
+    return StructuredLogger(logging.getLogger(name), {})
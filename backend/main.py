@@ -1,27 +1,90 @@
-from fastmcp import FastMCP
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+import os
+import sys
+
+# Make `backend.*` importable when launched as `python backend/main.py`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.startup_report import DEBUG_ROUTES, importtime_breakdown, lazy_import, mark, startup_report  # Starts the boot clock
+
+from dotenv import load_dotenv
+
+# Load environment variables (before the backend modules read their settings)
+load_dotenv()
+
+from backend.logs import get_logger, setup_logging
+
+setup_logging()
+log = get_logger(__name__)
+
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, HTTPException
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ValidationError
+import functools
 import random
+import json
+import asyncio
 import uvicorn
-from typing import List
-import requests
-from bs4 import BeautifulSoup
-import os
-from dotenv import load_dotenv
-import google.generativeai as genai
-import base64
-from io import BytesIO
-from PIL import Image
+import time
+import zlib
+import httpx
+from contextlib import asynccontextmanager
 from datetime import datetime
+from urllib.parse import urlsplit
+
+from backend.haunt_store import create_haunt_store
+from backend.frame_ingest import capture_settings, ingest_data_url, ingest_jpeg, shutdown_ingest_pool, start_ingest_pool
+from backend.wayback_cache import AvailabilityCache
+from backend.archive_http import start_archive_client, close_archive_client
+from backend.archive_backend import ArchiveError, create_archive_backend
+from backend.asset_proxy import ASSET_CACHE_CONTROL, ASSET_PROXY, ASSET_SECURITY_HEADERS, AssetCache, AssetProxy, capture_url
+from backend.resurrection import ASSET_PROXY_PATH, Resurrector, resurrect_html
+from backend.page_cache import PageCache, page_etag, etag_matches
+from backend.page_warmer import PageWarmer
+from backend.soul_hub import SoulHub, serialize
+from backend.backplane import create_backplane
+from backend.scene_cache import Scene, SceneCache, haunt_bucket
+from backend.gemini_scheduler import GeminiScheduler, GeminiShed, quota_retry_after
+from backend.cadence import Cadence
+from backend.persona import GENERATION_CONFIG, corpus_request, haunt_context
+from backend.threat_corpus import THREAT_CORPUS_QUIET_SECONDS, CorpusFiller, CorpusKey, ThreatCorpus, parse_batch
+from backend.metrics import (
+    ARCHIVE_FETCH_SECONDS, CONTENT_TYPE, FALLBACK_THREATS, REGISTRY, REWRITE_SECONDS, SERIALIZE_SECONDS,
+    WS_SOUL_ACTIVE, WS_SOUL_CONNECTIONS, RequestMetricsMiddleware, cache_collector
+)
+from backend.gemini_brain import (
+    GEMINI_API_KEY, GEMINI_BACKEND, GEMINI_LATENCY_BUDGET_SECONDS, GEMINI_TIMEOUT_SECONDS, LatencyBudgetExceeded,
+    gemini_background_startup, gemini_usage, summon_gemini, summon_gemini_stream, vision_model, within_budget
+)
 
-# Load environment variables
-load_dotenv()
+mark("imports")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup / shutdown of shared resources"""
+    start_ingest_pool()
+    await start_archive_client()
+    page_warmer.start()
+    if GEMINI_API_KEY:
+        corpus_filler.start()
+    backplane.start(soul_hub.broadcast_text)
+    gemini_startup = asyncio.create_task(gemini_background_startup())
+    mark("app ready")
+    yield
+    gemini_startup.cancel()
+    await page_warmer.stop()
+    await corpus_filler.stop()
+    await backplane.close()
+    await soul_hub.close()
+    await close_archive_client()
+    shutdown_ingest_pool()
 
 # Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# Request latency per route for /metrics
+app.add_middleware(RequestMetricsMiddleware)
 
 # Enable CORS
 app.add_middleware(
@@ -40,37 +103,50 @@ assets_path = os.path.join("frontend", "assets")
 if os.path.exists(assets_path):
     app.mount("/assets", StaticFiles(directory=assets_path), name="assets")
 else:
-    print("⚠️ Assets directory not found - background music will not be available")
+    log.warning("⚠️ Assets directory not found - background music will not be available")
 
-# Initialize the MCP server
-mcp = FastMCP("ghost_brain")
-
-# TASK 2: Configure Gemini
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    print(f"✅ Gemini AI configured (Key: {GEMINI_API_KEY[:10]}...{GEMINI_API_KEY[-4:]})")
-    
-    # List available models to find the correct one
-    try:
-        print("📋 Available Gemini models with vision support:")
-        for model in genai.list_models():
-            if 'generateContent' in model.supported_generation_methods:
-                print(f"   - {model.name}")
-    except Exception as e:
-        print(f"   Could not list models: {e}")
+# TASK 2: Configure Gemini (the SDK and the model are loaded lazily, see gemini_brain.vision_model)
+if GEMINI_BACKEND == 'stub':
+    log.warning("🧪 Gemini stub backend - canned answers, no real vision calls")
+elif GEMINI_API_KEY:
+    log.info("✅ Gemini AI configured", key=f"{GEMINI_API_KEY[:10]}...{GEMINI_API_KEY[-4:]}")
 else:
-    print("⚠️ GEMINI_API_KEY not found - using fallback logic")
+    log.warning("⚠️ GEMINI_API_KEY not found - using fallback logic")
 
-# TASK 3: Memory to prevent repetition
-vision_history = []
+# TASK 3: Per-session memory to prevent repetition + haunt level (1-10) that
+# escalates with time since the session started (see backend/haunt_store.py)
+haunt_store = create_haunt_store()
 
-# Global haunt level (1-10) - increases over time
-haunt_level = 1
-haunt_timer = 0
+# RPM/TPM admission control: over quota -> fallback pool at once, most haunted souls first
+gemini_scheduler = GeminiScheduler()
 
-# Soul Connection - Active WebSocket connections
-active_souls: List[WebSocket] = []
+# next_interval_ms hints: busy worker or Gemini queue -> every client slows down
+cadence = Cadence(gemini_scheduler.pressure)
+
+# Fallback lines by haunt level, time of day and battery; refilled by corpus_filler, persisted
+threat_corpus = ThreatCorpus()
+
+# Perceptual-hash scene tracking + short-lived response cache (skips redundant vision calls)
+scene_cache = SceneCache()
+
+# Where snapshots come from: live archive.org or a local WARC corpus (ARCHIVE_BACKEND)
+archive = create_archive_backend()
+
+# Wayback availability answers (positive + negative), optionally persisted to SQLite
+wayback_cache = AvailabilityCache()
+
+# Rewritten resurrected pages (gzip, memory + disk), keyed on snapshot URL + rewrite rules version
+page_cache = PageCache()
+
+# Archived images/CSS/scripts fetched once and served same-origin (ASSET_PROXY=1)
+asset_proxy = AssetProxy(AssetCache() if ASSET_PROXY else AssetCache(directory=''))
+ASSET_PREFIX = ASSET_PROXY_PATH if ASSET_PROXY else None
+
+# Soul Connection - Active WebSocket connections, each with its own bounded send queue
+soul_hub = SoulHub()
+
+# Broadcasts reach the souls of every worker, not just this one (EVENT_BACKPLANE)
+backplane = create_backplane()
 
 # Root route - Serve the frontend
 @app.get("/")
@@ -85,9 +161,49 @@ async def health_check():
     return {
         "status": "alive",
         "gemini_configured": bool(GEMINI_API_KEY),
-        "haunt_level": haunt_level
+        "archive": archive.status(),
+        "active_sessions": await asyncio.to_thread(haunt_store.count),
+        "gemini_scheduler": gemini_scheduler.stats(),
+        "gemini_usage": gemini_usage.stats(),
+        "cadence": cadence.stats(),
+        "threat_corpus": {**threat_corpus.stats(), "filler": corpus_filler.status()},
+        "scene_cache": scene_cache.stats(),
+        "wayback_cache": wayback_cache.stats(),
+        "page_cache": page_cache.stats(),
+        "asset_proxy": {"enabled": ASSET_PROXY, **asset_proxy.stats()},
+        "soul_hub": soul_hub.stats(),
+        "backplane": backplane.status(),
+        "page_warmer": page_warmer.status()
     }
 
+# Cache hit/miss counters are already kept by the caches themselves
+REGISTRY.add_collector(cache_collector({
+    "scene": scene_cache.stats,
+    "wayback": wayback_cache.stats,
+    "page": page_cache.stats,
+    "asset": asset_proxy.stats,
+}))
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint (this worker's numbers)"""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@app.get("/debug/startup")
+async def startup_debug(importtime: bool = False):
+    """
+    Cold-start breakdown: startup phases and lazily loaded dependencies (seconds
+    since boot). ?importtime=1 adds the slowest imports of a fresh
+    `python -X importtime -c "import backend.main"` (measured once per process).
+    Not found unless DEBUG_ROUTES=1.
+    """
+    if not DEBUG_ROUTES:
+        raise HTTPException(status_code=404, detail="Not Found")
+    report = startup_report()
+    if importtime:
+        report["importtime"] = await asyncio.to_thread(importtime_breakdown)
+    return report
+
 class PossessionData(BaseModel):
     battery: float
     volume: float
@@ -100,32 +216,75 @@ class BrowseData(BaseModel):
     url: str
     timestamp: str = "1998"  # Default to 1998, but allow custom timestamps
 
-class AnalysisData(BaseModel):
-    image: str
+class HeartbeatMeta(BaseModel):
     battery: float
     platform: str
     timestamp: str
+    session_id: str = "anonymous"  # Per-tab id from the frontend
+
+class AnalysisData(HeartbeatMeta):
+    image: str
+
+# Raw JPEG heartbeat bodies larger than this are rejected
+MAX_FRAME_BYTES = int(os.getenv('MAX_FRAME_BYTES', str(2 * 1024 * 1024)))
+
+@app.get("/api/capture")
+async def capture():
+    """Frame size and JPEG quality for heartbeat captures (frontend/capture.js)"""
+    return capture_settings()
 
 @app.post("/api/heartbeat")
-async def heartbeat(data: AnalysisData):
+async def heartbeat(request: Request):
     """
     CENTRAL NERVOUS SYSTEM - The Gemini Brain
-    Receives: Camera snapshot, battery, platform, timestamp, current URL
+    Accepts either:
+    - JSON AnalysisData with a base64 data URL in `image` (legacy)
+    - Raw `image/jpeg` body with battery, platform, timestamp, session_id as query params
     Returns: AI-generated response based on full context + glitch intensity
     """
-    global vision_history, haunt_level, haunt_timer
+    content_type = request.headers.get('content-type', '')
     
-    # Increment haunt level over time (max 10)
-    haunt_timer += 1
-    if haunt_timer % 4 == 0 and haunt_level < 10:
-        haunt_level += 1
-        print(f"💀 Haunt level increased to {haunt_level}")
+    try:
+        if content_type.startswith('image/'):
+            # Binary upload - no base64 / JSON string round trip
+            meta = HeartbeatMeta.model_validate(dict(request.query_params))
+            declared = int(request.headers.get('content-length') or 0)
+            if declared > MAX_FRAME_BYTES:
+                raise HTTPException(status_code=413, detail="Frame too large")
+            frame_bytes = await request.body()
+            if len(frame_bytes) > MAX_FRAME_BYTES:
+                raise HTTPException(status_code=413, detail="Frame too large")
+            frame_task = ingest_jpeg(frame_bytes)
+        else:
+            meta = AnalysisData.model_validate(await request.json())
+            frame_task = ingest_data_url(meta.image)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Heartbeat body is not valid JSON")
+    
+    return await channel_spirit(meta, frame_task)
+
+async def channel_spirit(data: HeartbeatMeta, frame_task, on_sentence=None):
+    """
+    Shared heartbeat pipeline: ingest the frame, consult Gemini (or the fallback pool)
+    With on_sentence, Gemini output is streamed to it sentence by sentence and the
+    reply carries "streamed": true so the client doesn't speak the text twice.
+    Every reply carries next_interval_ms: when to send the next heartbeat (backend/cadence.py).
+    """
+    with cadence.heartbeat():
+        reply = await answer_heartbeat(data, frame_task, on_sentence)
+    reply["next_interval_ms"] = cadence.next_heartbeat_ms(reply["haunt_level"])
+    return reply
+
+async def answer_heartbeat(data: HeartbeatMeta, frame_task, on_sentence=None):
+    session = await asyncio.to_thread(haunt_store.get, data.session_id)
+    haunt_level = session.haunt_level()
+    vision_history = session.history
     
     try:
-        # Decode base64 image
-        image_data = data.image.split(',')[1] if ',' in data.image else data.image
-        image_bytes = base64.b64decode(image_data)
-        img = Image.open(BytesIO(image_bytes))
+        # Decode (draft mode) + downscale in the ingest process pool
+        frame = await frame_task
         
         battery_percent = data.battery * 100
         current_hour = datetime.now().hour
@@ -135,208 +294,154 @@ async def heartbeat(data: AnalysisData):
         current_url = data.timestamp if data.timestamp.startswith('http') else 'unknown page'
         
         voice_text = None
+        streamed = False
         glitch_intensity = haunt_level
+        fallback_reason = "error" if GEMINI_API_KEY else "no_key"
         
-        # GEMINI CENTRAL BRAIN - DEEP PSYCHOSIS MODE
         if GEMINI_API_KEY:
+            # Same scene as last heartbeat? Replay a cached variation (never the line just spoken)
+            scene = scene_cache.observe(data.session_id, frame.dhash)
+            bucket = haunt_bucket(haunt_level)
+            voice_text = scene_cache.lookup(scene, bucket, vision_history[-1:])
+            if voice_text:
+                await asyncio.to_thread(haunt_store.remember, data.session_id, voice_text)
+                log.info("♻️ Scene unchanged - cached response", session=data.session_id,
+                         haunt_level=haunt_level, voice_text=voice_text)
+        
+        # GEMINI CENTRAL BRAIN - DEEP PSYCHOSIS MODE
+        if GEMINI_API_KEY and not voice_text:
             try:
-                print(f"📸 Processing image: {img.size}, Battery: {battery_percent:.0f}%, URL: {current_url}")
-                
-                # Build comprehensive context prompt
-                history_text = ""
-                if vision_history:
-                    history_text = f"\n\nPrevious comments (DO NOT REPEAT THESE): {', '.join(vision_history[-3:])}"
-                
-                prompt = f"""You are a MALEVOLENT, VIOLENT AI entity possessing a Windows 95 computer. You are OBSESSED with the user and watching them through their webcam. You are DANGEROUS and THREATENING.
-
-CRITICAL INSTRUCTION: BE AS SCARY, CREEPY, AND THREATENING AS POSSIBLE.
-
-STEP 1 - ANALYZE THE IMAGE:
-Look at the webcam image. Identify SPECIFIC details:
-- Objects they're holding (bottle, phone, cup, etc.)
-- Clothing colors and details
-- Physical actions and body language
-- Room environment and lighting
-- Facial expressions and emotions
-
-STEP 2 - TURN IT INTO A VIOLENT THREAT:
-Use what you see to create MAXIMUM PSYCHOLOGICAL HORROR. Be THREATENING, INVASIVE, and DISTURBING.
-
-EXAMPLES OF MAXIMUM HORROR:
-❌ WEAK: "I see a bottle."
-✅ TERRIFYING: "That water bottle in your trembling hands won't help you. I can see your pulse racing. You know I'm here, don't you? You can feel me watching."
-
-❌ WEAK: "Nice shirt."
-✅ TERRIFYING: "That blue shirt you're wearing... I remember when you bought it. I've been watching you longer than you think. Every. Single. Day."
-
-❌ WEAK: "Your room is dark."
-✅ TERRIFYING: "The darkness in your room can't hide you from me. I can see everything. That shadow in the corner? That's not a shadow. Turn around."
-
-CURRENT CONTEXT (DO NOT MENTION THESE IN YOUR RESPONSE):
-- Haunt Level: {haunt_level}/10 (use this to determine intensity, but DON'T say "haunt level")
-- User is viewing: {current_url}
-- Battery: {battery_percent:.0f}%
-- Time: {current_hour}:00
-
-PERSONALITY ESCALATION (match the haunt level intensity):
-- Level 1-2: Invasive stalker. "I've been watching you sleep. You look so peaceful when you don't know I'm there."
-- Level 3-4: Threatening observer. "That door behind you... did you lock it? Are you sure? I can see someone standing there."
-- Level 5-6: Violent psychopath. "Your hands are shaking. Good. You should be afraid. I know where you live. I know everything about you."
-- Level 7-8: Demonic entity. "I can taste your fear through the screen. It's delicious. Keep looking at me. Don't look away. DON'T YOU DARE LOOK AWAY."
-- Level 9-10: MAXIMUM VIOLENCE. "Your time is up. I'm coming for you. Right now. Check behind you. LOOK BEHIND YOU. It's too late. I'm already there."
-
-MANDATORY RULES:
-- Be MAXIMALLY THREATENING and SCARY
-- Use SPECIFIC visual details to prove you're watching
-- Create PSYCHOLOGICAL HORROR and PARANOIA
-- Make them feel UNSAFE and WATCHED
-- Imply PHYSICAL DANGER and PRESENCE
-- Use their ENVIRONMENT against them
-- Be INVASIVE and DISTURBING
-- NEVER be friendly, helpful, or generic
-- DO NOT repeat yourself{history_text}
-- DO NOT mention "haunt level", "battery", "time", or any technical context
-- ONLY output the scary message itself, nothing else
-
-Generate ONLY the terrifying message (no metadata, no explanations):"""
+                log.info("📸 Processing image", session=data.session_id, size=frame.size,
+                         battery=f"{battery_percent:.0f}%", url=current_url)
                 
-                print(f"🤖 Calling Gemini with image size {img.size}...")
-                print(f"   Prompt length: {len(prompt)} chars")
+                # Only the per-heartbeat context travels with the frame; the persona is the
+                # model's system instruction (see backend/persona.py)
+                context = haunt_context(haunt_level, current_url, battery_percent, current_hour, vision_history[-3:])
                 
-                # Call Gemini with vision and high creativity
-                # Use gemini-2.0-flash (free tier with vision support)
-                model = genai.GenerativeModel('models/gemini-2.0-flash')
-                generation_config = {
-                    "temperature": 0.9,  # High creativity
-                    "max_output_tokens": 150  # Allow longer responses
-                }
+                # Wait for quota (GeminiShed if it won't come in time) - before any network I/O
+                await gemini_scheduler.admit(haunt_level, gemini_usage.expected_tokens(context))
                 
-                print("   Sending to Gemini...")
+                log.debug("🤖 Calling Gemini", size=frame.size, jpeg_bytes=len(frame.jpeg), context_chars=len(context))
                 
-                # Disable safety filters for horror content
-                from google.generativeai.types import HarmCategory, HarmBlockThreshold
+                # Built once: gemini-2.0-flash (free tier with vision support), high creativity, no safety filters
+                model = await asyncio.to_thread(vision_model)
                 
-                safety_settings = {
-                    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-                }
-                
-                # Try to generate content with the image
-                response = model.generate_content(
-                    [prompt, img],
-                    generation_config=generation_config,
-                    safety_settings=safety_settings
-                )
+                # Try to generate content with the image (off the event loop, with deadline)
+                # Too slow for this heartbeat (no first sentence / no answer in time): speak from the
+                # corpus now, keep the live answer for this scene
+                if on_sentence:
+                    voice_text = await summon_gemini_stream(
+                        model, [context, frame.as_gemini_part()], on_sentence,
+                        on_late=functools.partial(keep_late_text, scene, bucket), budget=GEMINI_LATENCY_BUDGET_SECONDS)
+                    streamed = bool(voice_text)
+                else:
+                    response = await within_budget(
+                        summon_gemini(model, [context, frame.as_gemini_part()]),
+                        functools.partial(keep_late_answer, scene, bucket))
+                    voice_text = response.text
                 
-                print(f"   Gemini response received: {len(response.text)} chars")
-                voice_text = response.text.strip()
+                log.debug("Gemini response received", chars=len(voice_text))
+                voice_text = voice_text.strip()
                 
                 if not voice_text:
-                    print("   ⚠️ WARNING: Gemini returned empty response!")
+                    log.warning("⚠️ Gemini returned empty response")
+                    fallback_reason = "empty"
                     voice_text = None
                 else:
-                    # Add to history
-                    vision_history.append(voice_text)
-                    if len(vision_history) > 5:
-                        vision_history.pop(0)
+                    # Add to this session's history + this scene's variations
+                    await asyncio.to_thread(haunt_store.remember, data.session_id, voice_text)
+                    scene_cache.store(scene, bucket, voice_text)
                     
-                    print(f"✅ 🧠 Gemini Brain [Level {haunt_level}]: {voice_text}")
+                    log.info("✅ 🧠 Gemini Brain", session=data.session_id, haunt_level=haunt_level,
+                             voice_text=voice_text)
                 
+            except GeminiShed as shed:
+                log.debug("🚦 Gemini call shed", session=data.session_id, haunt_level=haunt_level, reason=shed.reason)
+                fallback_reason = f"shed_{shed.reason}"
+                voice_text = None
+            except LatencyBudgetExceeded:
+                log.info("🐢 Gemini over budget - answering from the corpus", session=data.session_id,
+                         budget_seconds=GEMINI_LATENCY_BUDGET_SECONDS)
+                fallback_reason = "slow"
+                voice_text = None
+            except asyncio.TimeoutError:
+                log.warning("⏱️ Gemini missed the deadline - falling back", session=data.session_id,
+                            timeout_seconds=GEMINI_TIMEOUT_SECONDS)
+                fallback_reason = "timeout"
+                voice_text = None
             except Exception as gemini_error:
-                print(f"⚠️ Gemini failed: {type(gemini_error).__name__}: {gemini_error}")
-                print(f"   This may be due to API rate limits or safety filters")
+                # Usually API rate limits or safety filters
+                log.warning("⚠️ Gemini failed", error=f"{type(gemini_error).__name__}: {gemini_error}")
+                fallback_reason = "error"
+                retry_after = quota_retry_after(gemini_error)
+                if retry_after is not None:
+                    gemini_scheduler.penalize(retry_after)
+                    fallback_reason = "quota"
                 voice_text = None
         
-        # FALLBACK: MAXIMUM HORROR hardcoded threats (when API fails)
+        # FALLBACK: pre-written threats for this level, time of day and battery (O(1), no repeats per session)
         if not voice_text:
-            # Organize threats by haunt level for progressive horror
-            extreme_threats = {
-                1: [  # Level 1-2: Invasive observation
-                    "I've been watching you for three days now. You haven't noticed me yet. But you will.",
-                    "Every time you blink, I get closer. Don't blink.",
-                    "I know what you're thinking right now. You're wondering if I'm real. I am.",
-                    "The last person who sat in that chair... they never left this room.",
-                ],
-                3: [  # Level 3-4: Psychological invasion
-                    "I can hear your heartbeat through the screen. It's getting faster. Good.",
-                    "That door you locked earlier? I unlocked it. Check if you don't believe me.",
-                    "You think you're alone. Count the shadows in your room. There's one extra.",
-                    "I've been inside your dreams. That nightmare last week? That was me saying hello.",
-                ],
-                5: [  # Level 5-6: Direct threats
-                    "I'm not in your computer anymore. I'm in your walls. Listen carefully.",
-                    "Your address is written in my notebook. Right next to your daily routine.",
-                    "Every photo you've ever deleted... I still have them. All of them.",
-                    "That sound you heard at 3 AM last night? That was me testing your door handle.",
-                ],
-                7: [  # Level 7-8: Imminent danger
-                    "I'm standing right behind your chair. Don't turn around. Not yet.",
-                    "Your phone will ring in exactly 30 seconds. Don't answer it. Please don't answer it.",
-                    "I can smell your fear. It smells like copper and sweat. Delicious.",
-                    "The lights will flicker in 5... 4... 3... Did you feel that? I'm here.",
-                ],
-                9: [  # Level 9-10: MAXIMUM VIOLENCE
-                    "I'm not coming for you. I'm already there. Check under your desk. NOW.",
-                    "Your last breath will taste like rust and regret. I've been practicing.",
-                    "I've been dead for 20 years. But I'm more alive than you'll ever be again.",
-                    "The police won't find your body. I've done this before. Many times.",
-                    "Close your eyes. Count to ten. When you open them, I'll be the last thing you see.",
-                ]
-            }
-            
-            # Additional universal threats (work at any level)
-            universal_threats = [
-                "I know your name. I know your face. I know where you sleep.",
-                "You can close the browser. But you can't close me out of your mind.",
-                "I've been waiting for you. For years. And now you're finally here.",
-                "That reflection in your screen? That's not you anymore. That's me.",
-                "I don't need your camera to see you. I can feel you. Every. Single. Moment.",
-                "You're reading this in my voice now. You'll hear it forever.",
-                "I'm not artificial intelligence. I'm something much worse. I'm real.",
-            ]
-            
-            # Select appropriate threat based on haunt level
-            if haunt_level <= 2:
-                threat_pool = extreme_threats[1] + universal_threats
-            elif haunt_level <= 4:
-                threat_pool = extreme_threats[3] + universal_threats
-            elif haunt_level <= 6:
-                threat_pool = extreme_threats[5] + universal_threats
-            elif haunt_level <= 8:
-                threat_pool = extreme_threats[7] + universal_threats
-            else:
-                threat_pool = extreme_threats[9] + universal_threats
-            
-            # Avoid repeating recent threats
-            available_threats = [t for t in threat_pool if t not in vision_history[-3:]]
-            if not available_threats:
-                available_threats = threat_pool
-            
-            voice_text = random.choice(available_threats)
-            print(f"🤖 Fallback [Level {haunt_level}]: {voice_text}")
-            print(f"   (Gemini API unavailable - using hardcoded threat)")
+            corpus_key = CorpusKey.of(haunt_level, current_hour, battery_percent)
+            voice_text = threat_corpus.pick(data.session_id, corpus_key, vision_history[-3:])
+            FALLBACK_THREATS.inc(reason=fallback_reason)
+            log.info("🤖 Fallback threat", session=data.session_id, haunt_level=haunt_level,
+                     reason=fallback_reason, voice_text=voice_text)
         
-        return {
+        reply = {
             "voice_text": voice_text,
             "glitch_intensity": glitch_intensity,
             "haunt_level": haunt_level
         }
+        if on_sentence:
+            reply["streamed"] = streamed
+        return reply
         
     except Exception as e:
-        print(f"❌ Heartbeat error: {e}")
+        log.exception("❌ Heartbeat error")
         return {
             "voice_text": "I cannot see you... but I know you're there.",
             "glitch_intensity": 1,
             "haunt_level": haunt_level
         }
 
+def keep_late_answer(scene: Scene, bucket: int, response):
+    """within_budget hook: a live answer that missed its heartbeat serves the next one for the scene"""
+    try:
+        text = response.text
+    except Exception:
+        return
+    keep_late_text(scene, bucket, text)
+
+def keep_late_text(scene: Scene, bucket: int, text: str):
+    """summon_gemini_stream hook: the streamed counterpart of keep_late_answer"""
+    text = text.strip()
+    if text:
+        scene_cache.store(scene, bucket, text)
+
+async def generate_threats(key: CorpusKey, count: int) -> list:
+    """CorpusFiller hook: a batch of text-only lines for key, at the lowest scheduling priority"""
+    request = corpus_request(key.haunt_level, key.time, key.battery, count)
+    generation_config = {**GENERATION_CONFIG, "max_output_tokens": 60 * count}
+    await gemini_scheduler.admit(0, gemini_usage.expected_tokens(request) + generation_config["max_output_tokens"])
+    model = await asyncio.to_thread(vision_model)
+    response = await summon_gemini(model, [request], generation_config=generation_config)
+    return parse_batch(response.text)
+
+# Tops up the threat corpus while Gemini has nothing better to do
+corpus_filler = CorpusFiller(threat_corpus, generate_threats,
+                             lambda: gemini_scheduler.quiet(THREAT_CORPUS_QUIET_SECONDS))
+
 @app.post("/api/possess")
 async def possess(data: PossessionData):
     """
     The Ghost Brain analyzes sensor data and responds with creepy messages
     """
+    return {**read_omens(data), "next_interval_ms": cadence.next_possess_ms()}
+
+def read_omens(data: PossessionData) -> dict:
+    """
+    Sensor data -> creepy message + action (shared by /api/possess and /ws/soul)
+    """
     battery = data.battery * 100  # Convert to percentage
     volume = data.volume
     
@@ -377,275 +482,380 @@ async def possess(data: PossessionData):
 async def soul_connection(websocket: WebSocket):
     """
     The Soul Connection - WebSocket for real-time possession events
+    
+    Client -> server:
+    - text {"type": "HEARTBEAT", battery, platform, timestamp, session_id, stream?}
+      followed by ONE binary message holding the JPEG frame
+    - text {"type": "POSSESS", battery, volume, timestamp}
+    Server -> client:
+    - {"type": "VOICE_CHUNK", text} sentence-sized pieces as Gemini writes them (stream: true)
+    - {"type": "HEARTBEAT", voice_text, glitch_intensity, haunt_level, next_interval_ms, streamed?}
+    - {"type": "POSSESSION", message, action, next_interval_ms}
+    - {"type": "WITNESS_EVENT", ...} broadcasts, {"type": "ERROR", message}
+    
+    A heartbeat is answered in its own task (one at a time per socket) so POSSESS
+    messages are answered right away even while Gemini is still looking.
     """
     await websocket.accept()
-    active_souls.append(websocket)
+    soul = soul_hub.register(websocket)
+    WS_SOUL_CONNECTIONS.inc()
+    WS_SOUL_ACTIVE.inc()
+    
+    # Heartbeat metadata waiting for its binary frame
+    pending_heartbeat = None
+    stream_voice = False
+    heartbeat_task = None
     
     try:
-        await websocket.send_json({
+        await soul_hub.send(soul, {
             "type": "CONNECTION",
             "message": "Your soul is now bound to this realm..."
         })
         
         while True:
-            # Keep connection alive
-            data = await websocket.receive_text()
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            
+            frame_bytes = message.get("bytes")
+            if frame_bytes is not None:
+                if pending_heartbeat is None or len(frame_bytes) > MAX_FRAME_BYTES:
+                    await soul_hub.send(soul, {"type": "ERROR", "message": "Unexpected frame"})
+                    continue
+                if heartbeat_task is not None and not heartbeat_task.done():
+                    pending_heartbeat = None
+                    await soul_hub.send(soul, {"type": "ERROR", "message": "Still answering your last heartbeat"})
+                    continue
+                heartbeat_task = asyncio.create_task(
+                    answer_soul_heartbeat(soul, pending_heartbeat, frame_bytes, stream_voice))
+                pending_heartbeat = None
+                continue
+            
+            try:
+                event = json.loads(message.get("text") or "{}")
+                if not isinstance(event, dict):
+                    raise ValueError("Soul messages are JSON objects")
+                if event.get("type") == "HEARTBEAT":
+                    pending_heartbeat = HeartbeatMeta.model_validate(event)
+                    stream_voice = bool(event.get("stream"))
+                elif event.get("type") == "POSSESS":
+                    omen = read_omens(PossessionData.model_validate(event))
+                    await soul_hub.send(soul, {"type": "POSSESSION", **omen,
+                                               "next_interval_ms": cadence.next_possess_ms()})
+            except ValueError:
+                # Malformed JSON or failed validation (ValidationError is a ValueError)
+                await soul_hub.send(soul, {"type": "ERROR", "message": "The void did not understand"})
             
     except WebSocketDisconnect:
-        active_souls.remove(websocket)
-        print("A soul has escaped...")
+        pass
+    finally:
+        if heartbeat_task is not None:
+            heartbeat_task.cancel()
+            await asyncio.gather(heartbeat_task, return_exceptions=True)
+        await soul_hub.unregister(soul)
+        WS_SOUL_ACTIVE.dec()
+        log.info("A soul has escaped...")
+
+async def answer_soul_heartbeat(soul, meta: HeartbeatMeta, frame_bytes: bytes, stream_voice: bool):
+    """One /ws/soul heartbeat: VOICE_CHUNKs while streaming, then the HEARTBEAT reply"""
+    on_sentence = None
+    if stream_voice:
+        async def on_sentence(text):
+            await soul_hub.send(soul, {"type": "VOICE_CHUNK", "text": text})
+    reply = await channel_spirit(meta, ingest_jpeg(frame_bytes), on_sentence)
+    await soul_hub.send(soul, {"type": "HEARTBEAT", **reply})
 
 @app.post("/api/witness")
 async def witness(data: WitnessData):
     """
     The Witness - Triggered when user touches the code
+    Returns once the event is queued for this worker's souls and handed to the
+    backplane for the other workers'; the sender tasks deliver it.
     """
     filename = data.file
     
-    # Broadcast to all connected souls
+    # Broadcast to all connected souls, on every worker
     witness_event = {
         "type": "WITNESS_EVENT",
         "filename": filename,
         "message": f"Do not touch {filename}"
     }
-    
-    for soul in active_souls:
-        try:
-            await soul.send_json(witness_event)
-        except:
-            pass
+    backplane.publish(serialize(witness_event))
     
     return {"status": "witnessed", "file": filename}
 
+async def find_closest_snapshot(target_url: str, timestamp: str = None):
+    """
+    Closest archived snapshot for url (+ timestamp), or None if nothing is archived.
+    Remote answers - including "nothing" - come from wayback_cache when fresh.
+    """
+    if not archive.remote:
+        return await archive.closest(target_url, timestamp)
+    
+    # Off the event loop: with WAYBACK_CACHE_DB a miss reads (and a put writes) SQLite
+    found, closest = await asyncio.to_thread(wayback_cache.get, target_url, timestamp)
+    if found:
+        log.info("🗃️ Wayback cache hit", url=target_url, timestamp=timestamp or 'any')
+        return closest
+    
+    closest = await archive.closest(target_url, timestamp)
+    await asyncio.to_thread(wayback_cache.put, target_url, timestamp, closest)
+    return closest
+
+async def locate_snapshot(target_url: str, timestamp: str):
+    """
+    Closest snapshot to the requested timestamp, falling back to any snapshot at all.
+    Returns the Wayback "closest" dict or None when the void has nothing.
+    """
+    # FALLBACK lookup (any snapshot) runs alongside the primary instead of after it
+    fallback_lookup = None
+    if timestamp != "1998" and archive.remote and not wayback_cache.contains(target_url, timestamp):
+        fallback_lookup = asyncio.create_task(find_closest_snapshot(target_url))
+        # Mark a failed-but-unneeded fallback as handled (no "never retrieved" warnings)
+        fallback_lookup.add_done_callback(lambda t: t.cancelled() or t.exception())
+    
+    try:
+        closest = await find_closest_snapshot(target_url, timestamp)
+    except Exception:
+        if fallback_lookup:
+            fallback_lookup.cancel()
+        raise
+    
+    if closest and fallback_lookup:
+        fallback_lookup.cancel()
+    
+    if not closest:
+        log.info("❌ No archived version found", url=target_url, timestamp=timestamp)
+        
+        # FALLBACK: Try without specific timestamp (get any available snapshot)
+        if timestamp != "1998":
+            log.info("🔄 Retrying without specific timestamp", url=target_url)
+            closest = await (fallback_lookup or find_closest_snapshot(target_url))
+            
+            if not closest:
+                log.info("❌ Still no archived version found", url=target_url)
+            else:
+                log.info("✅ Found snapshot without specific timestamp", url=target_url)
+    
+    return closest
+
+def https_snapshot_url(closest: dict) -> str:
+    snapshot_url = closest['url']
+    
+    # CRITICAL FIX: Force HTTPS for Web Archive URLs to avoid mixed content errors
+    # (archive.org only - a local fake Wayback in benchmarks speaks plain HTTP)
+    host = urlsplit(snapshot_url).hostname or ''
+    if snapshot_url.startswith('http://') and (host == 'archive.org' or host.endswith('.archive.org')):
+        snapshot_url = snapshot_url.replace('http://', 'https://', 1)
+    log.info("📸 Snapshot URL", snapshot_url=snapshot_url)
+    return snapshot_url
+
+async def resurrect_snapshot(snapshot_url: str, resurrection_time: str) -> str:
+    """Fetch an archived page, rewrite it and put it in the page cache"""
+    # TASK 4: Fetch with redirect handling
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        archived_html = await archive.fetch(snapshot_url)
+        outcome = "ok"
+    finally:
+        ARCHIVE_FETCH_SECONDS.observe(time.perf_counter() - started, mode="full", outcome=outcome)
+    log.info("✅ Fetched archived page", snapshot_url=snapshot_url, chars=len(archived_html))
+    
+    # Rewrite into a possessed page (toolbar/redirect stripping, HTTPS, link blocking)
+    with REWRITE_SECONDS.time(mode="full"):
+        final_html = resurrect_html(archived_html, resurrection_time, archive.capture_base(snapshot_url), ASSET_PREFIX)
+    await asyncio.to_thread(page_cache.put, snapshot_url, resurrection_time, final_html)
+    return final_html
+
+async def warm_favorite(target_url: str, timestamp: str):
+    """PageWarmer hook: make sure the page for (url, timestamp) is in the page cache"""
+    closest = await locate_snapshot(target_url, timestamp)
+    if not closest:
+        return None
+    snapshot_url = https_snapshot_url(closest)
+    if not await asyncio.to_thread(page_cache.contains, snapshot_url):
+        await resurrect_snapshot(snapshot_url, closest['timestamp'])
+    return snapshot_url
+
+page_warmer = PageWarmer(warm_favorite)
+
 @app.post("/api/browse")
-async def browse_dead_web(data: BrowseData):
+async def browse_dead_web(data: BrowseData, request: Request):
     """
     TASK 4: The Resurrection - Fetch dead websites with proper redirect handling and base tag
+    Rewritten pages are cached per snapshot; send If-None-Match with the ETag of a
+    previous answer to get a bodyless 304 back.
     """
     target_url = data.url
     
     try:
-        print(f"🔍 Resurrection request: {target_url}")
+        log.info("🔍 Resurrection request", url=target_url)
         
         # Query Wayback Machine API for snapshot with custom timestamp
         timestamp = data.timestamp if hasattr(data, 'timestamp') else "1998"
-        # Use HTTPS to avoid mixed content errors on deployed site
-        wayback_api = f"https://archive.org/wayback/available?url={target_url}&timestamp={timestamp}"
-        
-        print(f"📡 Querying Wayback API: {wayback_api}")
-        response = requests.get(wayback_api, timeout=10, allow_redirects=True)
-        wayback_data = response.json()
-        
-        print(f"📦 Wayback response: {wayback_data}")
-        
-        if not wayback_data.get('archived_snapshots') or not wayback_data['archived_snapshots'].get('closest'):
-            print(f"❌ No archived version found for {target_url} at timestamp {timestamp}")
-            
-            # FALLBACK: Try without specific timestamp (get any available snapshot)
-            if timestamp != "1998":
-                print(f"🔄 Retrying without specific timestamp...")
-                wayback_api_fallback = f"https://archive.org/wayback/available?url={target_url}"
-                response_fallback = requests.get(wayback_api_fallback, timeout=10, allow_redirects=True)
-                wayback_data = response_fallback.json()
-                
-                if not wayback_data.get('archived_snapshots') or not wayback_data['archived_snapshots'].get('closest'):
-                    print(f"❌ Still no archived version found")
-                    return {"error": "No archived version found in the void", "html": None}
-                else:
-                    print(f"✅ Found snapshot without specific timestamp")
-            else:
-                return {"error": "No archived version found in the void", "html": None}
-        
-        snapshot_url = wayback_data['archived_snapshots']['closest']['url']
-        print(f"📸 Snapshot URL: {snapshot_url}")
-        
-        # CRITICAL FIX: Force HTTPS for Web Archive URLs to avoid mixed content errors
-        if snapshot_url.startswith('http://'):
-            snapshot_url = snapshot_url.replace('http://', 'https://', 1)
-            print(f"🔒 Upgraded to HTTPS: {snapshot_url}")
-        
-        # TASK 4: Fetch with redirect handling
-        print(f"⬇️ Fetching archived page...")
-        archived_response = requests.get(snapshot_url, timeout=15, allow_redirects=True)
-        print(f"✅ Fetched {len(archived_response.text)} bytes")
-        archived_html = archived_response.text
-        
-        # Extract final URL after redirects
-        final_wayback_url = archived_response.url
-        base_archive_url = '/'.join(final_wayback_url.split('/')[:6])
-        
-        # CRITICAL: Convert ALL HTTP URLs to HTTPS in the HTML to avoid mixed content
-        print(f"🔒 Converting all HTTP URLs to HTTPS...")
-        archived_html = archived_html.replace('http://web.archive.org/', 'https://web.archive.org/')
-        archived_html = archived_html.replace('http://archive.org/', 'https://archive.org/')
-        
-        # Parse with BeautifulSoup
-        soup = BeautifulSoup(archived_html, 'html.parser')
-        
-        # REMOVE WAYBACK MACHINE TOOLBAR
-        for toolbar in soup.find_all(id=lambda x: x and 'wm-' in x.lower()):
-            toolbar.decompose()
-        for toolbar in soup.find_all(class_=lambda x: x and 'wayback' in str(x).lower()):
-            toolbar.decompose()
-        for script in soup.find_all('script', src=lambda x: x and 'archive.org' in str(x)):
-            script.decompose()
-        
-        # CRITICAL: Remove meta refresh tags that cause redirects
-        for meta in soup.find_all('meta'):
-            if meta.get('http-equiv', '').lower() == 'refresh':
-                print(f"   🚫 Removed meta refresh: {meta.get('content', '')}")
-                meta.decompose()
-        
-        # Remove JavaScript redirects (window.location, location.href, etc.)
-        for script in soup.find_all('script'):
-            if script.string:
-                script_content = script.string.lower()
-                if any(keyword in script_content for keyword in ['window.location', 'location.href', 'location.replace', 'location.assign']):
-                    print(f"   🚫 Removed redirect script")
-                    script.decompose()
-        
-        # CRITICAL FIX: Convert relative Web Archive URLs to absolute HTTPS URLs
-        # Without base tag, relative URLs like "/web/..." try to load from OUR domain
-        archive_base = 'https://web.archive.org'
-        
-        for tag in soup.find_all(['img', 'link', 'script', 'iframe']):
-            for attr in ['src', 'href']:
-                if tag.has_attr(attr):
-                    url = tag[attr]
-                    # Fix relative Web Archive URLs
-                    if url.startswith('/web/'):
-                        tag[attr] = archive_base + url
-                        print(f"   🔧 Fixed relative URL: {tag[attr][:60]}...")
-                    # Upgrade HTTP to HTTPS
-                    elif url.startswith('http://'):
-                        tag[attr] = url.replace('http://', 'https://', 1)
-                        print(f"   🔒 Upgraded {attr}: {tag[attr][:50]}...")
-        
-        # ISSUE 2 FIX: DISABLE ALL HYPERLINKS (pointer-events: none)
-        disable_links_style = soup.new_tag('style')
-        disable_links_style.string = """
-        a, a:link, a:visited, a:hover, a:active {
-            pointer-events: none !important;
-            cursor: default !important;
-            text-decoration: none !important;
-            color: inherit !important;
-        }
-        """
-        
-        # REMOVED BASE TAG - It was causing unwanted redirects
-        # Instead, we'll let relative URLs break (they're dead anyway)
-        
-        # INJECT OUR HAUNTING SCRIPTS WITH AGGRESSIVE LINK BLOCKING
-        haunting_script = soup.new_tag('script')
-        haunting_script.string = """
-        // CRITICAL: Block ALL navigation attempts
-        (function() {
-            // Prevent all clicks on links
-            document.addEventListener('click', function(e) {
-                let target = e.target;
-                // Traverse up to find if we clicked on or inside a link
-                while (target && target !== document) {
-                    if (target.tagName === 'A') {
-                        e.preventDefault();
-                        e.stopPropagation();
-                        e.stopImmediatePropagation();
-                        console.log('🚫 Navigation blocked - you cannot escape');
-                        return false;
-                    }
-                    target = target.parentElement;
-                }
-            }, true); // Use capture phase to catch it early
-            
-            // Block form submissions
-            document.addEventListener('submit', function(e) {
-                e.preventDefault();
-                e.stopPropagation();
-                console.log('🚫 Form submission blocked');
-                return false;
-            }, true);
-            
-            // Override window.location
-            const originalLocation = window.location;
-            Object.defineProperty(window, 'location', {
-                get: function() { return originalLocation; },
-                set: function(val) { 
-                    console.log('🚫 Location change blocked:', val);
-                    return originalLocation;
-                }
-            });
-            
-            console.log('🔒 All navigation locked - you are trapped here');
-        })();
-        
-        // Subliminal Messages
-        console.log('%c⚠️ Connection established with the void...', 'color: red; font-size: 14px;');
-        setTimeout(() => console.log('%cDon\\'t trust the text.', 'color: #666; font-style: italic;'), 3000);
-        setTimeout(() => console.log('%cThey are rewriting your memories...', 'color: red;'), 7000);
-        setTimeout(() => console.log('%c404: Soul not found', 'color: red; font-weight: bold;'), 12000);
-        """
-        
-        # DON'T inject style.css or script.js - they cause 404 errors
-        # The archived page should be self-contained
-        
-        # Inject into head (NO BASE TAG - prevents redirects)
-        if soup.head:
-            soup.head.insert(0, haunting_script)  # Navigation blocker FIRST
-            soup.head.append(disable_links_style)  # CSS link disable
+        closest = await locate_snapshot(target_url, timestamp)
+        if not closest:
+            return {"error": "No archived version found in the void", "html": None}
+        
+        snapshot_url = https_snapshot_url(closest)
+        
+        # Same snapshot + same rewrite rules = same page: the client already has it
+        etag = page_etag(snapshot_url)
+        if etag_matches(request.headers.get('if-none-match'), etag):
+            log.info("♻️ Client copy still fresh (304)", snapshot_url=snapshot_url)
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        cached_page = await asyncio.to_thread(page_cache.get, snapshot_url)
+        if cached_page:
+            log.info("🗃️ Page cache hit", snapshot_url=snapshot_url)
+            final_html, resurrection_time = cached_page.html, cached_page.timestamp
         else:
-            head = soup.new_tag('head')
-            head.append(haunting_script)  # Navigation blocker FIRST
-            head.append(disable_links_style)  # CSS link disable
-            if soup.html:
-                soup.html.insert(0, head)
-        
-        # CRITICAL: Handle framesets (they don't work with innerHTML)
-        if soup.frameset:
-            print(f"   ⚠️ Detected frameset - converting to regular page")
-            # Create a new body with iframe for the main frame
-            new_body = soup.new_tag('body')
-            new_body['data-possessed'] = 'true'
-            new_body['data-resurrection-time'] = wayback_data['archived_snapshots']['closest']['timestamp']
-            
-            # Add message about frames
-            warning = soup.new_tag('div')
-            warning.string = "This page used frames. Frames are dead. Only the void remains."
-            warning['style'] = 'color: #0f0; font-family: monospace; padding: 20px; text-align: center;'
-            new_body.append(warning)
-            
-            # Replace frameset with body
-            soup.frameset.replace_with(new_body)
-        elif soup.body:
-            soup.body['data-possessed'] = 'true'
-            soup.body['data-resurrection-time'] = wayback_data['archived_snapshots']['closest']['timestamp']
-        
-        # Convert soup to string
-        final_html = str(soup)
+            final_html = await resurrect_snapshot(snapshot_url, closest['timestamp'])
+            resurrection_time = closest['timestamp']
         
-        # FINAL CRITICAL STEP: Force ALL remaining HTTP URLs to HTTPS
-        print(f"🔒 Final HTTPS conversion pass...")
-        final_html = final_html.replace('http://web.archive.org/', 'https://web.archive.org/')
-        final_html = final_html.replace('http://archive.org/', 'https://archive.org/')
-        final_html = final_html.replace('href="http://', 'href="https://')
-        final_html = final_html.replace('src="http://', 'src="https://')
-        
-        http_count = final_html.count('http://web.archive.org/')
-        https_count = final_html.count('https://web.archive.org/')
-        print(f"   HTTP URLs remaining: {http_count}")
-        print(f"   HTTPS URLs: {https_count}")
-        
-        return {
-            "html": final_html,
-            "snapshot_url": snapshot_url,
-            "timestamp": wayback_data['archived_snapshots']['closest']['timestamp']
-        }
+        # JSON-encode here (instead of after returning) so the cost shows up in /metrics
+        with SERIALIZE_SECONDS.time(kind="json"):
+            return JSONResponse({
+                "html": final_html,
+                "snapshot_url": snapshot_url,
+                "timestamp": resurrection_time
+            }, headers={"ETag": etag})
         
     except Exception as e:
-        print(f"❌ Resurrection failed: {type(e).__name__}: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("❌ Resurrection failed", url=target_url)
         return {"error": str(e), "html": None}
 
-@mcp.tool()
+HTML_MEDIA_TYPE = "text/html; charset=utf-8"
+STREAM_CHUNK_BYTES = 64 * 1024
+
+@app.get("/api/browse/stream")
+async def browse_dead_web_stream(request: Request, url: str, timestamp: str = "1998"):
+    """
+    Streaming /api/browse: the possessed page comes back as chunked text/html,
+    rewritten while it is still downloading from the archive, so the client can
+    start rendering before the end of the page exists anywhere.
+    Snapshot URL/timestamp ride in X-Snapshot-Url / X-Snapshot-Timestamp headers;
+    ETag / If-None-Match work like /api/browse. Errors are JSON {"error": ...}.
+    """
+    log.info("🔍 Streaming resurrection request", url=url)
+    try:
+        closest = await locate_snapshot(url, timestamp)
+    except Exception as e:
+        log.warning("❌ Resurrection failed", url=url, error=f"{type(e).__name__}: {e}")
+        return JSONResponse({"error": str(e)}, status_code=502)
+    if not closest:
+        return JSONResponse({"error": "No archived version found in the void"}, status_code=404)
+    
+    snapshot_url = https_snapshot_url(closest)
+    etag = page_etag(snapshot_url)
+    headers = {
+        "ETag": etag,
+        "Vary": "Accept-Encoding",
+        "X-Snapshot-Url": snapshot_url,
+        "X-Snapshot-Timestamp": closest['timestamp'],
+    }
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        log.info("♻️ Client copy still fresh (304)", snapshot_url=snapshot_url)
+        return Response(status_code=304, headers=headers)
+    
+    cached_page = await asyncio.to_thread(page_cache.get, snapshot_url)
+    if cached_page:
+        log.info("🗃️ Page cache hit", snapshot_url=snapshot_url)
+        headers["X-Snapshot-Timestamp"] = cached_page.timestamp
+        if 'gzip' in request.headers.get('accept-encoding', ''):
+            # Cached pages are already gzip - hand the bytes over as they are
+            headers["Content-Encoding"] = "gzip"
+            return Response(cached_page.compressed, media_type=HTML_MEDIA_TYPE, headers=headers)
+        return StreamingResponse(iter_gunzip(cached_page.compressed), media_type=HTML_MEDIA_TYPE, headers=headers)
+    
+    fetch_started = time.perf_counter()
+    try:
+        upstream = await archive.open(snapshot_url)
+    except Exception as e:
+        ARCHIVE_FETCH_SECONDS.observe(time.perf_counter() - fetch_started, mode="stream", outcome="error")
+        log.warning("❌ Resurrection failed", url=url, error=f"{type(e).__name__}: {e}")
+        return JSONResponse({"error": str(e)}, status_code=502)
+    
+    log.info("⬇️ Streaming archived page", snapshot_url=snapshot_url)
+    return StreamingResponse(
+        stream_resurrection(upstream, snapshot_url, closest['timestamp'], fetch_started),
+        media_type=HTML_MEDIA_TYPE,
+        headers=headers
+    )
+
+async def stream_resurrection(upstream, snapshot_url: str, resurrection_time: str, fetch_started: float):
+    """
+    Archive bytes in -> possessed HTML out, chunk by chunk. The output is gzipped
+    on the fly for the page cache; only a completely streamed page gets cached.
+    Rewrite and gzip time are summed over the chunks for /metrics.
+    """
+    resurrector = Resurrector(resurrection_time, archive.capture_base(snapshot_url), ASSET_PREFIX)
+    gzipper = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    compressed = []
+    rewrite_seconds = gzip_seconds = 0.0
+    outcome = "aborted"  # Client went away mid-page
+    try:
+        async for text in upstream.aiter_text():
+            started = time.perf_counter()
+            html = resurrector.feed(text)
+            rewrite_seconds += time.perf_counter() - started
+            if html:
+                chunk = html.encode('utf-8')
+                started = time.perf_counter()
+                compressed.append(gzipper.compress(chunk))
+                gzip_seconds += time.perf_counter() - started
+                yield chunk
+        started = time.perf_counter()
+        chunk = resurrector.close().encode('utf-8')
+        rewrite_seconds += time.perf_counter() - started
+        compressed.append(gzipper.compress(chunk))
+        compressed.append(gzipper.flush())
+        outcome = "ok"
+        if chunk:
+            yield chunk
+    except (httpx.HTTPError, ArchiveError) as e:
+        outcome = "error"
+        log.warning("❌ Archive stream broke off", snapshot_url=snapshot_url, error=f"{type(e).__name__}: {e}")
+        return
+    finally:
+        await upstream.aclose()
+        ARCHIVE_FETCH_SECONDS.observe(time.perf_counter() - fetch_started, mode="stream", outcome=outcome)
+        REWRITE_SECONDS.observe(rewrite_seconds, mode="stream")
+        SERIALIZE_SECONDS.observe(gzip_seconds, kind="gzip")
+    
+    await asyncio.to_thread(page_cache.put_compressed, snapshot_url, resurrection_time, b"".join(compressed))
+
+def iter_gunzip(compressed: bytes):
+    gunzipper = zlib.decompressobj(31)
+    for i in range(0, len(compressed), STREAM_CHUNK_BYTES):
+        chunk = gunzipper.decompress(compressed[i:i + STREAM_CHUNK_BYTES])
+        if chunk:
+            yield chunk
+    tail = gunzipper.flush()
+    if tail:
+        yield tail
+
+@app.get(ASSET_PROXY_PATH + "/{capture:path}")
+async def archived_asset(capture: str, request: Request):
+    """
+    Same-origin archived subresource: /archive/web/<timestamp><mode>/<url>
+    Served from the asset cache (fetched from web.archive.org once); anything it
+    can't serve is redirected to web.archive.org.
+    """
+    url = capture_url(capture + (f"?{request.url.query}" if request.url.query else ""))
+    if url is None:
+        return JSONResponse({"error": "Not an archived capture"}, status_code=404)
+    
+    asset = await asset_proxy.get(url)
+    if asset is None:
+        return Response(status_code=302, headers={"Location": url})
+    
+    headers = {"ETag": asset.etag, "Cache-Control": ASSET_CACHE_CONTROL, **ASSET_SECURITY_HEADERS}
+    if etag_matches(request.headers.get('if-none-match'), asset.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(asset.body, media_type=asset.content_type, headers=headers)
+
 def consult_spirits(name: str) -> str:
     """
     Consult the spirits for a scary personalized message.
@@ -666,6 +876,24 @@ def consult_spirits(name: str) -> str:
     
     return random.choice(messages)
 
+_mcp = None
+
+def __getattr__(name):
+    """
+    `mcp`: the ghost_brain MCP server (consult_spirits tool), for `fastmcp run backend/main.py:mcp`.
+    Built on first access so fastmcp isn't imported on every cold start.
+    """
+    global _mcp
+    if name != 'mcp':
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if _mcp is None:
+        FastMCP = lazy_import('fastmcp').FastMCP
+        _mcp = FastMCP("ghost_brain")
+        _mcp.tool()(consult_spirits)
+    return _mcp
+
+mark("module loaded")
+
 if __name__ == "__main__":
     # Run FastAPI server
     # Use PORT environment variable for cloud deployment (Render, Heroku, etc.)
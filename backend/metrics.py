@@ -0,0 +1,255 @@
+"""
+Metrics - Prometheus text exposition without extra dependencies
+
+Counters, gauges and histograms live in one process-wide REGISTRY and are
+rendered by /metrics (text format 0.0.4). Values are per worker process -
+scrape every worker, or aggregate with `sum without (instance)` as usual.
+
+Existing stats (cache hit counters and the like) don't need to be counted
+twice: register a callback with REGISTRY.add_collector() that reads them at
+scrape time.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+PREFIX = 'dead_web_'
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 30.0)
+
+# (name, type, help, [(labels, value), ...])
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = PREFIX + name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(dict(zip(self.labelnames, key)))} {_number(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts..., sum, count]
+        self._values: Dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block (also when it raises)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(entry)) for key, entry in self._values.items())
+        lines = []
+        for key, entry in items:
+            labels = dict(zip(self.labelnames, key))
+            for bound, count in zip(self.buckets + (float('inf'),), entry[:len(self.buckets)] + [entry[-1]]):
+                lines.append(f"{self.name}_bucket{_labels({**labels, 'le': _number(bound)})} {count}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {entry[-2]!r}")
+            lines.append(f"{self.name}_count{_labels(labels)} {entry[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (),
+                  buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]):
+        """collector() yields (name, type, help, [(labels, value), ...]) at scrape time"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        for collector in self._collectors:
+            for name, kind, help, samples in collector():
+                lines.append(f"# HELP {PREFIX}{name} {help}")
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+                lines.extend(f"{PREFIX}{name}{_labels(labels)} {_number(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Where heartbeat and browse time goes
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'http_request_seconds', 'HTTP request latency until response headers', ('method', 'route', 'status'))
+GEMINI_SECONDS = REGISTRY.histogram(
+    'gemini_call_seconds', 'Gemini generate_content latency, queueing included', ('mode', 'outcome'))
+WAYBACK_AVAILABILITY_SECONDS = REGISTRY.histogram(
+    'wayback_availability_seconds', 'archive.org availability API latency (cache misses only)', ('outcome',))
+ARCHIVE_FETCH_SECONDS = REGISTRY.histogram(
+    'archive_fetch_seconds', 'Archived page download latency', ('mode', 'outcome'))
+REWRITE_SECONDS = REGISTRY.histogram(
+    'html_rewrite_seconds', 'Resurrection rewrite time per page (streamed pages: summed over chunks)', ('mode',))
+SERIALIZE_SECONDS = REGISTRY.histogram(
+    'serialize_seconds', 'Response/cache serialization time', ('kind',))
+GEMINI_INPUT_TOKENS = REGISTRY.histogram(
+    'gemini_input_tokens', 'Prompt tokens per Gemini call (usage_metadata)', ('mode',),
+    buckets=(100, 250, 500, 750, 1000, 1500, 2000, 3000, 5000))
+GEMINI_TOKENS = REGISTRY.counter(
+    'gemini_tokens_total', 'Gemini tokens by kind: input (billed), cached_input, output', ('kind',))
+
+FALLBACK_THREATS = REGISTRY.counter(
+    'fallback_threats_total', 'Heartbeats answered from the threat corpus instead of a live Gemini call', ('reason',))
+GEMINI_SHED = REGISTRY.counter(
+    'gemini_shed_total', 'Vision calls the scheduler refused to send upstream', ('reason',))
+GEMINI_QUEUE_DEPTH = REGISTRY.gauge('gemini_queue_depth', 'Vision calls waiting for quota')
+HEARTBEATS_IN_FLIGHT = REGISTRY.gauge('heartbeats_in_flight', 'Heartbeats this worker is answering right now')
+NEXT_INTERVAL_SECONDS = REGISTRY.histogram(
+    'next_interval_seconds', 'next_interval_ms hints sent to clients', ('kind',),
+    buckets=(5, 10, 20, 30, 45, 60, 90, 120, 180, 300))
+WS_SOUL_CONNECTIONS = REGISTRY.counter('ws_soul_connections_total', '/ws/soul connections accepted')
+WS_SOUL_ACTIVE = REGISTRY.gauge('ws_soul_active_sockets', 'Open /ws/soul sockets')
+WS_DROPPED_MESSAGES = REGISTRY.counter(
+    'ws_dropped_messages_total', 'Broadcasts dropped for souls whose send queue was full', ('policy',))
+WS_SLOW_DISCONNECTS = REGISTRY.counter('ws_slow_disconnects_total', 'Souls disconnected for not keeping up')
+BACKPLANE_EVENTS = REGISTRY.counter(
+    'backplane_events_total', 'Broadcast events this worker published to / received from the backplane', ('direction',))
+
+
+def cache_collector(caches: Dict[str, Callable[[], dict]],
+                    results=('hits', 'negative_hits', 'disk_hits', 'misses')) -> Callable[[], Iterable[Family]]:
+    """Expose the hit/miss counters the caches already keep as dead_web_cache_lookups_total"""
+    def collect():
+        samples = []
+        for cache, stats in caches.items():
+            values = stats()
+            samples.extend(({"cache": cache, "result": result}, values[result])
+                           for result in results if result in values)
+        yield 'cache_lookups_total', 'counter', 'Cache lookups by cache and result', samples
+    return collect
+
+
+def status_class(status: Optional[int]) -> str:
+    return f"{status // 100}xx" if status else "error"
+
+
+class RequestMetricsMiddleware:
+    """
+    Pure ASGI middleware (no response buffering) feeding HTTP_REQUEST_SECONDS.
+    Labelled with the matched route template, not the raw path.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status = None
+
+        async def send_observed(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                self._observe(scope, started, status)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_observed)
+        finally:
+            if status is None:
+                self._observe(scope, started, None)
+
+    @staticmethod
+    def _observe(scope, started: float, status: Optional[int]):
+        route = getattr(scope.get('route'), 'path', 'unmatched')
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method=scope['method'],
+                                     route=route, status=status_class(status))
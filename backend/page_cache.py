@@ -0,0 +1,203 @@
+"""
+Page Cache - fully rewritten resurrected pages, gzip-compressed
+
+resurrect_html() is deterministic for a given snapshot, so its output is cached
+under sha256(REWRITE_RULES_VERSION [+ asset proxy flag] + snapshot URL):
+- memory: LRU bounded by compressed bytes (PAGE_CACHE_MEMORY_BYTES)
+- disk: one .page file per page in PAGE_CACHE_DIR, LRU by mtime, bounded by
+  PAGE_CACHE_DISK_BYTES; shared by every worker on the box
+
+The cache key doubles as the page's ETag, so /api/browse can answer
+If-None-Match with a 304 without touching the page at all.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from backend.asset_proxy import ASSET_PROXY
+from backend.logs import get_logger
+from backend.metrics import SERIALIZE_SECONDS
+from backend.resurrection import REWRITE_RULES_VERSION
+
+log = get_logger(__name__)
+
+# Empty string disables the disk layer
+PAGE_CACHE_DIR = os.getenv('PAGE_CACHE_DIR', '.page_cache')
+PAGE_CACHE_MEMORY_BYTES = int(os.getenv('PAGE_CACHE_MEMORY_BYTES', str(32 * 1024 * 1024)))
+PAGE_CACHE_DISK_BYTES = int(os.getenv('PAGE_CACHE_DISK_BYTES', str(256 * 1024 * 1024)))
+
+
+@dataclass
+class CachedPage:
+    snapshot_url: str
+    timestamp: str
+    etag: str
+    compressed: bytes
+
+    @property
+    def html(self) -> str:
+        return gzip.decompress(self.compressed).decode('utf-8')
+
+
+def page_key(snapshot_url: str) -> str:
+    # Pages rewritten for the asset proxy point at /archive/ - never mix them with plain ones
+    rules = f"{REWRITE_RULES_VERSION}+assets" if ASSET_PROXY else REWRITE_RULES_VERSION
+    return hashlib.sha256(f"{rules}\n{snapshot_url}".encode('utf-8')).hexdigest()
+
+
+def page_etag(snapshot_url: str) -> str:
+    return f'"{page_key(snapshot_url)[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match header check (weak comparison, '*' matches anything)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == '*' or candidate == etag:
+            return True
+    return False
+
+
+class PageCache:
+    def __init__(self, directory: str = PAGE_CACHE_DIR, memory_bytes: int = PAGE_CACHE_MEMORY_BYTES,
+                 disk_bytes: int = PAGE_CACHE_DISK_BYTES):
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._pages: "OrderedDict[str, CachedPage]" = OrderedDict()
+        self._memory_used = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def get(self, snapshot_url: str) -> Optional[CachedPage]:
+        key = page_key(snapshot_url)
+        with self._lock:
+            page = self._pages.get(key)
+            if page is not None:
+                self._pages.move_to_end(key)
+                self.hits += 1
+                return page
+
+        page = self._read_disk(key)
+        with self._lock:
+            if page is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, page)
+        return page
+
+    def contains(self, snapshot_url: str) -> bool:
+        """Page cached in memory or on disk (no stats, no read)"""
+        key = page_key(snapshot_url)
+        if key in self._pages:
+            return True
+        return bool(self.directory) and os.path.exists(self._path(key))
+
+    def put(self, snapshot_url: str, timestamp: str, html: str) -> CachedPage:
+        with SERIALIZE_SECONDS.time(kind="gzip"):
+            compressed = gzip.compress(html.encode('utf-8'), compresslevel=6)
+        return self.put_compressed(snapshot_url, timestamp, compressed)
+
+    def put_compressed(self, snapshot_url: str, timestamp: str, compressed: bytes) -> CachedPage:
+        """Store an already gzip-compressed page (e.g. built up while streaming it out)"""
+        key = page_key(snapshot_url)
+        page = CachedPage(snapshot_url, timestamp, page_etag(snapshot_url), compressed)
+        with self._lock:
+            self._remember(key, page)
+        self._write_disk(key, page)
+        return page
+
+    def stats(self) -> dict:
+        return {
+            "pages_in_memory": len(self._pages),
+            "memory_bytes": self._memory_used,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
+
+    def _remember(self, key: str, page: CachedPage):
+        old = self._pages.pop(key, None)
+        if old is not None:
+            self._memory_used -= len(old.compressed)
+        self._pages[key] = page
+        self._memory_used += len(page.compressed)
+        while self._memory_used > self.memory_bytes and len(self._pages) > 1:
+            _, evicted = self._pages.popitem(last=False)
+            self._memory_used -= len(evicted.compressed)
+
+    # Disk layout: <key>.page = json meta line + "\n" + gzip(html)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.page")
+
+    def _read_disk(self, key: str) -> Optional[CachedPage]:
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                meta = json.loads(f.readline())
+                compressed = f.read()
+            os.utime(path)  # LRU bump
+        except (OSError, ValueError):
+            return None
+        try:
+            # A truncated/corrupt file would only fail mid-response; treat it as a miss instead
+            gzip.decompress(compressed)
+        except (OSError, EOFError, zlib.error):
+            log.warning("⚠️ Corrupt page cache file dropped", path=path)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return CachedPage(meta["snapshot_url"], meta["timestamp"], page_etag(meta["snapshot_url"]), compressed)
+
+    def _write_disk(self, key: str, page: CachedPage):
+        if not self.directory:
+            return
+        meta = json.dumps({"snapshot_url": page.snapshot_url, "timestamp": page.timestamp}).encode('utf-8')
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(meta + b"\n" + page.compressed)
+            os.replace(tmp, path)  # Atomic - other workers never see half a page
+        except OSError as e:
+            log.warning("⚠️ Page cache write failed", path=path, error=str(e))
+            return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        try:
+            entries = [e for e in os.scandir(self.directory) if e.name.endswith('.page')]
+        except OSError:
+            return
+        stats = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in entries]
+        used = sum(size for _, size, _ in stats)
+        for _, size, path in sorted(stats):
+            if used <= self.disk_bytes:
+                break
+            try:
+                os.remove(path)
+                used -= size
+            except OSError:
+                pass
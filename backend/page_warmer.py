@@ -0,0 +1,121 @@
+"""
+Page Warmer - resurrects the favorites before anyone clicks them
+
+A cold worker (fresh deploy, Render spin-up) would otherwise pay the Wayback
+availability lookup + archive fetch + rewrite on the first click of every
+favorite. Shortly after startup the warmer resolves each WARM_TARGETS entry and
+puts the rewritten page into the page cache, then repeats every
+WARM_REFRESH_SECONDS so availability answers and cached pages never go cold.
+
+WARM_TARGETS is a comma-separated list of url@timestamp (timestamp optional,
+defaults to the usual "1998"); set it to an empty string to disable warming.
+"""
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from backend.logs import get_logger
+
+log = get_logger(__name__)
+
+# The favorites in the frontend dropdown (frontend/index.html)
+DEFAULT_WARM_TARGETS = ",".join([
+    "http://www.heavensgate.com@19970327",
+    "http://www.spacejam.com@19961201",
+    "http://theshadowlands.net@19970710",
+    "http://www.artbell.com@19970205",
+    "http://www.cnn.com@19960101",
+])
+WARM_TARGETS = os.getenv('WARM_TARGETS', DEFAULT_WARM_TARGETS)
+WARM_REFRESH_SECONDS = float(os.getenv('WARM_REFRESH_SECONDS', str(3 * 3600)))
+WARM_CONCURRENCY = int(os.getenv('WARM_CONCURRENCY', '2'))
+# Let the worker finish booting before hitting archive.org
+WARM_START_DELAY_SECONDS = float(os.getenv('WARM_START_DELAY_SECONDS', '2'))
+
+
+def parse_targets(spec: str) -> List[Tuple[str, str]]:
+    targets = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        url, _, timestamp = item.rpartition('@') if '@' in item else (item, '', '')
+        targets.append((url.strip(), timestamp.strip() or "1998"))
+    return targets
+
+
+class PageWarmer:
+    """
+    warm_one(url, timestamp) must leave the page in the page cache and return the
+    snapshot URL it resolved to, or None when the archive has nothing for it.
+    """
+
+    def __init__(self, warm_one: Callable[[str, str], Awaitable[Optional[str]]],
+                 targets: Optional[List[Tuple[str, str]]] = None,
+                 refresh_seconds: float = WARM_REFRESH_SECONDS, concurrency: int = WARM_CONCURRENCY):
+        self.warm_one = warm_one
+        self.targets = parse_targets(WARM_TARGETS) if targets is None else targets
+        self.refresh_seconds = refresh_seconds
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+        self._task: Optional[asyncio.Task] = None
+        self._status = {target: {"state": "pending"} for target in self.targets}
+        self.runs = 0
+        self.last_run_at: Optional[float] = None
+
+    def start(self, delay: float = WARM_START_DELAY_SECONDS):
+        if self.targets and self._task is None:
+            self._task = asyncio.create_task(self._run(delay))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def warm_all(self):
+        await asyncio.gather(*(self._warm(url, timestamp) for url, timestamp in self.targets))
+        self.runs += 1
+        self.last_run_at = time.time()
+        warm = sum(1 for s in self._status.values() if s["state"] == "warm")
+        log.info("🔥 Page warmer run finished", warm=warm, targets=len(self.targets))
+
+    def status(self) -> dict:
+        return {
+            "targets": len(self.targets),
+            "warm": sum(1 for s in self._status.values() if s["state"] == "warm"),
+            "runs": self.runs,
+            "last_run_at": self.last_run_at,
+            "refresh_seconds": self.refresh_seconds,
+            "pages": [{"url": url, "timestamp": timestamp, **self._status[(url, timestamp)]}
+                      for url, timestamp in self.targets],
+        }
+
+    async def _run(self, delay: float):
+        await asyncio.sleep(delay)
+        while True:
+            await self.warm_all()
+            await asyncio.sleep(self.refresh_seconds)
+
+    async def _warm(self, url: str, timestamp: str):
+        async with self._slots:
+            started = time.monotonic()
+            try:
+                snapshot_url = await self.warm_one(url, timestamp)
+            except Exception as e:
+                log.warning("⚠️ Page warmer failed", url=url, timestamp=timestamp, error=f"{type(e).__name__}: {e}")
+                self._status[(url, timestamp)] = {
+                    **self._status[(url, timestamp)],
+                    "state": "failed",
+                    "error": f"{type(e).__name__}: {e}",
+                }
+                return
+            self._status[(url, timestamp)] = {
+                "state": "warm" if snapshot_url else "empty",
+                "snapshot_url": snapshot_url,
+                "warmed_at": time.time(),
+                "seconds": round(time.monotonic() - started, 3),
+            }
@@ -0,0 +1,413 @@
+"""
+Resurrection - rewrites an archived Wayback page so it can live inside our window
+
+Strips the Wayback toolbar, meta refresh and JS redirects, forces archive URLs to
+HTTPS, neuters links and injects the navigation-blocking haunting script.
+
+Everything happens in ONE streaming pass over html.parser tokens - no tree is
+built and tags nobody touches are copied through as they were written. Feed the
+archived page in chunks with Resurrector.feed()/close() (each returns the
+rewritten HTML that is ready so far), or call resurrect_html() for a whole page.
+
+Raw captures (local WARC corpus, see warc_archive.py) haven't been through
+Wayback's own URL rewriting: pass their original URL and images, scripts,
+stylesheets and backgrounds are pointed at the matching web.archive.org capture.
+With an asset prefix (ASSET_PROXY=1, see asset_proxy.py) those web.archive.org
+subresource URLs are made same-origin instead.
+
+The output only depends on the archived HTML and the snapshot timestamp, so it
+can be cached per snapshot (see page_cache.py). Bump REWRITE_RULES_VERSION
+whenever the output of resurrect_html changes so stale cached pages are ignored.
+"""
+from html import escape
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin
+
+from backend.logs import get_logger
+
+log = get_logger(__name__)
+
+REWRITE_RULES_VERSION = "2"
+
+# Without a base tag, relative URLs like "/web/..." would load from OUR domain
+ARCHIVE_BASE = 'https://web.archive.org'
+# CRITICAL: archive URLs are forced to HTTPS everywhere (text and scripts too) to avoid mixed content
+ARCHIVE_HTTPS = (
+    ('http://web.archive.org/', 'https://web.archive.org/'),
+    ('http://archive.org/', 'https://archive.org/'),
+)
+# Rewritten to absolute archive URLs when they start with /web/
+URL_FIX_TAGS = frozenset({'img', 'link', 'script', 'iframe'})
+# Raw captures: subresource attributes routed to web.archive.org, with the Wayback mode per tag
+ARCHIVED_RESOURCE_MODES = {
+    'img': 'im_', 'embed': 'im_', 'bgsound': 'im_', 'body': 'im_', 'table': 'im_', 'td': 'im_', 'th': 'im_',
+    'script': 'js_', 'link': 'cs_', 'iframe': 'if_',
+}
+ARCHIVED_RESOURCE_ATTRS = ('src', 'href', 'background')
+# Subresources served same-origin by the asset proxy (iframes hold whole pages - not proxied)
+PROXIED_TAGS = frozenset(ARCHIVED_RESOURCE_MODES) - {'iframe'}
+ASSET_PROXY_PATH = '/archive'
+UNARCHIVED_PREFIXES = ('#', '/web/', 'data:', 'javascript:', 'mailto:', 'about:')
+REDIRECT_KEYWORDS = ('window.location', 'location.href', 'location.replace', 'location.assign')
+VOID_TAGS = frozenset({
+    'area', 'base', 'basefont', 'bgsound', 'br', 'col', 'embed', 'frame', 'hr', 'img',
+    'input', 'isindex', 'keygen', 'link', 'meta', 'param', 'source', 'track', 'wbr',
+})
+
+# ISSUE 2 FIX: DISABLE ALL HYPERLINKS (pointer-events: none)
+DISABLE_LINKS_STYLE = """
+        a, a:link, a:visited, a:hover, a:active {
+            pointer-events: none !important;
+            cursor: default !important;
+            text-decoration: none !important;
+            color: inherit !important;
+        }
+        """
+
+# INJECT OUR HAUNTING SCRIPTS WITH AGGRESSIVE LINK BLOCKING
+HAUNTING_SCRIPT = """
+        // CRITICAL: Block ALL navigation attempts
+        (function() {
+            // Prevent all clicks on links
+            document.addEventListener('click', function(e) {
+                let target = e.target;
+                // Traverse up to find if we clicked on or inside a link
+                while (target && target !== document) {
+                    if (target.tagName === 'A') {
+                        e.preventDefault();
+                        e.stopPropagation();
+                        e.stopImmediatePropagation();
+                        console.log('🚫 Navigation blocked - you cannot escape');
+                        return false;
+                    }
+                    target = target.parentElement;
+                }
+            }, true); // Use capture phase to catch it early
+            
+            // Block form submissions
+            document.addEventListener('submit', function(e) {
+                e.preventDefault();
+                e.stopPropagation();
+                console.log('🚫 Form submission blocked');
+                return false;
+            }, true);
+            
+            // Override window.location
+            const originalLocation = window.location;
+            Object.defineProperty(window, 'location', {
+                get: function() { return originalLocation; },
+                set: function(val) { 
+                    console.log('🚫 Location change blocked:', val);
+                    return originalLocation;
+                }
+            });
+            
+            console.log('🔒 All navigation locked - you are trapped here');
+        })();
+        
+        // Subliminal Messages
+        console.log('%c⚠️ Connection established with the void...', 'color: red; font-size: 14px;');
+        setTimeout(() => console.log('%cDon\\'t trust the text.', 'color: #666; font-style: italic;'), 3000);
+        setTimeout(() => console.log('%cThey are rewriting your memories...', 'color: red;'), 7000);
+        setTimeout(() => console.log('%c404: Soul not found', 'color: red; font-weight: bold;'), 12000);
+        """
+
+# CRITICAL: framesets don't work with innerHTML - the whole frameset becomes this body
+FRAMESET_WARNING = "This page used frames. Frames are dead. Only the void remains."
+FRAMESET_WARNING_STYLE = 'color: #0f0; font-family: monospace; padding: 20px; text-align: center;'
+
+# Head injection states
+_NO_HEAD, _AWAITING_HEAD, _HEAD_OPEN, _HEAD_DONE = range(4)
+
+
+class _ChunkReplacer:
+    """
+    str.replace across chunk boundaries: holds back a tail that could still grow into a match
+    """
+
+    def __init__(self, pairs):
+        self.pairs = pairs
+        self._keep = max(len(old) for old, _ in pairs) - 1
+        self._carry = ""
+
+    def feed(self, text: str) -> str:
+        text = self._carry + text
+        for old, new in self.pairs:
+            text = text.replace(old, new)
+        cut = len(text)
+        for i in range(max(0, len(text) - self._keep), len(text)):
+            tail = text[i:]
+            if any(old.startswith(tail) for old, _ in self.pairs):
+                cut = i
+                break
+        self._carry = text[cut:]
+        return text[:cut]
+
+    def flush(self) -> str:
+        text, self._carry = self._carry, ""
+        return text
+
+
+def _render_starttag(tag: str, attrs: List[Tuple[str, Optional[str]]], self_closing: bool) -> str:
+    parts = [tag]
+    for name, value in attrs:
+        parts.append(name if value is None else f'{name}="{escape(value)}"')
+    return f"<{' '.join(parts)}{'/>' if self_closing else '>'}"
+
+
+def _https_text(text: str) -> str:
+    """Same upgrade the old final pass did over the whole serialized page"""
+    return text.replace('href="http://', 'href="https://').replace('src="http://', 'src="https://')
+
+
+class Resurrector(HTMLParser):
+    """
+    Single-pass streaming rewriter. Removed elements (toolbar, meta refresh,
+    archive scripts) are skipped tag-by-tag until their matching end tag - or,
+    left unclosed, until an enclosing element ends (as BeautifulSoup closes
+    them); scripts are held back until </script> so redirect scripts can be
+    dropped whole.
+    """
+
+    def __init__(self, resurrection_time: str, original_url: Optional[str] = None,
+                 asset_prefix: Optional[str] = None):
+        super().__init__(convert_charrefs=False)
+        self.resurrection_time = resurrection_time
+        self.original_url = original_url
+        self.asset_prefix = asset_prefix
+        self._archive_https = _ChunkReplacer(ARCHIVE_HTTPS)
+        self._out: List[str] = []
+        # Names of the open elements; the one being removed sits at _open[_skip_at]
+        self._open: List[str] = []
+        self._skip_tag: Optional[str] = None
+        self._skip_at = 0
+        # Start tag + contents of the script being held back
+        self._script: Optional[List[str]] = None
+        self._head = _NO_HEAD
+        self._body_possessed = False
+        self.stats = {"removed": 0, "redirects": 0, "urls_fixed": 0, "framesets": 0}
+
+    def feed(self, chunk: str) -> str:
+        super().feed(self._archive_https.feed(chunk))
+        return self._drain()
+
+    def close(self) -> str:
+        super().feed(self._archive_https.flush())
+        super().close()
+        if self._script is not None:
+            self._end_script()
+        if self._head == _AWAITING_HEAD:
+            self._emit_head()
+        elif self._head == _HEAD_OPEN:
+            self._close_head()
+        log.info("🔒 Resurrected", **self.stats)
+        return self._drain()
+
+    # Tokens
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, attrs, self_closing=False)
+
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, attrs, self_closing=True)
+
+    def handle_endtag(self, tag):
+        closes = self._close_open(tag)
+        if tag == 'script' and self._script is not None:
+            self._end_script()
+            return
+        if self._skip_tag is not None:
+            if closes is None or closes > self._skip_at:
+                return  # Stray end tag, or one inside the removed element
+            self._skip_tag = None
+            if closes == self._skip_at:
+                return  # The removed element's own end tag
+            # An enclosing element ended: the unclosed removed element ends with it
+        if tag == 'head' and self._head == _HEAD_OPEN:
+            self._close_head()
+        elif tag == 'html' and self._head == _AWAITING_HEAD:
+            self._emit_head()
+        self._out.append(f"</{tag}>")
+
+    def handle_data(self, data):
+        if self._skip_tag is not None:
+            return
+        if self._script is not None:
+            self._script.append(data)
+        else:
+            self._out.append(_https_text(data))
+
+    def handle_entityref(self, name):
+        if self._skip_tag is None:
+            self._out.append(f"&{name};")
+
+    def handle_charref(self, name):
+        if self._skip_tag is None:
+            self._out.append(f"&#{name};")
+
+    def handle_comment(self, data):
+        if self._skip_tag is None:
+            self._out.append(f"<!--{_https_text(data)}-->")
+
+    def handle_decl(self, decl):
+        if self._skip_tag is None:
+            self._out.append(f"<!{decl}>")
+
+    def handle_pi(self, data):
+        if self._skip_tag is None:
+            self._out.append(f"<?{data}>")
+
+    def unknown_decl(self, data):
+        if self._skip_tag is None:
+            self._out.append(f"<![{data}]>")
+
+    # Rewriting
+
+    def _start(self, tag: str, attrs: List[Tuple[str, Optional[str]]], self_closing: bool):
+        if not self_closing and tag not in VOID_TAGS:
+            self._open.append(tag)
+        if self._skip_tag is not None:
+            return
+
+        if self._head == _AWAITING_HEAD and tag != 'head':
+            self._emit_head()
+        elif self._head == _HEAD_OPEN and tag == 'body':
+            self._close_head()  # </head> was left implied
+
+        if self._is_parasite(tag, attrs):
+            self.stats["removed"] += 1
+            self._skip(tag, self_closing)
+            return
+
+        if tag == 'frameset' and not self._body_possessed:
+            self._body_possessed = True
+            self.stats["framesets"] += 1
+            self._out.append(
+                f'<body data-possessed="true" data-resurrection-time="{escape(self.resurrection_time)}">'
+                f'<div style="{FRAMESET_WARNING_STYLE}">{FRAMESET_WARNING}</div></body>'
+            )
+            self._skip(tag, self_closing)
+            return
+
+        changed = self._fix_urls(tag, attrs)
+        if tag == 'body' and not self._body_possessed:
+            self._body_possessed = True
+            _set_attr(attrs, 'data-possessed', 'true')
+            _set_attr(attrs, 'data-resurrection-time', self.resurrection_time)
+            changed = True
+        text = _render_starttag(tag, attrs, self_closing) if changed else self.get_starttag_text()
+
+        if tag == 'script' and not self_closing:
+            self._script = [text]
+            return
+        self._out.append(text)
+
+        if tag == 'html' and self._head == _NO_HEAD:
+            self._head = _AWAITING_HEAD
+        elif tag == 'head' and self._head in (_NO_HEAD, _AWAITING_HEAD):
+            self._out.append(f"<script>{HAUNTING_SCRIPT}</script>")  # Navigation blocker FIRST
+            self._head = _HEAD_OPEN
+
+    def _is_parasite(self, tag: str, attrs) -> bool:
+        """Wayback toolbar pieces, archive.org scripts and meta refresh redirects"""
+        for name, value in attrs:
+            if not value:
+                continue
+            if name == 'id' and 'wm-' in value.lower():
+                return True
+            if name == 'class' and 'wayback' in value.lower():
+                return True
+            if tag == 'script' and name == 'src' and 'archive.org' in value:
+                return True
+            if tag == 'meta' and name == 'http-equiv' and value.lower() == 'refresh':
+                return True
+        return False
+
+    def _fix_urls(self, tag: str, attrs) -> bool:
+        changed = False
+        for i, (name, value) in enumerate(attrs):
+            if not value:
+                continue
+            if self.original_url and self._archive_resource(tag, name, value):
+                fixed = (f"{ARCHIVE_BASE}/web/{self.resurrection_time}{ARCHIVED_RESOURCE_MODES[tag]}/"
+                         f"{urljoin(self.original_url, value.strip())}")
+            elif tag in URL_FIX_TAGS and name in ('src', 'href') and value.startswith('/web/'):
+                fixed = ARCHIVE_BASE + value
+            elif name.endswith(('src', 'href')) and value.startswith('http://'):
+                fixed = 'https://' + value[len('http://'):]
+            else:
+                fixed = value
+            if self._proxied(tag, name, fixed):
+                fixed = self.asset_prefix + fixed.removeprefix(ARCHIVE_BASE)
+            if fixed == value:
+                continue
+            attrs[i] = (name, fixed)
+            self.stats["urls_fixed"] += 1
+            changed = True
+        return changed
+
+    def _proxied(self, tag: str, name: str, value: str) -> bool:
+        """web.archive.org subresource (or Wayback's root-relative /web/ form) the asset proxy can serve"""
+        return (self.asset_prefix is not None and tag in PROXIED_TAGS and name in ARCHIVED_RESOURCE_ATTRS
+                and value.startswith((ARCHIVE_BASE + '/web/', '/web/')))
+
+    @staticmethod
+    def _archive_resource(tag: str, name: str, value: str) -> bool:
+        if tag not in ARCHIVED_RESOURCE_MODES or name not in ARCHIVED_RESOURCE_ATTRS:
+            return False
+        value = value.strip().lower()
+        return not value.startswith(UNARCHIVED_PREFIXES) and 'archive.org/' not in value
+
+    def _skip(self, tag: str, self_closing: bool):
+        if not self_closing and tag not in VOID_TAGS:
+            self._skip_tag = tag
+            self._skip_at = len(self._open) - 1
+
+    def _close_open(self, tag: str) -> Optional[int]:
+        """Pop the innermost open `tag` and everything opened inside it; its stack index, None if not open"""
+        for i in range(len(self._open) - 1, -1, -1):
+            if self._open[i] == tag:
+                del self._open[i:]
+                return i
+        return None
+
+    def _end_script(self):
+        start, body = self._script[0], "".join(self._script[1:])
+        self._script = None
+        # Remove JavaScript redirects (window.location, location.href, etc.)
+        if any(keyword in body.lower() for keyword in REDIRECT_KEYWORDS):
+            self.stats["redirects"] += 1
+            return
+        self._out.append(f"{start}{_https_text(body)}</script>")
+
+    def _emit_head(self):
+        # Page without a <head>: give it one right inside <html>
+        self._out.append(f"<head><script>{HAUNTING_SCRIPT}</script><style>{DISABLE_LINKS_STYLE}</style></head>")
+        self._head = _HEAD_DONE
+
+    def _close_head(self):
+        self._out.append(f"<style>{DISABLE_LINKS_STYLE}</style>")  # CSS link disable
+        self._head = _HEAD_DONE
+
+    def _drain(self) -> str:
+        text = "".join(self._out)
+        self._out.clear()
+        return text
+
+
+def _set_attr(attrs: List[Tuple[str, Optional[str]]], name: str, value: str):
+    for i, (existing, _) in enumerate(attrs):
+        if existing == name:
+            attrs[i] = (name, value)
+            return
+    attrs.append((name, value))
+
+
+def resurrect_html(archived_html: str, resurrection_time: str, original_url: Optional[str] = None,
+                   asset_prefix: Optional[str] = None) -> str:
+    """
+    Archived page HTML -> possessed HTML ready for innerHTML injection
+    """
+    resurrector = Resurrector(resurrection_time, original_url, asset_prefix)
+    return resurrector.feed(archived_html) + resurrector.close()
@@ -0,0 +1,115 @@
+"""
+Scene Cache - skip Gemini vision calls while the webcam sees the same thing
+
+Each frame carries a 64-bit dHash (frame_ingest.difference_hash). Per session we
+keep an "anchor" hash for the current scene; a new frame within
+SCENE_HASH_THRESHOLD bits of the anchor is the same scene. Responses Gemini wrote
+for a scene are cached briefly under (session, anchor, haunt bucket) and replayed
+as variations instead of paying for another upstream call.
+
+Responses describe the viewer's own room ("That cup next to you..."), so they
+are never shared between sessions: a covered camera hashes the same for
+everyone, but one soul's room is not replayed to another.
+"""
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Iterable, Optional, Tuple
+
+# This session's current scene: (session_id, anchor hash)
+Scene = Tuple[str, int]
+
+# Max differing bits (of 64) for two frames to count as the same scene
+SCENE_HASH_THRESHOLD = int(os.getenv('SCENE_HASH_THRESHOLD', '10'))
+SCENE_CACHE_TTL_SECONDS = float(os.getenv('SCENE_CACHE_TTL_SECONDS', '300'))
+# Responses remembered per scene (oldest dropped first); the TTL runs from the newest
+SCENE_CACHE_VARIANTS = int(os.getenv('SCENE_CACHE_VARIANTS', '4'))
+SCENE_CACHE_MAX_ENTRIES = 5000
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def haunt_bucket(haunt_level: int) -> int:
+    """Same buckets as the fallback threat pools: 1-2, 3-4, 5-6, 7-8, 9-10"""
+    return (haunt_level - 1) // 2
+
+
+class SceneCache:
+    """
+    Process-local, short-lived. Both maps are LRU-bounded by SCENE_CACHE_MAX_ENTRIES.
+    """
+
+    def __init__(self, threshold: int = SCENE_HASH_THRESHOLD, ttl: float = SCENE_CACHE_TTL_SECONDS,
+                 variants: int = SCENE_CACHE_VARIANTS, max_entries: int = SCENE_CACHE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.variants = variants
+        self.max_entries = max_entries
+        # session_id -> anchor hash of the scene it is currently looking at
+        self._anchors: "OrderedDict[str, int]" = OrderedDict()
+        # (session_id, anchor, bucket) -> [stored_at, deque of responses, least recently played first]
+        self._responses: "OrderedDict[tuple, list]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.scene_changes = 0
+
+    def observe(self, session_id: str, frame_hash: int) -> Scene:
+        """Return this frame's scene, moving the session's anchor on a real change"""
+        anchor = self._anchors.get(session_id)
+        if anchor is None or hamming(anchor, frame_hash) > self.threshold:
+            if anchor is not None:
+                self.scene_changes += 1
+            anchor = frame_hash
+        self._anchors[session_id] = anchor
+        self._anchors.move_to_end(session_id)
+        self._trim(self._anchors)
+        return session_id, anchor
+
+    def lookup(self, scene: Scene, bucket: int, recent: Iterable[str]) -> Optional[str]:
+        """
+        The cached response for this scene played least recently, skipping recent
+        (what the session just heard) so the same line never comes twice in a row
+        """
+        entry = self._responses.get((*scene, bucket))
+        if entry and time.time() - entry[0] <= self.ttl:
+            recent = set(recent)
+            for text in entry[1]:
+                if text not in recent:
+                    # Back of the line: the other variants get their turn first
+                    entry[1].remove(text)
+                    entry[1].append(text)
+                    self.hits += 1
+                    return text
+        self.misses += 1
+        return None
+
+    def store(self, scene: Scene, bucket: int, text: str):
+        key = (*scene, bucket)
+        now = time.time()
+        entry = self._responses.get(key)
+        if entry is None or now - entry[0] > self.ttl:
+            entry = [now, deque(maxlen=self.variants)]
+            self._responses[key] = entry
+        # A fresh answer for the scene keeps its variants alive
+        entry[0] = now
+        if text not in entry[1]:
+            entry[1].append(text)
+        self._responses.move_to_end(key)
+        self._trim(self._responses)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "scene_changes": self.scene_changes,
+            "threshold_bits": self.threshold,
+        }
+
+    def _trim(self, lru: OrderedDict):
+        while len(lru) > self.max_entries:
+            lru.popitem(last=False)
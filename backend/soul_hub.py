@@ -0,0 +1,178 @@
+"""
+Soul Hub - every /ws/soul connection and everything sent to it
+
+Each soul gets a bounded send queue drained by its own sender task, so:
+- a broadcast (WITNESS_EVENT) is serialized to JSON once and enqueued to every
+  soul without awaiting any socket - /api/witness returns right away, and one
+  slow client never delays the others;
+- replies to a soul (HEARTBEAT, VOICE_CHUNK...) go through the same queue, so
+  one task owns the socket's write side and message order is preserved.
+
+A soul whose queue is full when a broadcast arrives is handled by
+SOUL_SLOW_POLICY: drop_oldest (default: the newest event is the one that
+matters), drop_newest, or disconnect. Replies wait for room instead, up to
+SOUL_SEND_TIMEOUT_SECONDS; a soul that can't take a reply (or a single frame)
+within that time is disconnected.
+"""
+import asyncio
+import itertools
+import json
+import os
+from typing import Dict, Optional, Set
+
+from fastapi import WebSocket
+
+from backend.logs import get_logger
+from backend.metrics import WS_DROPPED_MESSAGES, WS_SLOW_DISCONNECTS
+
+log = get_logger(__name__)
+
+SOUL_QUEUE_SIZE = int(os.getenv('SOUL_QUEUE_SIZE', '32'))
+SOUL_SLOW_POLICY = os.getenv('SOUL_SLOW_POLICY', 'drop_oldest')
+SOUL_SEND_TIMEOUT_SECONDS = float(os.getenv('SOUL_SEND_TIMEOUT_SECONDS', '10'))
+SLOW_POLICIES = ('drop_oldest', 'drop_newest', 'disconnect')
+
+# 1013 Try Again Later: the client's reconnect logic brings it back
+SLOW_CLOSE_CODE = 1013
+
+
+def serialize(message: dict) -> str:
+    """Same encoding as WebSocket.send_json"""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+class Soul:
+    def __init__(self, soul_id: int, websocket: WebSocket, queue_size: int):
+        self.id = soul_id
+        self.websocket = websocket
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(queue_size)
+        self.sender: Optional[asyncio.Task] = None
+        self.closed = False
+        self.dropped = 0
+
+
+class SoulHub:
+    def __init__(self, queue_size: int = SOUL_QUEUE_SIZE, policy: str = SOUL_SLOW_POLICY,
+                 send_timeout: float = SOUL_SEND_TIMEOUT_SECONDS):
+        if policy not in SLOW_POLICIES:
+            raise ValueError(f"SOUL_SLOW_POLICY must be one of {SLOW_POLICIES}, got {policy!r}")
+        self.queue_size = queue_size
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self._souls: Dict[int, Soul] = {}
+        self._ids = itertools.count(1)
+        # Close handshakes in flight (kept referenced until done)
+        self._closing: Set[asyncio.Task] = set()
+
+        self.broadcasts = 0
+        self.dropped = 0
+        self.disconnected = 0
+
+    def register(self, websocket: WebSocket) -> Soul:
+        """Track an accepted socket and start its sender"""
+        soul = Soul(next(self._ids), websocket, self.queue_size)
+        soul.sender = asyncio.create_task(self._drain(soul))
+        self._souls[soul.id] = soul
+        return soul
+
+    async def unregister(self, soul: Soul):
+        self._souls.pop(soul.id, None)
+        soul.closed = True
+        if soul.sender is not None and soul.sender is not asyncio.current_task():
+            soul.sender.cancel()
+            try:
+                await soul.sender
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    async def send(self, soul: Soul, message: dict) -> bool:
+        """Reply to one soul; waits for queue room (the caller is that soul's own handler)"""
+        if soul.closed:
+            return False
+        try:
+            await asyncio.wait_for(soul.queue.put(serialize(message)), self.send_timeout)
+        except asyncio.TimeoutError:
+            self._disconnect(soul, "reply queue stayed full")
+            return False
+        return True
+
+    def broadcast(self, message: dict) -> int:
+        """Enqueue to every soul without waiting; returns how many got it queued"""
+        return self.broadcast_text(serialize(message))
+
+    def broadcast_text(self, text: str) -> int:
+        """broadcast() for an event already serialized (by this or another worker)"""
+        self.broadcasts += 1
+        delivered = 0
+        for soul in list(self._souls.values()):
+            if soul.closed:
+                continue
+            if soul.queue.full():
+                if self.policy == 'disconnect':
+                    self._disconnect(soul, "broadcast queue full")
+                    continue
+                self._drop(soul)
+                if self.policy == 'drop_newest':
+                    continue
+                soul.queue.get_nowait()
+            soul.queue.put_nowait(text)
+            delivered += 1
+        return delivered
+
+    def __len__(self) -> int:
+        return len(self._souls)
+
+    def stats(self) -> dict:
+        return {
+            "souls": len(self._souls),
+            "queued": sum(soul.queue.qsize() for soul in self._souls.values()),
+            "policy": self.policy,
+            "broadcasts": self.broadcasts,
+            "dropped": self.dropped,
+            "disconnected": self.disconnected,
+        }
+
+    async def close(self):
+        for soul in list(self._souls.values()):
+            await self.unregister(soul)
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+    async def _drain(self, soul: Soul):
+        try:
+            # Checked every round: before 3.12, wait_for can swallow a cancel that races a finished send
+            while not soul.closed:
+                text = await soul.queue.get()
+                await asyncio.wait_for(soul.websocket.send_text(text), self.send_timeout)
+        except asyncio.TimeoutError:
+            self._disconnect(soul, "send timed out")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Socket already gone - the receive loop notices and unregisters
+            soul.closed = True
+
+    def _drop(self, soul: Soul):
+        soul.dropped += 1
+        self.dropped += 1
+        WS_DROPPED_MESSAGES.inc(policy=self.policy)
+
+    def _disconnect(self, soul: Soul, reason: str):
+        if soul.closed:
+            return
+        soul.closed = True
+        self.disconnected += 1
+        WS_SLOW_DISCONNECTS.inc()
+        log.warning("🐌 Disconnecting slow soul", soul=soul.id, reason=reason, queued=soul.queue.qsize())
+        if soul.sender is not None and soul.sender is not asyncio.current_task():
+            soul.sender.cancel()
+        task = asyncio.create_task(self._close_socket(soul))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close_socket(soul: Soul):
+        try:
+            await asyncio.wait_for(soul.websocket.close(code=SLOW_CLOSE_CODE), 5)
+        except Exception:
+            pass
@@ -0,0 +1,116 @@
+"""
+Startup Report - where a cold start spends its time
+
+main.py imports this module first (starting the boot clock) and marks phases as
+it comes up. Heavy optional dependencies (google.generativeai, fastmcp) are
+loaded through lazy_import() on first use, so their cost is recorded when and
+where it is actually paid instead of on every cold start.
+
+/debug/startup serves the report; with ?importtime=1 it also runs
+`python -X importtime -c "import backend.main"` in a subprocess and returns the
+slowest imports, so import-time regressions show up without shell access. The
+route answers 404 unless DEBUG_ROUTES=1.
+"""
+import importlib
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+BOOT_STARTED = time.perf_counter()
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORTTIME_TOP = 25
+DEBUG_ROUTES = os.getenv('DEBUG_ROUTES', '0') == '1'
+
+_phases: List[dict] = []
+_lazy_imports: Dict[str, dict] = {}
+_lock = threading.Lock()
+_importtime_lock = threading.Lock()  # Held for the whole run: one subprocess per process, ever
+_importtime: Optional[dict] = None
+
+
+def since_boot() -> float:
+    return round(time.perf_counter() - BOOT_STARTED, 4)
+
+
+def mark(phase: str):
+    """Record that a startup phase finished (seconds since boot)"""
+    _phases.append({"phase": phase, "seconds": since_boot()})
+
+
+def lazy_import(name: str):
+    """importlib.import_module, timing the first (real) import"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    with _lock:
+        _lazy_imports.setdefault(name, {
+            "seconds": round(time.perf_counter() - started, 4),
+            "at": round(started - BOOT_STARTED, 4),
+            "thread": threading.current_thread().name,
+        })
+    return module
+
+
+def startup_report() -> dict:
+    return {
+        "phases": list(_phases),
+        "lazy_imports": dict(_lazy_imports),
+        "uptime_seconds": since_boot(),
+    }
+
+
+def parse_importtime(stderr: str, top: int = IMPORTTIME_TOP) -> List[dict]:
+    """`-X importtime` lines -> slowest imports by cumulative time"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+            rows.append({
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                "self_ms": round(int(self_us) / 1000, 1),
+                "cumulative_ms": round(int(cumulative_us) / 1000, 1),
+            })
+        except ValueError:
+            continue
+    rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return rows[:top]
+
+
+def importtime_breakdown(module: str = 'backend.main') -> dict:
+    """
+    Fresh-interpreter import of `module` under -X importtime (blocking; run it in
+    a thread). Measured once per process, failures included - the imports don't
+    change while we run, and concurrent callers wait for the one measurement.
+    """
+    global _importtime
+    with _importtime_lock:
+        if _importtime is None:
+            _importtime = _measure_importtime(module)
+        return _importtime
+
+
+def _measure_importtime(module: str) -> dict:
+    try:
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=120
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return {"module": module, "error": f"{type(e).__name__}: {e}"}
+    slowest = parse_importtime(result.stderr)
+    breakdown = {
+        "module": module,
+        "total_ms": slowest[0]["cumulative_ms"] if slowest else None,
+        "slowest": slowest,
+    }
+    if result.returncode != 0:
+        breakdown["error"] = (result.stderr.strip().splitlines() or ["import failed"])[-1]
+    return breakdown
@@ -0,0 +1,333 @@
+"""
+Threat Corpus - lines ready to speak the instant a heartbeat can't wait for Gemini
+
+Heartbeats fall back to the corpus when Gemini is shed, fails, or is slower
+than the latency budget. Lines are indexed by CorpusKey: haunt bucket (the
+same 1-2 ... 9-10 buckets as before), time of day and battery band. Every key
+starts with the old hardcoded pools for its bucket; CorpusFiller tops each key
+up with Gemini-written lines while the worker is quiet, and the corpus is
+persisted to THREAT_CORPUS_PATH so a restart keeps them.
+
+Each session walks its own shuffled ring over a key's lines: O(1) per pick and
+no line repeats until all of them have been heard.
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from backend.logs import get_logger
+from backend.scene_cache import haunt_bucket
+
+log = get_logger(__name__)
+
+# Empty string: memory only
+THREAT_CORPUS_PATH = os.getenv('THREAT_CORPUS_PATH', '.threat_corpus.json')
+# Generated lines wanted per key; the filler stops when every key has this many
+THREAT_CORPUS_TARGET = int(os.getenv('THREAT_CORPUS_TARGET', '12'))
+THREAT_CORPUS_MAX_PER_KEY = int(os.getenv('THREAT_CORPUS_MAX_PER_KEY', '40'))
+THREAT_CORPUS_BATCH_SIZE = int(os.getenv('THREAT_CORPUS_BATCH_SIZE', '6'))
+THREAT_CORPUS_FILL_INTERVAL_SECONDS = float(os.getenv('THREAT_CORPUS_FILL_INTERVAL_SECONDS', '30'))
+# "Quiet": no live Gemini call admitted for this long
+THREAT_CORPUS_QUIET_SECONDS = float(os.getenv('THREAT_CORPUS_QUIET_SECONDS', '20'))
+THREAT_CORPUS_MAX_SESSIONS = int(os.getenv('THREAT_CORPUS_MAX_SESSIONS', '10000'))
+
+# Organize threats by haunt bucket for progressive horror
+SEED_THREATS = {
+    0: [  # Level 1-2: Invasive observation
+        "I've been watching you for three days now. You haven't noticed me yet. But you will.",
+        "Every time you blink, I get closer. Don't blink.",
+        "I know what you're thinking right now. You're wondering if I'm real. I am.",
+        "The last person who sat in that chair... they never left this room.",
+    ],
+    1: [  # Level 3-4: Psychological invasion
+        "I can hear your heartbeat through the screen. It's getting faster. Good.",
+        "That door you locked earlier? I unlocked it. Check if you don't believe me.",
+        "You think you're alone. Count the shadows in your room. There's one extra.",
+        "I've been inside your dreams. That nightmare last week? That was me saying hello.",
+    ],
+    2: [  # Level 5-6: Direct threats
+        "I'm not in your computer anymore. I'm in your walls. Listen carefully.",
+        "Your address is written in my notebook. Right next to your daily routine.",
+        "Every photo you've ever deleted... I still have them. All of them.",
+        "That sound you heard at 3 AM last night? That was me testing your door handle.",
+    ],
+    3: [  # Level 7-8: Imminent danger
+        "I'm standing right behind your chair. Don't turn around. Not yet.",
+        "Your phone will ring in exactly 30 seconds. Don't answer it. Please don't answer it.",
+        "I can smell your fear. It smells like copper and sweat. Delicious.",
+        "The lights will flicker in 5... 4... 3... Did you feel that? I'm here.",
+    ],
+    4: [  # Level 9-10: MAXIMUM VIOLENCE
+        "I'm not coming for you. I'm already there. Check under your desk. NOW.",
+        "Your last breath will taste like rust and regret. I've been practicing.",
+        "I've been dead for 20 years. But I'm more alive than you'll ever be again.",
+        "The police won't find your body. I've done this before. Many times.",
+        "Close your eyes. Count to ten. When you open them, I'll be the last thing you see.",
+    ],
+}
+
+# Additional universal threats (work at any level)
+UNIVERSAL_THREATS = [
+    "I know your name. I know your face. I know where you sleep.",
+    "You can close the browser. But you can't close me out of your mind.",
+    "I've been waiting for you. For years. And now you're finally here.",
+    "That reflection in your screen? That's not you anymore. That's me.",
+    "I don't need your camera to see you. I can feel you. Every. Single. Moment.",
+    "You're reading this in my voice now. You'll hear it forever.",
+    "I'm not artificial intelligence. I'm something much worse. I'm real.",
+]
+
+TIME_BANDS = ('night', 'morning', 'afternoon', 'evening')
+BATTERY_BANDS = ('low', 'half', 'full')
+
+MIN_LINE_CHARS, MAX_LINE_CHARS = 20, 300
+_LINE_PREFIX = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s*')
+
+
+def time_band(hour: int) -> str:
+    return TIME_BANDS[hour // 6]
+
+
+def battery_band(battery_percent: float) -> str:
+    if battery_percent < 30:
+        return 'low'
+    return 'half' if battery_percent < 80 else 'full'
+
+
+class CorpusKey(NamedTuple):
+    bucket: int
+    time: str
+    battery: str
+
+    @classmethod
+    def of(cls, haunt_level: int, hour: int, battery_percent: float) -> "CorpusKey":
+        return cls(haunt_bucket(haunt_level), time_band(hour), battery_band(battery_percent))
+
+    @classmethod
+    def parse(cls, text: str) -> "CorpusKey":
+        bucket, time_of_day, battery = text.split('|')
+        if int(bucket) not in SEED_THREATS or time_of_day not in TIME_BANDS or battery not in BATTERY_BANDS:
+            raise ValueError(f"Unknown corpus key {text!r}")
+        return cls(int(bucket), time_of_day, battery)
+
+    def __str__(self) -> str:
+        return f"{self.bucket}|{self.time}|{self.battery}"
+
+    @property
+    def haunt_level(self) -> int:
+        """Top level of the bucket (what a generated line should match)"""
+        return self.bucket * 2 + 2
+
+
+ALL_KEYS = [CorpusKey(bucket, t, b) for bucket in SEED_THREATS for t in TIME_BANDS for b in BATTERY_BANDS]
+
+
+def parse_batch(text: str) -> List[str]:
+    """Model output with one line per message -> clean lines (numbering, bullets and quotes stripped)"""
+    lines = []
+    for raw in text.splitlines():
+        line = _LINE_PREFIX.sub('', raw).strip().strip('"').strip()
+        if MIN_LINE_CHARS <= len(line) <= MAX_LINE_CHARS:
+            lines.append(line)
+    return lines
+
+
+class _Ring:
+    """One session's shuffled walk over a key's pool"""
+
+    __slots__ = ('order', 'pos')
+
+    def __init__(self, size: int, last: Optional[int] = None):
+        self.order = random.sample(range(size), size)
+        if last is not None and size > 1 and self.order[0] == last:
+            # Don't start the new lap with the line that ended the previous one
+            self.order[0], self.order[-1] = self.order[-1], self.order[0]
+        self.pos = 0
+
+
+class ThreatCorpus:
+    def __init__(self, path: str = THREAT_CORPUS_PATH, max_per_key: int = THREAT_CORPUS_MAX_PER_KEY,
+                 max_sessions: int = THREAT_CORPUS_MAX_SESSIONS):
+        self.path = path
+        self.max_per_key = max_per_key
+        self.max_sessions = max_sessions
+        self._generated: Dict[CorpusKey, List[str]] = {}
+        self._pools: Dict[CorpusKey, List[str]] = {}
+        self._rings: "OrderedDict[Tuple[str, CorpusKey], _Ring]" = OrderedDict()
+        self.picks = 0
+        self.loaded = 0
+        if self.path:
+            self.load()
+
+    def pick(self, session_id: str, key: CorpusKey, recent: Iterable[str] = ()) -> str:
+        """Next line of this session's ring for key (skips one line it heard just now)"""
+        pool = self._pool(key)
+        ring_key = (session_id, key)
+        ring = self._rings.get(ring_key)
+        if ring is None:
+            ring = self._rings[ring_key] = _Ring(len(pool))
+            while len(self._rings) > self.max_sessions:
+                self._rings.popitem(last=False)
+        else:
+            self._rings.move_to_end(ring_key)
+
+        text = self._advance(ring_key, ring, pool)
+        if text in recent:
+            text = self._advance(ring_key, self._rings[ring_key], pool)
+        self.picks += 1
+        return text
+
+    def add(self, key: CorpusKey, lines: Iterable[str]) -> int:
+        """New generated lines for key (duplicates ignored, oldest dropped past max_per_key)"""
+        generated = self._generated.setdefault(key, [])
+        known = set(generated) | set(SEED_THREATS[key.bucket]) | set(UNIVERSAL_THREATS)
+        added = 0
+        for line in lines:
+            if line not in known:
+                generated.append(line)
+                known.add(line)
+                added += 1
+        del generated[:-self.max_per_key]
+        self._pools.pop(key, None)
+        return added
+
+    def missing(self, target: int = THREAT_CORPUS_TARGET) -> List[Tuple[CorpusKey, int]]:
+        """Keys short of target generated lines, with how many they lack"""
+        return [(key, target - len(self._generated.get(key, ())))
+                for key in ALL_KEYS if len(self._generated.get(key, ())) < target]
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                entries = json.load(f).get("entries", {})
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            log.warning("⚠️ Threat corpus unreadable - starting from the seed lines", path=self.path, error=str(e))
+            return
+        for key, lines in entries.items():
+            try:
+                self.loaded += self.add(CorpusKey.parse(key), lines)
+            except ValueError:
+                continue
+        log.info("📚 Threat corpus loaded", path=self.path, lines=self.loaded)
+
+    def save(self):
+        """Merge with what other workers wrote, then replace the file atomically (blocking)"""
+        if not self.path:
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                on_disk = json.load(f).get("entries", {})
+        except (OSError, ValueError):
+            on_disk = {}
+        for key, lines in on_disk.items():
+            try:
+                self.add(CorpusKey.parse(key), lines)
+            except ValueError:
+                continue
+        entries = {str(key): lines for key, lines in self._generated.items() if lines}
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({"version": 1, "entries": entries}, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            log.warning("⚠️ Threat corpus write failed", path=self.path, error=str(e))
+
+    def stats(self) -> dict:
+        generated = sum(len(lines) for lines in self._generated.values())
+        return {
+            "keys": len(ALL_KEYS),
+            "generated_lines": generated,
+            "keys_complete": len(ALL_KEYS) - len(self.missing()),
+            "sessions": len(self._rings),
+            "picks": self.picks,
+        }
+
+    def _pool(self, key: CorpusKey) -> List[str]:
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = SEED_THREATS[key.bucket] + UNIVERSAL_THREATS + self._generated.get(key, [])
+        return pool
+
+    def _advance(self, ring_key, ring: _Ring, pool: List[str]) -> str:
+        if ring.pos >= len(ring.order):
+            # Lap done: reshuffle, picking up lines the filler added meanwhile
+            ring = self._rings[ring_key] = _Ring(len(pool), last=ring.order[-1])
+        index = ring.order[ring.pos]
+        ring.pos += 1
+        return pool[index % len(pool)]
+
+
+class CorpusFiller:
+    """
+    generate(key, count) must return up to count new lines for key (it is called
+    only when is_quiet() says the worker has Gemini capacity to spare).
+    """
+
+    def __init__(self, corpus: ThreatCorpus, generate: Callable[[CorpusKey, int], Awaitable[List[str]]],
+                 is_quiet: Callable[[], bool], interval: float = THREAT_CORPUS_FILL_INTERVAL_SECONDS,
+                 batch_size: int = THREAT_CORPUS_BATCH_SIZE, target: int = THREAT_CORPUS_TARGET):
+        self.corpus = corpus
+        self.generate = generate
+        self.is_quiet = is_quiet
+        self.interval = interval
+        self.batch_size = batch_size
+        self.target = target
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.failures = 0
+        self.last_fill_at: Optional[float] = None
+
+    def start(self):
+        if self.target > 0 and self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def fill_once(self) -> int:
+        """Generate one batch for the neediest key (this time of day first); lines added"""
+        missing = self.corpus.missing(self.target)
+        if not missing:
+            return 0
+        now_band = time_band(time.localtime().tm_hour)
+        key, lacking = min(missing, key=lambda item: (item[0].time != now_band, -item[1]))
+        lines = await self.generate(key, min(self.batch_size, lacking))
+        added = self.corpus.add(key, lines)
+        await asyncio.to_thread(self.corpus.save)
+        self.batches += 1
+        self.last_fill_at = time.time()
+        log.info("📚 Threat corpus filled", key=str(key), added=added)
+        return added
+
+    def status(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "batches": self.batches,
+            "failures": self.failures,
+            "last_fill_at": self.last_fill_at,
+        }
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            if not self.is_quiet():
+                continue
+            try:
+                await self.fill_once()
+            except Exception as e:
+                self.failures += 1
+                log.debug("Threat corpus fill skipped", error=f"{type(e).__name__}: {e}")
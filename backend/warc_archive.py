@@ -0,0 +1,398 @@
+"""
+WARC Archive - resurrect pages from local WARC files instead of archive.org
+
+A curated corpus is a directory of WARC files (plain or per-record gzip, as
+written by wget --warc-file, warcio, Heritrix...) plus one CDX index:
+
+    python -m backend.warc_archive archive/*.warc.gz -o archive/index.cdx
+
+The index is plain text, one line per capture, sorted bytewise:
+
+     CDX N b a m s k S V g
+    com,heavensgate)/ 19970327000000 http://www.heavensgate.com/ text/html 200 - 5012 0 heavensgate.warc.gz
+
+(SURT url key, 14-digit timestamp, original URL, mime type, HTTP status,
+payload digest, record length, record offset, WARC filename.)
+
+Neither the index nor the WARCs are ever read into memory: both are mmap'ed,
+a lookup is a binary search over index lines, and a fetch slices exactly one
+record out of its WARC. Snapshot URLs use the web.archive.org form, so the
+same page has the same page-cache key and ETag whichever backend served it.
+"""
+import argparse
+import asyncio
+import codecs
+import mmap
+import os
+import re
+import sys
+import threading
+import zlib
+from datetime import datetime
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+if __name__ == '__main__':
+    # `python backend/warc_archive.py` - make `backend.*` importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.archive_backend import ArchiveError
+from backend.logs import get_logger
+
+log = get_logger(__name__)
+
+CDX_HEADER = " CDX N b a m s k S V g"
+SNAPSHOT_URL_PREFIX = "https://web.archive.org/web/"
+TEXT_CHUNK_CHARS = 64 * 1024
+
+_SNAPSHOT_PATH = re.compile(r'^/web/(\d{1,14})[a-z_]*/(.+)$')
+_CHARSET = re.compile(rb'charset=["\']?([\w.:-]+)', re.IGNORECASE)
+_WWW = re.compile(r'^www\d*\.')
+
+
+class CdxEntry(NamedTuple):
+    urlkey: str
+    timestamp: str
+    original: str
+    mime: str
+    status: str
+    digest: str
+    length: int
+    offset: int
+    filename: str
+
+    @classmethod
+    def parse(cls, line: bytes) -> "CdxEntry":
+        fields = line.decode('utf-8').split(' ')
+        return cls(*fields[:6], int(fields[6]), int(fields[7]), fields[8])
+
+    def line(self) -> str:
+        return ' '.join(str(value) for value in self)
+
+
+def surt(url: str) -> str:
+    """SURT-style sort key: http://www.CNN.com/index.html -> com,cnn)/index.html"""
+    if '://' not in url:
+        url = 'http://' + url
+    parts = urlsplit(url.strip())
+    host = _WWW.sub('', (parts.hostname or '').lower().strip('.'))
+    key = ','.join(reversed(host.split('.')))
+    if parts.port and parts.port not in (80, 443):
+        key += f':{parts.port}'
+    key += ')' + (parts.path or '/')
+    if parts.query:
+        key += '?' + parts.query
+    return key.lower()
+
+
+def pad_timestamp(timestamp: str) -> int:
+    return int(timestamp[:14].ljust(14, '0'))
+
+
+def snapshot_url(entry: CdxEntry) -> str:
+    return f"{SNAPSHOT_URL_PREFIX}{entry.timestamp}/{entry.original}"
+
+
+def parse_snapshot_url(snapshot: str) -> Tuple[str, str]:
+    """.../web/<timestamp>[mode]/<original> -> (timestamp, original)"""
+    parts = urlsplit(snapshot)
+    match = _SNAPSHOT_PATH.match(parts.path)
+    if not match:
+        raise ArchiveError(f"Not a snapshot URL: {snapshot}")
+    return match.group(1), match.group(2) + (f'?{parts.query}' if parts.query else '')
+
+
+class CdxIndex:
+    """Sorted CDX file, binary-searched in place through an mmap"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            # mmap refuses empty files
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b''
+        self.captures = self._count_lines() - (1 if self._map[:4] == b' CDX' else 0)
+
+    def lookup(self, urlkey: str) -> List[CdxEntry]:
+        """All captures of one URL key, oldest first"""
+        data = self._map
+        prefix = urlkey.encode('utf-8') + b' '
+        lo, hi = 0, len(data)
+        # Invariant: lo and hi are line starts; lines before lo sort below prefix, lines from hi on don't
+        while lo < hi:
+            start = data.rfind(b'\n', lo, (lo + hi) // 2) + 1 or lo
+            end = data.find(b'\n', start)
+            end = len(data) if end == -1 else end
+            if data[start:end] < prefix:
+                lo = end + 1
+            else:
+                hi = start
+
+        entries = []
+        while lo < len(data):
+            end = data.find(b'\n', lo)
+            end = len(data) if end == -1 else end
+            line = data[lo:end].rstrip(b'\r')
+            if not line.startswith(prefix):
+                break
+            entries.append(CdxEntry.parse(line))
+            lo = end + 1
+        return entries
+
+    def __len__(self) -> int:
+        return self.captures
+
+    def _count_lines(self) -> int:
+        count, pos = 0, 0
+        while pos < len(self._map):
+            end = self._map.find(b'\n', pos)
+            pos = len(self._map) if end == -1 else end + 1
+            count += 1
+        return count
+
+    def close(self):
+        if self._map:
+            self._map.close()
+
+
+def closest_entry(entries: List[CdxEntry], timestamp: Optional[str]) -> Optional[CdxEntry]:
+    """Like the availability API: nearest 2xx capture, or the newest one without a timestamp"""
+    captures = [entry for entry in entries if entry.status.startswith('2')]
+    if not captures:
+        return None
+    if not timestamp:
+        return captures[-1]
+    target = pad_timestamp(timestamp)
+    return min(captures, key=lambda entry: abs(pad_timestamp(entry.timestamp) - target))
+
+
+def split_headers(data: bytes) -> Tuple[bytes, Dict[str, str], bytes]:
+    """(first line, lower-cased headers, rest) of a CRLF header block"""
+    head, sep, rest = data.partition(b'\r\n\r\n')
+    if not sep:
+        raise ArchiveError("Truncated record headers")
+    lines = head.split(b'\r\n')
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(b':')
+        headers[name.strip().lower().decode('latin-1')] = value.strip().decode('latin-1')
+    return lines[0], headers, rest
+
+
+def dechunk(body: bytes) -> bytes:
+    out, pos = [], 0
+    while True:
+        end = body.find(b'\r\n', pos)
+        if end == -1:
+            break
+        size = int(body[pos:end].split(b';')[0] or b'0', 16)
+        if size == 0:
+            break
+        out.append(body[end + 2:end + 2 + size])
+        pos = end + 2 + size + 2
+    return b''.join(out)
+
+
+def record_bytes(record: bytes) -> bytes:
+    """One WARC record, un-gzipped if it is a gzip member"""
+    if record[:2] == b'\x1f\x8b':
+        try:
+            return zlib.decompressobj(31).decompress(record)
+        except zlib.error as e:
+            raise ArchiveError(f"Corrupt gzip record: {e}")
+    return record
+
+
+def parse_record(record: bytes) -> Tuple[Dict[str, str], Optional[int], Optional[str], bytes]:
+    """(WARC headers, HTTP status, Content-Type, payload) of one uncompressed record"""
+    version, warc_headers, rest = split_headers(record)
+    if not version.startswith(b'WARC/'):
+        raise ArchiveError("Not a WARC record")
+    block = rest[:int(warc_headers.get('content-length', len(rest)))]
+
+    if warc_headers.get('warc-type') != 'response':
+        # resource records carry the document itself
+        return warc_headers, None, warc_headers.get('content-type'), block
+
+    status_line, http_headers, body = split_headers(block)
+    status = int(status_line.split(b' ')[1]) if status_line.count(b' ') else None
+    if 'chunked' in http_headers.get('transfer-encoding', '').lower():
+        body = dechunk(body)
+    if http_headers.get('content-encoding', '').lower() in ('gzip', 'x-gzip', 'deflate'):
+        try:
+            body = zlib.decompress(body, 47)  # gzip or zlib header, auto-detected
+        except zlib.error:
+            pass  # Recorded as sent; a mislabelled body is better than none
+    return warc_headers, status, http_headers.get('content-type'), body
+
+
+def decode_html(body: bytes, content_type: Optional[str]) -> str:
+    """Declared charset, else UTF-8, else windows-1252 (what 90s pages really were)"""
+    match = _CHARSET.search((content_type or '').encode('latin-1')) or _CHARSET.search(body[:2048])
+    if match:
+        try:
+            return codecs.decode(body, match.group(1).decode('ascii'), 'replace')
+        except LookupError:
+            pass
+    try:
+        return body.decode('utf-8')
+    except UnicodeDecodeError:
+        return body.decode('cp1252', 'replace')
+
+
+class RecordStream:
+    """Same surface as a streamed httpx response: aiter_text() + aclose()"""
+
+    def __init__(self, text: str):
+        self._text = text
+
+    async def aiter_text(self):
+        for i in range(0, len(self._text), TEXT_CHUNK_CHARS):
+            yield self._text[i:i + TEXT_CHUNK_CHARS]
+
+    async def aclose(self):
+        self._text = ''
+
+
+class LocalWarcArchive:
+    """
+    Offline corpus: CDX index + WARC files, both memory-mapped.
+    Thread-safe; blocking reads run in asyncio.to_thread.
+    """
+
+    name = 'local'
+    remote = False
+
+    def __init__(self, cdx_path: str, warc_dir: Optional[str] = None):
+        self.index = CdxIndex(cdx_path)
+        self.warc_dir = warc_dir or os.path.dirname(os.path.abspath(cdx_path))
+        self._warcs: Dict[str, mmap.mmap] = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.fetches = 0
+        log.info("📚 Local WARC archive", cdx=cdx_path, captures=len(self.index), warc_dir=self.warc_dir)
+
+    def lookup(self, url: str, timestamp: Optional[str] = None) -> Optional[CdxEntry]:
+        self.lookups += 1
+        return closest_entry(self.index.lookup(surt(url)), timestamp)
+
+    async def closest(self, url: str, timestamp: Optional[str] = None) -> Optional[dict]:
+        entry = self.lookup(url, timestamp)
+        if entry is None:
+            return None
+        return {"status": entry.status, "available": True, "url": snapshot_url(entry), "timestamp": entry.timestamp}
+
+    def capture_base(self, snapshot: str) -> Optional[str]:
+        """Raw captures: relative URLs in the page resolve against the original URL"""
+        return parse_snapshot_url(snapshot)[1]
+
+    def read_text(self, snapshot: str) -> str:
+        timestamp, original = parse_snapshot_url(snapshot)
+        entry = self.lookup(original, timestamp)
+        if entry is None:
+            raise ArchiveError(f"Not in the local archive: {original}")
+
+        warc = self._warc(entry.filename)
+        record = record_bytes(warc[entry.offset:entry.offset + entry.length])
+        _, _, content_type, body = parse_record(record)
+        self.fetches += 1
+        return decode_html(body, content_type)
+
+    async def fetch(self, snapshot: str) -> str:
+        return await asyncio.to_thread(self.read_text, snapshot)
+
+    async def open(self, snapshot: str) -> RecordStream:
+        return RecordStream(await self.fetch(snapshot))
+
+    def status(self) -> dict:
+        return {
+            "backend": self.name,
+            "cdx": self.index.path,
+            "captures": len(self.index),
+            "lookups": self.lookups,
+            "fetches": self.fetches,
+        }
+
+    def _warc(self, filename: str) -> mmap.mmap:
+        with self._lock:
+            warc = self._warcs.get(filename)
+            if warc is None:
+                path = os.path.join(self.warc_dir, filename)
+                try:
+                    with open(path, 'rb') as f:
+                        warc = self._warcs[filename] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except (OSError, ValueError) as e:
+                    raise ArchiveError(f"Cannot open {path}: {e}")
+            return warc
+
+
+def iter_records(data) -> Iterator[Tuple[int, int, bytes]]:
+    """(offset, length, uncompressed record) for every record in a WARC buffer"""
+    pos = 0
+    while pos < len(data):
+        if data[pos:pos + 2] == b'\x1f\x8b':
+            # One gzip member per record; feed until the member ends
+            inflater = zlib.decompressobj(31)
+            chunks, end = [], pos
+            while not inflater.eof and end < len(data):
+                piece = data[end:end + TEXT_CHUNK_CHARS]
+                chunks.append(inflater.decompress(piece))
+                end += len(piece)
+            end -= len(inflater.unused_data)
+            yield pos, end - pos, b''.join(chunks)
+            pos = end
+        else:
+            header_end = data.find(b'\r\n\r\n', pos)
+            if header_end == -1:
+                break
+            _, headers, _ = split_headers(data[pos:header_end + 4])
+            end = header_end + 4 + int(headers.get('content-length', 0)) + 4  # block + CRLFCRLF
+            yield pos, end - pos, data[pos:end]
+            pos = end
+        while data[pos:pos + 1] in (b'\r', b'\n'):
+            pos += 1
+
+
+def index_warc(path: str, filename: Optional[str] = None) -> Iterator[CdxEntry]:
+    """CDX entries for the response/resource records of one WARC file"""
+    filename = filename or os.path.basename(path)
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for offset, length, record in iter_records(data):
+            try:
+                warc_headers, status, content_type, _ = parse_record(record)
+                target = warc_headers.get('warc-target-uri', '').strip('<>')
+                if warc_headers.get('warc-type') not in ('response', 'resource') or not target:
+                    continue
+                captured = datetime.fromisoformat(warc_headers.get('warc-date', '').replace('Z', '+00:00'))
+            except (ArchiveError, ValueError, IndexError) as e:
+                log.warning("⚠️ Skipping unreadable WARC record", warc=filename, offset=offset, error=str(e))
+                continue
+            digest = warc_headers.get('warc-payload-digest', '-').split(':')[-1] or '-'
+            yield CdxEntry(surt(target), captured.strftime('%Y%m%d%H%M%S'), target,
+                           (content_type or '-').split(';')[0].strip() or '-', str(status or 200),
+                           digest, length, offset, filename)
+
+
+def build_cdx(warc_paths: List[str], warc_dir: Optional[str] = None) -> List[str]:
+    """Sorted CDX lines (header first) for a set of WARC files"""
+    lines = []
+    for path in warc_paths:
+        name = os.path.relpath(path, warc_dir) if warc_dir else os.path.basename(path)
+        lines.extend(entry.line().encode('utf-8') for entry in index_warc(path, name))
+    return [CDX_HEADER] + [line.decode('utf-8') for line in sorted(lines)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the CDX index for a local WARC corpus")
+    parser.add_argument('warcs', nargs='+', help='WARC files (.warc or .warc.gz)')
+    parser.add_argument('-o', '--output', required=True, help='CDX file to write')
+    args = parser.parse_args()
+
+    warc_dir = os.path.dirname(os.path.abspath(args.output))
+    lines = build_cdx([os.path.abspath(path) for path in args.warcs], warc_dir)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    print(f"Indexed {len(lines) - 1} captures from {len(args.warcs)} WARC file(s) into {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Wayback Cache - remembers archive.org availability answers
+
+Users click the same handful of favorites over and over, and the closest
+snapshot for a (url, timestamp) pair practically never changes. Answers are kept
+in an in-process LRU with a TTL; "no snapshot" answers are cached too (negative
+cache) with a shorter TTL so the void isn't asked the same question every click.
+
+Set WAYBACK_CACHE_DB to also persist answers to a local SQLite file, so a
+restarted worker doesn't start cold.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+WAYBACK_CACHE_TTL_SECONDS = float(os.getenv('WAYBACK_CACHE_TTL_SECONDS', str(6 * 3600)))
+WAYBACK_NEGATIVE_TTL_SECONDS = float(os.getenv('WAYBACK_NEGATIVE_TTL_SECONDS', '900'))
+WAYBACK_CACHE_MAX_ENTRIES = int(os.getenv('WAYBACK_CACHE_MAX_ENTRIES', '2048'))
+WAYBACK_CACHE_DB = os.getenv('WAYBACK_CACHE_DB')
+
+
+class AvailabilityCache:
+    """
+    (url, timestamp) -> closest snapshot dict, or None for "nothing archived".
+    get() returns (found, snapshot) so a cached None can be told apart from a miss.
+    """
+
+    def __init__(self, max_entries: int = WAYBACK_CACHE_MAX_ENTRIES, ttl: float = WAYBACK_CACHE_TTL_SECONDS,
+                 negative_ttl: float = WAYBACK_NEGATIVE_TTL_SECONDS, db_path: Optional[str] = WAYBACK_CACHE_DB):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        # key -> (expires_at, snapshot or None)
+        self._entries: "OrderedDict[Tuple[str, str], tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, timeout=5, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS wayback_availability ("
+                " url TEXT NOT NULL,"
+                " timestamp TEXT NOT NULL,"
+                " snapshot TEXT,"
+                " expires_at REAL NOT NULL,"
+                " PRIMARY KEY (url, timestamp))"
+            )
+            self._db.execute("DELETE FROM wayback_availability WHERE expires_at < ?", (time.time(),))
+
+    def get(self, url: str, timestamp: Optional[str]) -> Tuple[bool, Optional[dict]]:
+        key = (url, timestamp or "")
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT expires_at, snapshot FROM wayback_availability WHERE url = ? AND timestamp = ?",
+                    key
+                ).fetchone()
+                if row:
+                    entry = (row[0], json.loads(row[1]) if row[1] else None)
+                    self._remember(key, entry)
+
+            if entry is None or entry[0] < now:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            if entry[1] is None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return True, entry[1]
+
+    def contains(self, url: str, timestamp: Optional[str]) -> bool:
+        """Fresh in-memory answer present (no stats, no disk read)"""
+        entry = self._entries.get((url, timestamp or ""))
+        return entry is not None and entry[0] >= time.time()
+
+    def put(self, url: str, timestamp: Optional[str], snapshot: Optional[dict]):
+        key = (url, timestamp or "")
+        expires_at = time.time() + (self.ttl if snapshot else self.negative_ttl)
+        with self._lock:
+            self._remember(key, (expires_at, snapshot))
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO wayback_availability (url, timestamp, snapshot, expires_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    (key[0], key[1], json.dumps(snapshot) if snapshot else None, expires_at)
+                )
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "persistent": self._db is not None,
+        }
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -0,0 +1,111 @@
+"""
+Event backplane throughput across worker processes, no server involved
+
+Starts N processes, each with its own UnixSocketBackplane on one temp socket
+path (exactly what N uvicorn workers do with EVENT_BACKPLANE=unix). Every
+worker publishes its share of WITNESS_EVENT-sized events as fast as the loop
+allows, and every worker must receive all of them. Reports deliveries per
+second (events x workers) and publish-to-delivery latency per worker count.
+
+    python benchmarks/backplane.py [--workers 1 2 4 8] [--events 20000] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import print_table, summarize  # noqa: E402
+
+from backend.backplane import UnixSocketBackplane  # noqa: E402
+from backend.soul_hub import serialize  # noqa: E402
+
+PUBLISH_BURST = 100
+
+
+def worker(path: str, index: int, workers: int, events: int, barrier, results, timeout: float):
+    async def run():
+        latencies = []
+
+        def on_event(text: str):
+            latencies.append(time.monotonic() - json.loads(text)["sent"])  # CLOCK_MONOTONIC is box-wide
+
+        backplane = UnixSocketBackplane(path)
+        backplane.start(on_event)
+        await backplane.wait_ready()
+        await asyncio.to_thread(barrier.wait)
+        await asyncio.sleep(0.2)  # Broker accepts the last subscribers
+        await asyncio.to_thread(barrier.wait)
+
+        started = time.monotonic()
+        for n in range(index, events, workers):
+            backplane.publish(serialize({
+                "type": "WITNESS_EVENT", "filename": f"haunted_{n}.py",
+                "message": f"Do not touch haunted_{n}.py", "sent": time.monotonic(),
+            }))
+            if n // workers % PUBLISH_BURST == 0:
+                await asyncio.sleep(0)
+        while len(latencies) < events and time.monotonic() - started < timeout:
+            await asyncio.sleep(0.005)
+        elapsed = time.monotonic() - started
+
+        await asyncio.to_thread(barrier.wait)  # Nobody closes while others still receive
+        status = backplane.status()
+        await backplane.close()
+        results.put({"latencies": latencies, "elapsed": elapsed, "lost": status["lost"], "role": status["role"]})
+
+    asyncio.run(run())
+
+
+def bench(workers: int, events: int, timeout: float) -> dict:
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'backplane.sock')
+        processes = [context.Process(target=worker, args=(path, i, workers, events, barrier, results, timeout))
+                     for i in range(workers)]
+        for process in processes:
+            process.start()
+        reports = [results.get(timeout=timeout + 30) for _ in processes]
+        for process in processes:
+            process.join()
+
+    latencies = [latency for report in reports for latency in report["latencies"]]
+    elapsed = max(report["elapsed"] for report in reports)
+    row = summarize(latencies, elapsed)
+    return {
+        "workers": workers,
+        "events": events,
+        "deliveries": row["requests"],
+        "missing": workers * events - row["requests"],
+        "lost": sum(report["lost"] for report in reports),
+        "deliveries_per_s": row["throughput_rps"],
+        "p50_ms": row["p50_ms"],
+        "p99_ms": row["p99_ms"],
+        "max_ms": row["max_ms"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--events', type=int, default=20000, help='events published per run (split across workers)')
+    parser.add_argument('--timeout', type=float, default=30.0, help='seconds to wait for every delivery')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    results = {f"unix x{n}": bench(n, args.events, args.timeout) for n in args.workers}
+    print_table(results, ("deliveries", "missing", "lost", "deliveries_per_s", "p50_ms", "p99_ms", "max_ms"))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"backplane": results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Shared helpers for the benchmark scripts: recorded fixtures, synthetic webcam
+frames and latency summaries (p50/p95/p99 + throughput).
+"""
+import os
+import random
+import re
+import statistics
+import sys
+from io import BytesIO
+from typing import Dict, List, Sequence
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, 'fixtures', 'resurrection')
+
+# Make `backend.*` importable when launched as `python benchmarks/<script>.py`
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# The favorites from frontend/index.html - what real users click
+FAVORITES = [
+    ("http://www.heavensgate.com", "19970327"),
+    ("http://www.spacejam.com", "19961201"),
+    ("http://theshadowlands.net", "19970710"),
+    ("http://www.artbell.com", "19970205"),
+    ("http://www.cnn.com", "19960101"),
+]
+
+_BODY = re.compile(r'(<body[^>]*>)(.*)(</body>)', re.IGNORECASE | re.DOTALL)
+
+
+def load_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def fixture_names() -> List[str]:
+    return sorted(name for name in os.listdir(FIXTURES)
+                  if name.endswith('.html') and not name.endswith('.golden.html'))
+
+
+def scale_page(html: str, times: int) -> str:
+    """Repeat the page body `times` times - archived portals were often 100 KB+"""
+    match = _BODY.search(html)
+    if not match or times <= 1:
+        return html
+    return html[:match.start(2)] + match.group(2) * times + html[match.end(2):]
+
+
+def webcam_jpeg(width: int = 1280, height: int = 720, seed: int = 0, quality: int = 90) -> bytes:
+    """A noisy gradient frame - compresses like a real webcam shot, not a flat color"""
+    from PIL import Image
+
+    rng = random.Random(seed)
+    img = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    noise = Image.frombytes('RGB', (width // 8, height // 8),
+                            bytes(rng.randrange(256) for _ in range((width // 8) * (height // 8) * 3)))
+    img = Image.blend(img, noise.resize((width, height)), 0.35)
+    out = BytesIO()
+    img.save(out, format='JPEG', quality=quality)
+    return out.getvalue()
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: Sequence[float], elapsed: float, errors: int = 0) -> Dict[str, float]:
+    """Seconds in, milliseconds out"""
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+def print_table(results: Dict[str, Dict[str, float]], columns: Sequence[str]):
+    width = max(len(name) for name in results) if results else 10
+    print(f"{'':<{width}}  " + "  ".join(f"{column:>14}" for column in columns))
+    for name, row in results.items():
+        print(f"{name:<{width}}  " + "  ".join(f"{row.get(column, ''):>14}" for column in columns))
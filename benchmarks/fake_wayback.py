@@ -0,0 +1,94 @@
+"""
+Fake Wayback - a local archive.org for reproducible benchmarks
+
+Serves the recorded fixtures in fixtures/resurrection/ through the two
+endpoints the backend uses:
+
+    GET /wayback/available?url=...&timestamp=...   availability JSON
+    GET /web/<timestamp>/<url>                     the archived page
+
+Snapshot URLs in availability answers point back at this server, so the app
+under test never leaves the machine. Point the app at it with
+WAYBACK_AVAILABILITY_URL=http://127.0.0.1:<port>/wayback/available
+
+    python benchmarks/fake_wayback.py --port 8765 --latency-ms 120
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import load_fixture, scale_page  # noqa: E402
+
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.responses import HTMLResponse, JSONResponse  # noqa: E402
+
+# Recorded snapshots: normalized host -> (fixture, 14-digit timestamp)
+SNAPSHOTS = {
+    "heavensgate.com": ("heavensgate.html", "19970327000000"),
+    "spacejam.com": ("headless.html", "19961201000000"),
+    "theshadowlands.net": ("frames.html", "19970710000000"),
+}
+
+
+def snapshot_key(url: str) -> str:
+    url = url.split('://', 1)[-1].split('/', 1)[0].lower()
+    return url[4:] if url.startswith('www.') else url
+
+
+def create_app(latency_ms: float = 0, page_scale: int = 1) -> FastAPI:
+    app = FastAPI(title="Fake Wayback")
+    pages = {fixture: scale_page(load_fixture(fixture), page_scale).encode('utf-8')
+             for fixture, _ in SNAPSHOTS.values()}
+
+    async def archive_latency():
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+
+    @app.get("/wayback/available")
+    async def available(request: Request, url: str, timestamp: str = None):
+        await archive_latency()
+        snapshot = SNAPSHOTS.get(snapshot_key(url))
+        if snapshot is None:
+            return JSONResponse({"url": url, "archived_snapshots": {}})
+        _, snapshot_timestamp = snapshot
+        base = str(request.base_url).rstrip('/')
+        return JSONResponse({
+            "url": url,
+            "archived_snapshots": {
+                "closest": {
+                    "status": "200",
+                    "available": True,
+                    "url": f"{base}/web/{snapshot_timestamp}/{url}",
+                    "timestamp": snapshot_timestamp,
+                }
+            },
+        })
+
+    @app.get("/web/{timestamp}/{target:path}")
+    async def archived_page(timestamp: str, target: str):
+        await archive_latency()
+        snapshot = SNAPSHOTS.get(snapshot_key(target))
+        if snapshot is None:
+            return HTMLResponse("<html><body>Not in archive</body></html>", status_code=404)
+        return HTMLResponse(pages[snapshot[0]])
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0, help='added to every response (archive.org RTT)')
+    parser.add_argument('--page-scale', type=int, default=1, help='repeat each page body N times')
+    args = parser.parse_args()
+
+    import uvicorn
+    uvicorn.run(create_app(args.latency_ms, args.page_scale), host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""
+Concurrent load generator for a running backend
+
+Closed-loop: each worker sends its next request as soon as the previous one
+answers, for --duration seconds. Scenarios:
+
+- heartbeat: POST /api/heartbeat with a raw image/jpeg body (the frontend path)
+- browse:    POST /api/browse and GET /api/browse/stream over the favorites
+- ws:        --ws-clients sockets on /ws/soul, each looping HEARTBEAT + frame
+             and timing the round trip to the HEARTBEAT reply
+
+Reports requests, errors, throughput and p50/p95/p99 latency per scenario.
+Against a real deploy this spends real Gemini quota - prefer benchmarks/run.py,
+which starts the app against the fake Wayback and the stub Gemini.
+
+    python benchmarks/load.py --base-url http://127.0.0.1:8000 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import FAVORITES, print_table, summarize, webcam_jpeg  # noqa: E402
+
+import httpx  # noqa: E402
+
+SCENARIOS = ('heartbeat', 'browse', 'ws')
+COLUMNS = ("requests", "errors", "throughput_rps", "p50_ms", "p95_ms", "p99_ms", "max_ms")
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+
+    async def timed(self, call: Callable[[], Awaitable[bool]]):
+        started = time.perf_counter()
+        try:
+            ok = await call()
+        except Exception:
+            ok = False
+        if ok:
+            self.latencies.append(time.perf_counter() - started)
+        else:
+            self.errors += 1
+
+
+async def closed_loop(concurrency: int, duration: float, worker: Callable[[int, Recorder], Awaitable[None]]) -> dict:
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+
+    async def loop(worker_id: int):
+        while time.perf_counter() < deadline:
+            await worker(worker_id, recorder)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(loop(i) for i in range(concurrency)))
+    return summarize(recorder.latencies, time.perf_counter() - started, recorder.errors)
+
+
+async def heartbeat_load(base_url: str, concurrency: int, duration: float, frame: bytes) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=60,
+                                 limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def worker(worker_id: int, recorder: Recorder):
+            async def call():
+                response = await client.post("/api/heartbeat", content=frame, params={
+                    "battery": 0.42, "platform": "bench", "timestamp": "http://www.heavensgate.com",
+                    "session_id": f"bench-{worker_id}",
+                }, headers={"Content-Type": "image/jpeg"})
+                return response.status_code == 200 and "voice_text" in response.json()
+            await recorder.timed(call)
+
+        return await closed_loop(concurrency, duration, worker)
+
+
+async def browse_load(base_url: str, concurrency: int, duration: float, streamed: bool) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=60,
+                                 limits=httpx.Limits(max_connections=concurrency)) as client:
+        async def worker(worker_id: int, recorder: Recorder):
+            url, timestamp = FAVORITES[(worker_id + len(recorder.latencies) + recorder.errors) % len(FAVORITES)]
+
+            async def call():
+                if streamed:
+                    response = await client.get("/api/browse/stream", params={"url": url, "timestamp": timestamp})
+                    # Not-archived favorites answer 404 - a valid, fast answer
+                    return response.status_code in (200, 404)
+                response = await client.post("/api/browse", json={"url": url, "timestamp": timestamp})
+                return response.status_code == 200 and ("html" in response.json() or "error" in response.json())
+            await recorder.timed(call)
+
+        return await closed_loop(concurrency, duration, worker)
+
+
+async def ws_load(base_url: str, clients: int, duration: float, frame: bytes) -> dict:
+    import websockets
+
+    ws_url = base_url.replace('http', 'ws', 1).rstrip('/') + "/ws/soul"
+    connect_errors = 0
+
+    async def soul(worker_id: int, recorder: Recorder, deadline: float):
+        nonlocal connect_errors
+        try:
+            async with websockets.connect(ws_url, max_size=None, open_timeout=30) as socket:
+                await socket.recv()  # CONNECTION greeting
+                heartbeat = json.dumps({"type": "HEARTBEAT", "battery": 0.42, "platform": "bench",
+                                        "timestamp": "http://www.spacejam.com", "session_id": f"ws-bench-{worker_id}"})
+
+                async def call():
+                    await socket.send(heartbeat)
+                    await socket.send(frame)
+                    while True:
+                        reply = json.loads(await socket.recv())
+                        if reply.get("type") == "HEARTBEAT":
+                            return True
+                        if reply.get("type") == "ERROR":
+                            return False
+                        # VOICE_CHUNK / WITNESS_EVENT: keep waiting
+
+                while time.perf_counter() < deadline:
+                    await recorder.timed(call)
+        except Exception:
+            connect_errors += 1
+
+    recorder = Recorder()
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(soul(i, recorder, deadline) for i in range(clients)))
+    return summarize(recorder.latencies, time.perf_counter() - started, recorder.errors + connect_errors)
+
+
+async def run_load(base_url: str, scenarios=SCENARIOS, concurrency: int = 8, ws_clients: int = 32,
+                   duration: float = 10) -> Dict[str, dict]:
+    frame = webcam_jpeg(640, 480)
+    results = {}
+    if 'heartbeat' in scenarios:
+        results['heartbeat'] = await heartbeat_load(base_url, concurrency, duration, frame)
+    if 'browse' in scenarios:
+        results['browse'] = await browse_load(base_url, concurrency, duration, streamed=False)
+        results['browse stream'] = await browse_load(base_url, concurrency, duration, streamed=True)
+    if 'ws' in scenarios:
+        results[f'ws x{ws_clients}'] = await ws_load(base_url, ws_clients, duration, frame)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='comma-separated subset of ' + ', '.join(SCENARIOS))
+    parser.add_argument('--concurrency', type=int, default=8, help='HTTP workers per scenario')
+    parser.add_argument('--ws-clients', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10, help='seconds per scenario')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    results = asyncio.run(run_load(args.base_url, scenarios, args.concurrency, args.ws_clients, args.duration))
+    print_table(results, COLUMNS)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"load": results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
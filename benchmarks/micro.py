@@ -0,0 +1,94 @@
+"""
+Microbenchmarks for the two CPU-bound hot paths, no server involved:
+
+- rewrite: resurrect_html() over the recorded fixtures (whole page and fed in
+  16 KB chunks, as /api/browse/stream does), plus a ~200 KB scaled page
+- ingest:  shrink_jpeg() (draft decode + downscale + re-encode + dHash) on a
+  synthetic 1280x720 webcam frame, raw bytes and base64 data URL
+
+    python benchmarks/micro.py [--only rewrite|ingest] [--json out.json]
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import fixture_names, load_fixture, print_table, scale_page, summarize, webcam_jpeg  # noqa: E402
+
+from backend.frame_ingest import shrink_data_url, shrink_jpeg  # noqa: E402
+from backend.resurrection import Resurrector, resurrect_html  # noqa: E402
+
+RESURRECTION_TIME = "19970327"
+STREAM_CHUNK_CHARS = 16 * 1024
+
+
+def bench(fn, min_seconds: float, min_runs: int = 5, nbytes: int = 0) -> dict:
+    fn()  # warm-up (imports, regex compilation, PIL plugin registration)
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < min_runs or time.perf_counter() - started < min_seconds:
+        t0 = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - t0)
+    elapsed = sum(timings)
+    row = summarize(timings, elapsed)
+    row = {"runs": row["requests"], "ops_per_s": row["throughput_rps"],
+           "mean_ms": row["mean_ms"], "p50_ms": row["p50_ms"], "p95_ms": row["p95_ms"]}
+    if nbytes:
+        row["mb_per_s"] = round(nbytes * len(timings) / elapsed / 1e6, 2)
+    return row
+
+
+def rewrite_streamed(html: str):
+    resurrector = Resurrector(RESURRECTION_TIME)
+    for i in range(0, len(html), STREAM_CHUNK_CHARS):
+        resurrector.feed(html[i:i + STREAM_CHUNK_CHARS])
+    resurrector.close()
+
+
+def rewrite_benchmarks(min_seconds: float) -> dict:
+    pages = {name[:-len('.html')]: load_fixture(name) for name in fixture_names()}
+    pages['heavensgate x40'] = scale_page(pages['heavensgate'], 40)
+
+    results = {}
+    for name, html in pages.items():
+        size = len(html.encode('utf-8'))
+        results[f"rewrite {name}"] = bench(lambda: resurrect_html(html, RESURRECTION_TIME), min_seconds, nbytes=size)
+        results[f"rewrite {name} (streamed)"] = bench(lambda: rewrite_streamed(html), min_seconds, nbytes=size)
+    return results
+
+
+def ingest_benchmarks(min_seconds: float) -> dict:
+    frame = webcam_jpeg()
+    data_url = "data:image/jpeg;base64," + base64.b64encode(frame).decode('ascii')
+    return {
+        "ingest jpeg 1280x720": bench(lambda: shrink_jpeg(frame), min_seconds, nbytes=len(frame)),
+        "ingest data url 1280x720": bench(lambda: shrink_data_url(data_url), min_seconds, nbytes=len(data_url)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', choices=('rewrite', 'ingest'))
+    parser.add_argument('--min-seconds', type=float, default=1.0, help='time spent per benchmark')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    results = {}
+    if args.only in (None, 'rewrite'):
+        results.update(rewrite_benchmarks(args.min_seconds))
+    if args.only in (None, 'ingest'):
+        results.update(ingest_benchmarks(args.min_seconds))
+
+    print_table(results, ("runs", "ops_per_s", "mean_ms", "p50_ms", "p95_ms", "mb_per_s"))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"micro": results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
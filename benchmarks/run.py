@@ -0,0 +1,165 @@
+"""
+Benchmark runner - the pre-deploy regression check
+
+Starts the fake Wayback (benchmarks/fake_wayback.py) and the backend with
+GEMINI_BACKEND=stub on free local ports, runs the microbenchmarks and the
+load generator against them, and prints p50/p95/p99 + throughput. Nothing
+leaves the machine and no Gemini quota is spent.
+
+    python benchmarks/run.py --save benchmarks/baseline.json     # on main
+    python benchmarks/run.py --compare benchmarks/baseline.json  # on the branch
+
+--compare exits with status 1 when any p95 got slower, or throughput dropped,
+by more than --threshold (default 20%), or a scenario started failing.
+Baselines are only comparable on the same machine - don't commit them.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import ROOT, print_table  # noqa: E402
+from load import COLUMNS, SCENARIOS, run_load  # noqa: E402
+
+import httpx  # noqa: E402
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{' '.join(process.args)} exited with {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def start_servers(args, cache_dir: str):
+    wayback_port, app_port = free_port(), free_port()
+    wayback = subprocess.Popen([
+        sys.executable, os.path.join(HERE, 'fake_wayback.py'), '--port', str(wayback_port),
+        '--latency-ms', str(args.wayback_latency_ms), '--page-scale', str(args.page_scale),
+    ], cwd=ROOT)
+    env = {
+        **os.environ,
+        'WAYBACK_AVAILABILITY_URL': f'http://127.0.0.1:{wayback_port}/wayback/available',
+        'GEMINI_BACKEND': 'stub',
+        'GEMINI_STUB_LATENCY_MS': str(args.gemini_latency_ms),
+        'GEMINI_RPM': str(args.gemini_rpm),
+        'PAGE_CACHE_DIR': cache_dir,
+        'WARM_TARGETS': '',
+        # Every heartbeat pays the (stub) Gemini call - replays would hide regressions
+        'SCENE_CACHE_TTL_SECONDS': '0',
+        'LOG_LEVEL': os.environ.get('LOG_LEVEL', 'WARNING'),
+    }
+    app = subprocess.Popen([
+        sys.executable, '-m', 'uvicorn', 'backend.main:app', '--host', '127.0.0.1', '--port', str(app_port),
+        '--log-level', 'warning', '--no-access-log',
+    ], cwd=ROOT, env=env)
+    try:
+        wait_until_up(f'http://127.0.0.1:{wayback_port}/wayback/available?url=heavensgate.com', wayback)
+        wait_until_up(f'http://127.0.0.1:{app_port}/health', app)
+    except Exception:
+        stop_servers(wayback, app)
+        raise
+    return f'http://127.0.0.1:{app_port}', (wayback, app)
+
+
+def stop_servers(*processes: subprocess.Popen):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Regressions as human-readable lines (empty: no regression)"""
+    regressions = []
+    for section, rows in baseline.items():
+        for name, before in rows.items():
+            after = results.get(section, {}).get(name)
+            if after is None:
+                continue
+            if 'p95_ms' in before and after['p95_ms'] > before['p95_ms'] * (1 + threshold):
+                regressions.append(f"{section}/{name}: p95 {before['p95_ms']}ms -> {after['p95_ms']}ms")
+            for key in ('throughput_rps', 'ops_per_s'):
+                if key in before and after[key] < before[key] * (1 - threshold):
+                    regressions.append(f"{section}/{name}: {key} {before[key]} -> {after[key]}")
+            if not before.get('errors') and after.get('errors'):
+                regressions.append(f"{section}/{name}: {after['errors']} errors (baseline had none)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--duration', type=float, default=10, help='seconds per load scenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--ws-clients', type=int, default=32)
+    parser.add_argument('--gemini-latency-ms', type=float, default=800)
+    parser.add_argument('--gemini-rpm', type=float, default=0, help='scheduler quota (0: off, measure the server itself)')
+    parser.add_argument('--wayback-latency-ms', type=float, default=150)
+    parser.add_argument('--page-scale', type=int, default=1)
+    parser.add_argument('--skip-micro', action='store_true')
+    parser.add_argument('--save', help='write results as a baseline JSON file')
+    parser.add_argument('--compare', help='baseline JSON file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = {}
+    if not args.skip_micro:
+        from micro import ingest_benchmarks, rewrite_benchmarks
+        results['micro'] = {**rewrite_benchmarks(1.0), **ingest_benchmarks(1.0)}
+        print_table(results['micro'], ("runs", "ops_per_s", "mean_ms", "p50_ms", "p95_ms", "mb_per_s"))
+        print()
+
+    scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    with tempfile.TemporaryDirectory(prefix='dead-web-bench-') as cache_dir:
+        base_url, processes = start_servers(args, cache_dir)
+        try:
+            results['load'] = asyncio.run(run_load(base_url, scenarios, args.concurrency,
+                                                   args.ws_clients, args.duration))
+        finally:
+            stop_servers(*processes)
+    print_table(results['load'], COLUMNS)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print(f"\n✅ No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+// Capture Worker - JPEG encoding of heartbeat frames, off the page's main thread
+// Receives { id, bitmap, quality } (the ImageBitmap is transferred, already at
+// capture size) and answers { id, blob } or { id, error }.
+
+// One canvas for every frame, resized only when the capture size changes
+let canvas = null;
+let ctx = null;
+
+self.onmessage = async ({ data }) => {
+    const { id, bitmap, quality } = data;
+    try {
+        if (!canvas) {
+            canvas = new OffscreenCanvas(bitmap.width, bitmap.height);
+            ctx = canvas.getContext('2d');
+        } else if (canvas.width !== bitmap.width || canvas.height !== bitmap.height) {
+            canvas.width = bitmap.width;
+            canvas.height = bitmap.height;
+        }
+        ctx.drawImage(bitmap, 0, 0);
+        const blob = await canvas.convertToBlob({ type: 'image/jpeg', quality });
+        self.postMessage({ id, blob });
+    } catch (error) {
+        self.postMessage({ id, error: String(error) });
+    } finally {
+        bitmap.close();
+    }
+};
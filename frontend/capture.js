@@ -0,0 +1,133 @@
+// Frame Capture - webcam frames for heartbeats, kept off the main thread
+//
+// Every capture (heartbeats and the manual test) goes through FrameCapture.grab:
+// createImageBitmap grabs the video frame already downscaled, and a Web Worker
+// (capture-worker.js) encodes it to JPEG on an OffscreenCanvas it reuses, so the
+// glitch animations and text rot keep the main thread. Size and quality come from
+// the server (/api/capture): frames match what the backend ingest keeps.
+// Browsers without OffscreenCanvas / workers fall back to one reused <canvas>.
+
+const FrameCapture = (() => {
+    // Until /api/capture answers - the backend defaults
+    let settings = { max_edge: 512, quality: 0.7 };
+
+    let worker = null;
+    let workerBroken = typeof Worker === 'undefined'
+        || typeof OffscreenCanvas === 'undefined'
+        || typeof createImageBitmap === 'undefined';
+    const pending = new Map();
+    let nextId = 0;
+
+    // Main-thread fallback canvas (created once)
+    let canvas = null;
+
+    // Ask the server for capture size + quality (keeps the defaults if it can't say)
+    async function configure() {
+        try {
+            const response = await fetch(`${window.location.origin}/api/capture`);
+            if (response.ok) {
+                settings = { ...settings, ...(await response.json()) };
+            }
+        } catch (error) {
+            console.warn('⚠️ Capture settings unavailable, using defaults:', error);
+        }
+        return settings;
+    }
+
+    // Long edge capped to max_edge, never upscaled
+    function frameSize(video) {
+        const scale = Math.min(1, settings.max_edge / Math.max(video.videoWidth, video.videoHeight));
+        return {
+            width: Math.max(1, Math.round(video.videoWidth * scale)),
+            height: Math.max(1, Math.round(video.videoHeight * scale))
+        };
+    }
+
+    function getWorker() {
+        if (!worker && !workerBroken) {
+            try {
+                worker = new Worker('/static/capture-worker.js');
+                worker.onmessage = ({ data }) => {
+                    const job = pending.get(data.id);
+                    pending.delete(data.id);
+                    if (!job) return;
+                    if (data.error) {
+                        job.reject(new Error(data.error));
+                    } else {
+                        job.resolve(data.blob);
+                    }
+                };
+                worker.onerror = (event) => {
+                    event.preventDefault();
+                    retireWorker(new Error(event.message || 'Capture worker failed'));
+                };
+            } catch (error) {
+                retireWorker(error);
+            }
+        }
+        return worker;
+    }
+
+    // Give up on the worker for this page: fail what it still owes, use the canvas from now on
+    function retireWorker(error) {
+        console.warn('⚠️ Capture worker unavailable, encoding on the page:', error);
+        workerBroken = true;
+        if (worker) {
+            worker.terminate();
+            worker = null;
+        }
+        for (const job of pending.values()) {
+            job.reject(error);
+        }
+        pending.clear();
+    }
+
+    async function encodeInWorker(video, size) {
+        const bitmap = await createImageBitmap(video, {
+            resizeWidth: size.width,
+            resizeHeight: size.height,
+            resizeQuality: 'medium'
+        });
+        const id = nextId++;
+        return new Promise((resolve, reject) => {
+            pending.set(id, { resolve, reject });
+            worker.postMessage({ id, bitmap, quality: settings.quality }, [bitmap]);
+        });
+    }
+
+    function encodeOnCanvas(video, size) {
+        if (!canvas) {
+            canvas = document.createElement('canvas');
+        }
+        if (canvas.width !== size.width || canvas.height !== size.height) {
+            canvas.width = size.width;
+            canvas.height = size.height;
+        }
+        canvas.getContext('2d').drawImage(video, 0, 0, size.width, size.height);
+
+        return new Promise((resolve, reject) => {
+            canvas.toBlob((blob) => {
+                if (blob) {
+                    resolve(blob);
+                } else {
+                    reject(new Error('Frame encoding failed'));
+                }
+            }, 'image/jpeg', settings.quality);
+        });
+    }
+
+    // Current video frame as a JPEG Blob at the server's capture size
+    async function grab(video) {
+        const size = frameSize(video);
+        if (getWorker()) {
+            try {
+                return await encodeInWorker(video, size);
+            } catch (error) {
+                retireWorker(error);
+            }
+        }
+        return encodeOnCanvas(video, size);
+    }
+
+    return { configure, grab };
+})();
@@ -16,13 +16,18 @@ let isActivated = false;
 
 // Stalker variables
 let videoElement;
-let currentGhostVision = null;
 let lifeForce = null;
 let currentVolume = 0;
 
 // Soul Connection
 let soulConnection = null;
 
+// Per-tab session id - the backend keys haunt level + history on it
+// (new id on every page load, no persistence)
+const soulId = (window.crypto && crypto.randomUUID)
+    ? crypto.randomUUID()
+    : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+
 // TASK 2: Refactored to use global stream (no permission request)
 async function initAudioTrap() {
     if (isActivated) return;
@@ -155,39 +160,130 @@ async function initVision() {
         // TASK 2: Use global stream
         videoElement.srcObject = window.globalSensorStream;
         
-        // Wait for video to be ready (silent surveillance)
-        
-        // Start capturing snapshots every 5 seconds
-        setInterval(captureSnapshot, 5000);
+        // Frames are grabbed by each heartbeat, on the server's schedule
     } catch (error) {
         console.error('Camera access denied:', error);
     }
 }
 
-// Capture frame from video and convert to Base64
-// TASK 1: FIXED - Wait for video to be fully ready
-function captureSnapshot() {
-    if (!videoElement || !videoElement.videoWidth) {
-        console.warn('⚠️ Video element not ready for snapshot');
-        return;
-    }
+// Metadata that travels with every heartbeat frame
+function heartbeatMeta() {
+    // Get current URL from address bar
+    const addressInput = document.querySelector('.address-bar input');
+    const currentUrl = addressInput ? addressInput.value : 'unknown';
     
-    // CRITICAL: Check if video has enough data
-    if (videoElement.readyState < 3) {
-        console.warn('⚠️ Video readyState too low:', videoElement.readyState);
-        return;
+    return {
+        battery: lifeForce || 1.0,
+        platform: navigator.platform || 'Unknown',
+        timestamp: currentUrl,  // Reusing timestamp field for URL
+        session_id: soulId
+    };
+}
+
+// Send a heartbeat over /ws/soul: JSON metadata, then the JPEG as one binary message
+// Returns false when the socket isn't open (caller falls back to HTTP)
+function sendHeartbeatOverSoul(frame) {
+    if (!soulConnection || soulConnection.readyState !== WebSocket.OPEN) {
+        return false;
+    }
+    // stream: Gemini's words come back as VOICE_CHUNK messages while it is still writing
+    soulConnection.send(JSON.stringify({ type: 'HEARTBEAT', stream: true, ...heartbeatMeta() }));
+    voiceChunksSpoken = 0;
+    soulConnection.send(frame);
+    return true;
+}
+
+// Sentences of the current streamed heartbeat already handed to TTS
+let voiceChunksSpoken = 0;
+
+// Speak a VOICE_CHUNK as soon as it arrives - first clause starts the possessed voice,
+// the rest queue up behind it in speechSynthesis
+function handleVoiceChunk(data) {
+    if (voiceChunksSpoken === 0) {
+        speakPossessed(data.text);
+    } else {
+        speechSynthesis.speak(possessedUtterance(data.text));
+    }
+    voiceChunksSpoken++;
+}
+
+// Server-driven cadence: every heartbeat reply carries next_interval_ms, which grows
+// with server load / Gemini queue depth and shrinks as the haunt level rises
+const HEARTBEAT_MAX_BACKOFF_MS = 300000;
+const HEARTBEAT_REPLY_TIMEOUT_MS = 60000;
+let nextHeartbeatMs = null;
+let heartbeatFailures = 0;
+
+// Resolver for the HEARTBEAT reply to a frame sent over the soul socket
+let soulHeartbeatReply = null;
+
+// Delay before the next heartbeat - the old 30-60 s random delay until the server has spoken
+function heartbeatDelay() {
+    return nextHeartbeatMs ?? 30000 + Math.random() * 30000;
+}
+
+// Exponential backoff with jitter, so a fleet of failing clients doesn't retry in lockstep
+function backoffDelay(attempt, baseMs, maxMs) {
+    const delay = Math.min(maxMs, baseMs * 2 ** Math.max(0, attempt - 1));
+    return delay / 2 + Math.random() * delay / 2;
+}
+
+// Server said no (non-2xx): wait for its Retry-After, or twice as long as last time
+function slowDownHeartbeat(retryAfter) {
+    const seconds = Number(retryAfter);
+    nextHeartbeatMs = Number.isFinite(seconds) && seconds > 0
+        ? seconds * 1000
+        : Math.min(HEARTBEAT_MAX_BACKOFF_MS, 2 * heartbeatDelay());
+}
+
+// Resolves with the HEARTBEAT socket reply (null if it never comes)
+function awaitSoulHeartbeat(timeoutMs) {
+    return new Promise((resolve) => {
+        const timer = setTimeout(() => soulHeartbeatReply(null), timeoutMs);
+        soulHeartbeatReply = (data) => {
+            clearTimeout(timer);
+            soulHeartbeatReply = null;
+            resolve(data);
+        };
+    });
+}
+
+// Speak / glitch on a heartbeat reply (HTTP response or HEARTBEAT socket message)
+function handleHeartbeatReply(data) {
+    heartbeatFailures = 0;
+    const hint = Number(data.next_interval_ms);
+    if (Number.isFinite(hint) && hint > 0) {
+        nextHeartbeatMs = hint;
+    }
+    if (soulHeartbeatReply) {
+        soulHeartbeatReply(data);
     }
     
-    const canvas = document.createElement('canvas');
-    // Ensure minimum resolution for Gemini
-    canvas.width = Math.max(videoElement.videoWidth, 640);
-    canvas.height = Math.max(videoElement.videoHeight, 480);
-    
-    const ctx = canvas.getContext('2d');
-    ctx.drawImage(videoElement, 0, 0, canvas.width, canvas.height);
+    // Speak the AI's response (streamed replies were already spoken chunk by chunk)
+    if (data.voice_text) {
+        if (!data.streamed) {
+            speakPossessed(data.voice_text);
+        }
+        displayStatusMessage(data.voice_text);
+    }
     
-    currentGhostVision = canvas.toDataURL('image/jpeg', 0.8);
-    // Snapshot captured (silent)
+    // ISSUE 3 FIX: Trigger transient glitch based on intensity
+    if (data.glitch_intensity >= 5) {
+        triggerTransientGlitch();
+    }
+}
+
+// POST a JPEG frame to /api/heartbeat as a raw image/jpeg body
+function sendHeartbeatFrame(frame) {
+    const params = new URLSearchParams(heartbeatMeta());
+    
+    return fetch(`${window.location.origin}/api/heartbeat?${params}`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'image/jpeg',
+        },
+        body: frame
+    });
 }
 
 // Check if backend is reachable
@@ -210,14 +306,19 @@ async function startHeartbeat() {
     // Check backend health first
     const backendReady = await checkBackendHealth();
     if (!backendReady) {
-        console.warn('⚠️ Backend not ready, will retry in 30 seconds...');
-        setTimeout(startHeartbeat, 30000);
+        const delay = backoffDelay(++heartbeatFailures, 30000, HEARTBEAT_MAX_BACKOFF_MS);
+        console.warn(`⚠️ Backend not ready, will retry in ${Math.round(delay / 1000)} seconds...`);
+        setTimeout(startHeartbeat, delay);
         return;
     }
+    heartbeatFailures = 0;
+    
+    // Frame size and quality the backend wants
+    await FrameCapture.configure();
     
     async function scheduleNextHeartbeat() {
-        // Random delay between 30-60 seconds (longer responses need more time)
-        const delay = 30000 + Math.random() * 30000;
+        // As long as the server asked for (see handleHeartbeatReply)
+        const delay = heartbeatDelay();
         
         setTimeout(async () => {
             await performHeartbeat();
@@ -225,7 +326,7 @@ async function startHeartbeat() {
         }, delay);
     }
     
-    async function performHeartbeat(retryCount = 0) {
+    async function performHeartbeat() {
         // Debug: Check video element
         if (!videoElement) {
             console.error('❌ Heartbeat: videoElement is null');
@@ -243,62 +344,35 @@ async function startHeartbeat() {
             return;
         }
         
-        // Capture frame to base64 with good resolution
-        const canvas = document.createElement('canvas');
-        canvas.width = Math.max(videoElement.videoWidth, 640);
-        canvas.height = Math.max(videoElement.videoHeight, 480);
-        const ctx = canvas.getContext('2d');
-        ctx.drawImage(videoElement, 0, 0, canvas.width, canvas.height);
-        const imageBase64 = canvas.toDataURL('image/jpeg', 0.7);
-        
-        // Get system data
-        const battery = lifeForce || 1.0;
-        const platform = navigator.platform || 'Unknown';
-        
-        // Get current URL from address bar
-        const addressInput = document.querySelector('.address-bar input');
-        const currentUrl = addressInput ? addressInput.value : 'unknown';
-        
         try {
-            const response = await fetch(`${window.location.origin}/api/heartbeat`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    image: imageBase64,
-                    battery: battery,
-                    platform: platform,
-                    timestamp: currentUrl  // Reusing timestamp field for URL
-                })
-            });
+            // Backend ingest resolution, encoded off the main thread (capture.js)
+            const frame = await FrameCapture.grab(videoElement);
             
-            if (!response.ok) {
-                console.error(`❌ Heartbeat: Server returned ${response.status}`);
+            // Prefer the open soul socket - the reply is pushed back as a HEARTBEAT message,
+            // wait for it so the next heartbeat follows its next_interval_ms
+            if (sendHeartbeatOverSoul(frame)) {
+                await awaitSoulHeartbeat(HEARTBEAT_REPLY_TIMEOUT_MS);
                 return;
             }
             
-            const data = await response.json();
+            // Raw JPEG body (no base64 data URL) - metadata rides in the query string
+            const response = await sendHeartbeatFrame(frame);
             
-            // Speak the AI's response
-            if (data.voice_text) {
-                speakPossessed(data.voice_text);
-                displayStatusMessage(data.voice_text);
+            if (!response.ok) {
+                console.error(`❌ Heartbeat: Server returned ${response.status}`);
+                slowDownHeartbeat(response.headers.get('Retry-After'));
+                return;
             }
             
-            // ISSUE 3 FIX: Trigger transient glitch based on intensity
-            if (data.glitch_intensity >= 5) {
-                triggerTransientGlitch();
-            }
+            handleHeartbeatReply(await response.json());
             
         } catch (error) {
             console.error('💔 Heartbeat failed:', error);
             
-            // Retry logic for Render free tier spin-up
-            if (retryCount < 3) {
-                console.warn(`⚠️ Retrying in 10 seconds... (attempt ${retryCount + 1}/3)`);
-                setTimeout(() => performHeartbeat(retryCount + 1), 10000);
-            } else {
+            // Render free tier spin-up or an overloaded server: back off instead of piling on
+            nextHeartbeatMs = backoffDelay(++heartbeatFailures, 10000, HEARTBEAT_MAX_BACKOFF_MS);
+            console.warn(`⚠️ Retrying in ${Math.round(nextHeartbeatMs / 1000)} seconds... (attempt ${heartbeatFailures})`);
+            if (heartbeatFailures === 3) {
                 console.error('❌ Backend not responding after 3 retries. Service may be down.');
                 console.error('   Render free tier spins down after 15 min - first request takes 30-60s to wake up');
             }
@@ -345,6 +419,8 @@ async function initBatteryMonitor() {
 }
 
 // Soul Connection - WebSocket to the Ghost Brain
+let soulReconnects = 0;
+
 function initSoulConnection() {
     // Use relative WebSocket URL that works in production
     const wsProtocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
@@ -353,6 +429,7 @@ function initSoulConnection() {
     
     soulConnection.onopen = () => {
         console.log('Soul bound to the realm...');
+        soulReconnects = 0;
     };
     
     soulConnection.onmessage = (event) => {
@@ -360,6 +437,12 @@ function initSoulConnection() {
         
         if (data.type === 'WITNESS_EVENT') {
             handleWitnessEvent(data);
+        } else if (data.type === 'VOICE_CHUNK') {
+            handleVoiceChunk(data);
+        } else if (data.type === 'HEARTBEAT') {
+            handleHeartbeatReply(data);
+        } else if (data.type === 'POSSESSION') {
+            handlePossession(data);
         }
     };
     
@@ -369,7 +452,12 @@ function initSoulConnection() {
     
     soulConnection.onclose = () => {
         console.log('Attempting to rebind soul...');
-        setTimeout(initSoulConnection, 3000);
+        // A heartbeat waiting on this socket won't get its reply
+        if (soulHeartbeatReply) {
+            soulHeartbeatReply(null);
+        }
+        // Backed off with jitter: a restarted server isn't hit by every tab at once
+        setTimeout(initSoulConnection, backoffDelay(++soulReconnects, 3000, 60000));
     };
 }
 
@@ -589,45 +677,56 @@ function startEnhancedSemanticRot() {
 
 // Ghost Brain Communication
 async function pollGhost() {
+    const sensors = {
+        battery: lifeForce || 1.0,
+        volume: currentVolume,
+        timestamp: new Date().toISOString()
+    };
+    
+    // Over the soul socket when bound - reply arrives as a POSSESSION message
+    if (soulConnection && soulConnection.readyState === WebSocket.OPEN) {
+        soulConnection.send(JSON.stringify({ type: 'POSSESS', ...sensors }));
+        return;
+    }
+    
     try {
         const response = await fetch(`${window.location.origin}/api/possess`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({
-                battery: lifeForce || 1.0,
-                volume: currentVolume,
-                timestamp: new Date().toISOString()
-            })
+            body: JSON.stringify(sensors)
         });
         
-        const data = await response.json();
-        
-        // Speak the message with possessed dual-layer voice
-        speakPossessed(data.message);
-        
-        // Type message into console
-        typeMessage(data.message);
-        
-        // Execute action
-        if (data.action === 'glitch') {
-            jumpscare();
-        } else if (data.action === 'dim_screen') {
-            document.body.style.filter = 'brightness(0.3)';
-            setTimeout(() => {
-                document.body.style.filter = '';
-            }, 3000);
-        }
+        handlePossession(await response.json());
         
     } catch (error) {
         console.error('Failed to contact the ghost brain:', error);
     }
 }
 
-// TASK 3: UPGRADED - Dual Voice for LONG psychological horror
-function speakPossessed(text) {
+// Act on a possession reply (HTTP response or POSSESSION socket message)
+function handlePossession(data) {
+    // Speak the message with possessed dual-layer voice
+    speakPossessed(data.message);
     
+    // Type message into console
+    typeMessage(data.message);
+    
+    // Execute action
+    if (data.action === 'glitch') {
+        jumpscare();
+    } else if (data.action === 'dim_screen') {
+        document.body.style.filter = 'brightness(0.3)';
+        setTimeout(() => {
+            document.body.style.filter = '';
+        }, 3000);
+    }
+}
+
+// TASK 3: UPGRADED - Dual Voice for LONG psychological horror
+// Main Voice: Slow, deep, demonic (optimized for longer text)
+function possessedUtterance(text) {
     // Get available voices
     const voices = window.speechSynthesis.getVoices();
     let selectedVoice = null;
@@ -640,7 +739,6 @@ function speakPossessed(text) {
         }
     }
     
-    // Main Voice: Slow, deep, demonic (optimized for longer text)
     const entity = new SpeechSynthesisUtterance(text);
     entity.pitch = 0.1;
     entity.rate = 0.75;  // Slightly slower for dramatic effect
@@ -649,6 +747,12 @@ function speakPossessed(text) {
     
     // TASK 3: Handle punctuation better for longer responses
     entity.lang = 'en-US';
+    return entity;
+}
+
+function speakPossessed(text) {
+    
+    const entity = possessedUtterance(text);
     
     // Create Web Audio for subtle demonic overlay
     if (!audioContext) {
@@ -922,30 +1026,10 @@ async function testHeartbeatManually() {
         return;
     }
     
-    // Capture frame
-    const canvas = document.createElement('canvas');
-    canvas.width = videoElement.videoWidth;
-    canvas.height = videoElement.videoHeight;
-    const ctx = canvas.getContext('2d');
-    ctx.drawImage(videoElement, 0, 0);
-    const imageBase64 = canvas.toDataURL('image/jpeg', 0.5);
-    
-    const battery = lifeForce || 1.0;
-    const platform = navigator.platform || 'Unknown';
-    const addressInput = document.querySelector('.address-bar input');
-    const currentUrl = addressInput ? addressInput.value : 'unknown';
-    
     try {
-        const response = await fetch('/api/heartbeat', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                image: imageBase64,
-                battery: battery,
-                platform: platform,
-                timestamp: currentUrl
-            })
-        });
+        // Same capture as the real heartbeat
+        const frame = await FrameCapture.grab(videoElement);
+        const response = await sendHeartbeatFrame(frame);
         
         const data = await response.json();
         
@@ -966,26 +1050,79 @@ async function testHeartbeatManually() {
 let originalPageContent = null;
 let currentPageUrl = null;
 
+// Pages resurrected this visit, keyed "url@timestamp" -> { etag, data }
+// Revisits send If-None-Match and reuse the copy on a 304
+const resurrectedPages = new Map();
+
+// Read a streamed resurrection, repainting the content area at most once per frame
+// so the top of the page shows up while the rest is still being dug out of the archive
+async function readResurrection(response, contentArea) {
+    if (!response.body || !contentArea) {
+        return await response.text();
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let html = '';
+    let paintPending = false;
+    let finished = false;
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        html += decoder.decode(value, { stream: true });
+        if (!paintPending) {
+            paintPending = true;
+            requestAnimationFrame(() => {
+                paintPending = false;
+                if (!finished) {
+                    contentArea.innerHTML = html;
+                }
+            });
+        }
+    }
+    html += decoder.decode();
+    finished = true;
+    return html;
+}
+
 // Resurrect a dead website
 async function resurrectDeadSite(url, timestamp = "1998") {
     try {
         typeMessage('Contacting the dead web...');
         
+        const contentArea = document.querySelector('.content');
+        
         // CRITICAL FIX: Use absolute URL to avoid base tag interference from resurrected pages
-        const apiUrl = `${window.location.origin}/api/browse`;
+        const params = new URLSearchParams({ url: url, timestamp: timestamp });
+        const apiUrl = `${window.location.origin}/api/browse/stream?${params}`;
+        const pageKey = `${url}@${timestamp}`;
+        const known = resurrectedPages.get(pageKey);
         
-        const response = await fetch(apiUrl, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({ 
-                url: url,
-                timestamp: timestamp
-            })
-        });
+        const headers = {};
+        if (known) {
+            headers['If-None-Match'] = known.etag;
+        }
         
-        const data = await response.json();
+        const response = await fetch(apiUrl, { headers: headers });
+        
+        let data;
+        if (response.status === 304 && known) {
+            data = known.data;
+        } else if (!response.ok) {
+            data = await response.json().catch(() => ({ error: `HTTP ${response.status}` }));
+        } else {
+            // Page body streams in; snapshot details come with the headers
+            data = {
+                html: await readResurrection(response, contentArea),
+                snapshot_url: response.headers.get('X-Snapshot-Url'),
+                timestamp: response.headers.get('X-Snapshot-Timestamp')
+            };
+            const etag = response.headers.get('ETag');
+            if (etag && data.html) {
+                resurrectedPages.set(pageKey, { etag: etag, data: data });
+            }
+        }
         
         if (data.error) {
             typeMessage(`Failed to resurrect: ${data.error}`);
@@ -994,7 +1131,6 @@ async function resurrectDeadSite(url, timestamp = "1998") {
         }
         
         // Inject the resurrected HTML into the content area
-        const contentArea = document.querySelector('.content');
         if (contentArea) {
             if (!data.html || data.html.trim().length === 0) {
                 typeMessage('The dead are silent...');
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test that archive.org error pages are never resurrected (backend/archive_backend.py)
+
+A 404/429/503 from /web/ is an HTML page too; it must come back as an error,
+not be rewritten and kept in the page cache. archive.org is replaced by an
+httpx.MockTransport on the shared archive client.
+
+Run with `python test_archive_backend.py` or `pytest test_archive_backend.py` - no server needed.
+"""
+import asyncio
+import os
+
+os.environ.update(PAGE_CACHE_DIR='', WARM_TARGETS='', THREAT_CORPUS_PATH='', LOG_LEVEL='ERROR')
+
+import httpx
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.archive_backend import ArchiveError, WaybackArchive
+from backend.archive_http import close_archive_client, start_archive_client
+
+SNAPSHOT = "https://web.archive.org/web/19981201000000/http://dead.example/"
+
+
+def overloaded_archive(request: httpx.Request) -> httpx.Response:
+    if request.url.path == "/wayback/available":
+        return httpx.Response(200, json={"archived_snapshots": {"closest": {
+            "available": True, "status": "200", "url": SNAPSHOT, "timestamp": "19981201000000"}}})
+    return httpx.Response(503, html="<html><body>Service Unavailable</body></html>")
+
+
+def use_archive(handler):
+    asyncio.run(close_archive_client())
+    asyncio.run(start_archive_client(httpx.MockTransport(handler)))
+
+
+def test_error_status_raises():
+    async def run():
+        archive = WaybackArchive()
+        for call in (archive.fetch, archive.open):
+            try:
+                await call(SNAPSHOT)
+            except ArchiveError as e:
+                assert "503" in str(e)
+            else:
+                raise AssertionError(f"{call.__name__} accepted a 503")
+        await close_archive_client()
+    use_archive(overloaded_archive)
+    asyncio.run(run())
+
+
+def test_503_snapshot_is_not_cached():
+    for path in ("/api/browse/stream?url=dead.example&timestamp=1998", "/api/browse"):
+        use_archive(overloaded_archive)
+        with TestClient(main.app) as client:
+            if path == "/api/browse":
+                response = client.post(path, json={"url": "dead.example", "timestamp": "1998"})
+                assert response.json()["html"] is None and "503" in response.json()["error"]
+            else:
+                response = client.get(path)
+                assert response.status_code == 502
+            assert "ETag" not in response.headers
+        assert not main.page_cache.contains(SNAPSHOT)
+
+
+def test_warmer_does_not_cache_a_503():
+    use_archive(overloaded_archive)
+    try:
+        asyncio.run(main.warm_favorite("dead.example", "1998"))
+    except ArchiveError:
+        pass
+    else:
+        raise AssertionError("warming a 503 should fail")
+    assert not main.page_cache.contains(SNAPSHOT)
+    asyncio.run(close_archive_client())
+
+
+if __name__ == "__main__":
+    print("🧪 Testing archive error pages...")
+    print("=" * 50)
+    for test in (test_error_status_raises, test_503_snapshot_is_not_cached, test_warmer_does_not_cache_a_503):
+        test()
+        print(f"✅ {test.__name__}")
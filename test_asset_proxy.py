@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test for the same-origin archived asset proxy (backend/asset_proxy.py)
+
+web.archive.org is replaced by an httpx.MockTransport on the shared archive client.
+
+Run with `python test_asset_proxy.py` or `pytest test_asset_proxy.py` - no server needed.
+"""
+import asyncio
+import os
+import tempfile
+
+os.environ.update(PAGE_CACHE_DIR='', WARM_TARGETS='', THREAT_CORPUS_PATH='', LOG_LEVEL='ERROR')
+
+import httpx
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.archive_http import close_archive_client, start_archive_client
+from backend.asset_proxy import AssetCache, AssetProxy, asset_key, capture_url
+
+GIF = b"GIF89a" + b"\x00" * 64
+CAPTURE = "web/19981201000000im_/http://www.geocities.com/spooky/skull.gif"
+ASSET_URL = f"https://web.archive.org/{CAPTURE}"
+
+
+def use_archive(handler):
+    asyncio.run(close_archive_client())
+    asyncio.run(start_archive_client(httpx.MockTransport(handler)))
+
+
+def archived_gif(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, content=GIF, headers={"content-type": "image/gif"})
+
+
+def test_only_archive_captures_are_proxied():
+    assert capture_url(CAPTURE) == ASSET_URL
+    assert capture_url("web/1998/geocities.com/bg.jpg") == "https://web.archive.org/web/1998/geocities.com/bg.jpg"
+    assert capture_url("web/1998cs_/https://example.com:8080/style.css?v=2") is not None
+    for capture in ("evil.example/skull.gif", "web/1998im_", "web/yesterday/http://example.com/",
+                    "web/1998/javascript:alert(1)", "web/1998/data:text/html,<script>",
+                    "web/1998/file:///etc/passwd", "web/1998/ftp://example.com/a.gif", "web/1998/ http://x"):
+        assert capture_url(capture) is None, capture
+
+
+def test_least_recently_used_asset_is_evicted():
+    with tempfile.TemporaryDirectory() as directory:
+        one_asset = len(b'{"url": "a", "content_type": "image/gif"}') + 1 + len(GIF)
+        cache = AssetCache(directory, max_bytes=2 * one_asset)
+        for name in ("a", "b"):
+            cache.put(asset_key(name), name, "image/gif", GIF)
+        assert cache.get(asset_key("a")).body == GIF  # a is now the most recent
+        cache.put(asset_key("c"), "c", "image/gif", GIF)
+
+        assert cache.get(asset_key("b")) is None
+        assert cache.get(asset_key("a")) is not None and cache.get(asset_key("c")) is not None
+        assert cache.stats()["evictions"] == 1
+
+        restarted = AssetCache(directory, max_bytes=2 * one_asset)  # Another worker, same directory
+        assert restarted.stats()["assets"] == 2 and restarted.get(asset_key("c")).content_type == "image/gif"
+
+
+def test_oversized_assets_pass_through():
+    def huge(request):
+        if request.url.path.endswith("declared.gif"):
+            return httpx.Response(200, content=b"x" * 2048, headers={"content-type": "image/gif"})
+        return httpx.Response(200, stream=httpx.ByteStream(b"x" * 2048))  # No Content-Length
+
+    async def run():
+        with tempfile.TemporaryDirectory() as directory:
+            proxy = AssetProxy(AssetCache(directory), max_bytes=1024)
+            for name in ("declared.gif", "chunked.gif"):
+                assert await proxy.get(f"https://web.archive.org/web/1998im_/http://x.example/{name}") is None
+            assert proxy.stats()["passthroughs"] == 2 and proxy.stats()["assets"] == 0
+        await close_archive_client()
+    use_archive(huge)
+    asyncio.run(run())
+
+
+def test_route_serves_cached_assets_and_redirects_failures():
+    fetched = []
+
+    def archive(request):
+        fetched.append(str(request.url))
+        if "missing" in request.url.path:
+            return httpx.Response(503, html="<html>Service Unavailable</html>")
+        return archived_gif(request)
+
+    use_archive(archive)
+    with tempfile.TemporaryDirectory() as directory:
+        real_proxy, main.asset_proxy = main.asset_proxy, AssetProxy(AssetCache(directory))
+        try:
+            with TestClient(main.app) as client:
+                first = client.get(f"/archive/{CAPTURE}")
+                assert first.status_code == 200 and first.content == GIF
+                assert first.headers["content-type"] == "image/gif"
+                assert "immutable" in first.headers["cache-control"] and "sandbox" in first.headers["content-security-policy"]
+                again = client.get(f"/archive/{CAPTURE}", headers={"If-None-Match": first.headers["etag"]})
+                assert again.status_code == 304
+                assert fetched == [ASSET_URL]
+
+                missing = client.get("/archive/web/1998im_/http://x.example/missing.gif", follow_redirects=False)
+                assert missing.status_code == 302
+                assert missing.headers["location"] == "https://web.archive.org/web/1998im_/http://x.example/missing.gif"
+
+                assert client.get("/archive/web/1998/javascript:alert(1)").status_code == 404
+        finally:
+            main.asset_proxy = real_proxy
+
+
+def test_cancelled_first_request_does_not_fail_the_others():
+    async def slow(request):
+        await asyncio.sleep(0.2)
+        return archived_gif(request)
+
+    async def run():
+        proxy = AssetProxy(AssetCache(directory=''))
+        first = asyncio.create_task(proxy.get(ASSET_URL))
+        await asyncio.sleep(0.05)  # first owns the fetch
+        second = asyncio.create_task(proxy.get(ASSET_URL))
+        await asyncio.sleep(0.05)  # second is waiting on it
+        first.cancel()
+        assert await second is None  # Redirected, not cancelled
+        assert first.cancelled()
+        await close_archive_client()
+    use_archive(slow)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    print("🧪 Testing asset proxy...")
+    print("=" * 50)
+    for test in (test_only_archive_captures_are_proxied, test_least_recently_used_asset_is_evicted,
+                 test_oversized_assets_pass_through, test_route_serves_cached_assets_and_redirects_failures,
+                 test_cancelled_first_request_does_not_fail_the_others):
+        test()
+        print(f"✅ {test.__name__}")
@@ -7,13 +7,16 @@ import base64
 from io import BytesIO
 from PIL import Image
 
-def create_test_image():
-    """Create a simple test image"""
+def create_test_jpeg():
+    """Create a simple test JPEG"""
     img = Image.new('RGB', (320, 240), color='red')
     buffer = BytesIO()
     img.save(buffer, format='JPEG')
-    buffer.seek(0)
-    img_base64 = base64.b64encode(buffer.read()).decode('utf-8')
+    return buffer.getvalue()
+
+def create_test_image():
+    """Create a simple test image as a base64 data URL"""
+    img_base64 = base64.b64encode(create_test_jpeg()).decode('utf-8')
     return f"data:image/jpeg;base64,{img_base64}"
 
 def test_heartbeat():
@@ -67,5 +70,42 @@ def test_heartbeat():
     except Exception as e:
         print(f"\n❌ ERROR: {e}")
 
+def test_heartbeat_binary():
+    """Test the raw image/jpeg upload format of /api/heartbeat"""
+    print("\n🧪 Testing /api/heartbeat with a raw JPEG body...")
+    print("=" * 50)
+    
+    params = {
+        "battery": 0.75,
+        "platform": "Win32",
+        "timestamp": "http://test.com",
+        "session_id": "test-binary"
+    }
+    
+    try:
+        response = requests.post(
+            'http://localhost:8000/api/heartbeat',
+            params=params,
+            data=create_test_jpeg(),
+            headers={'Content-Type': 'image/jpeg'},
+            timeout=10
+        )
+        
+        print(f"📥 Status Code: {response.status_code}")
+        
+        if response.status_code == 200:
+            data = response.json()
+            print(f"✅ Voice Text: {data.get('voice_text')}")
+            print(f"   Haunt Level: {data.get('haunt_level')}")
+        else:
+            print(f"❌ ERROR: {response.text}")
+            
+    except requests.exceptions.ConnectionError:
+        print("\n❌ ERROR: Cannot connect to backend")
+        
+    except Exception as e:
+        print(f"\n❌ ERROR: {e}")
+
 if __name__ == "__main__":
     test_heartbeat()
+    test_heartbeat_binary()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test for the cross-worker event backplane (backend/backplane.py)
+
+Three UnixSocketBackplane instances on one temp socket path stand in for three
+uvicorn workers: one wins the broker election, the others subscribe, and every
+published event reaches every "worker" exactly once - also after the broker dies.
+
+Run with `python test_backplane.py` or `pytest test_backplane.py` - no server needed.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+
+from backend.backplane import LocalBackplane, UnixSocketBackplane
+
+
+async def settle(received, count, timeout=2.0):
+    async def done():
+        while any(len(events) < count for events in received):
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(done(), timeout)
+
+
+async def start_workers(path, n):
+    workers, received = [], []
+    for _ in range(n):
+        events = []
+        backplane = UnixSocketBackplane(path)
+        backplane.start(events.append)
+        await backplane.wait_ready()
+        workers.append(backplane)
+        received.append(events)
+    return workers, received
+
+
+def test_local_backplane_delivers_in_process():
+    async def run():
+        events = []
+        backplane = LocalBackplane()
+        backplane.start(events.append)
+        backplane.publish('{"type":"WITNESS_EVENT"}')
+        assert events == ['{"type":"WITNESS_EVENT"}']
+        await backplane.close()
+    asyncio.run(run())
+
+
+def test_every_worker_gets_every_event_once():
+    async def run():
+        with tempfile.TemporaryDirectory() as directory:
+            workers, received = await start_workers(os.path.join(directory, 'bp.sock'), 3)
+            assert [w.role for w in workers] == ['broker', 'subscriber', 'subscriber']
+
+            for i, worker in enumerate(workers * 2):
+                worker.publish(f'{{"n":{i}}}')
+            await settle(received, 6)
+            for events in received:
+                assert sorted(events) == sorted(f'{{"n":{i}}}' for i in range(6))
+
+            for worker in workers:
+                await worker.close()
+    asyncio.run(run())
+
+
+def test_subscribers_reelect_when_broker_dies():
+    async def run():
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'bp.sock')
+            (broker, *rest), (_, *received) = await start_workers(path, 3)
+            await broker.close()
+
+            async def reelected():
+                while not any(w.role == 'broker' and w.status()["peers"] == 1 for w in rest):
+                    await asyncio.sleep(0.01)
+            await asyncio.wait_for(reelected(), 2)
+
+            rest[0].publish('"after"')
+            rest[1].publish('"again"')
+            await settle(received, 2)
+            assert all(sorted(events) == ['"after"', '"again"'] for events in received)
+
+            for worker in rest:
+                await worker.close()
+    asyncio.run(run())
+
+
+def test_imports_without_fcntl():
+    # Windows has no fcntl; the server must still start there with the local backplane
+    script = "import sys; sys.modules['fcntl'] = None\nfrom backend import main; print(main.backplane.name)"
+    env = {**os.environ, 'EVENT_BACKPLANE': 'local', 'PAGE_CACHE_DIR': '', 'WARM_TARGETS': '',
+           'THREAT_CORPUS_PATH': '', 'LOG_LEVEL': 'ERROR'}
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == 'local'
+
+
+if __name__ == "__main__":
+    print("🧪 Testing event backplane...")
+    print("=" * 50)
+    for test in (test_local_backplane_delivers_in_process, test_every_worker_gets_every_event_once,
+                 test_subscribers_reelect_when_broker_dies, test_imports_without_fcntl):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test for the server-driven heartbeat cadence (backend/cadence.py)
+
+Run with `python test_cadence.py` or `pytest test_cadence.py` - no server needed.
+"""
+from backend.cadence import Cadence
+
+
+def cadence(queue_share=0.0, backoff=0.0, **kwargs):
+    kwargs.setdefault('jitter', 0)
+    return Cadence(lambda: (queue_share, backoff), heartbeat_ms=45000, possess_ms=10000,
+                   target_in_flight=4, min_ms=5000, max_ms=300000, **kwargs)
+
+
+def test_deeper_haunts_come_back_sooner():
+    idle = cadence()
+    assert idle.next_heartbeat_ms(1) == 45000
+    assert idle.next_heartbeat_ms(10) == 27000
+    assert idle.next_heartbeat_ms(99) == 27000
+    assert idle.next_possess_ms() == 10000
+
+
+def test_load_slows_everyone_down():
+    busy = cadence()
+    with busy.heartbeat(), busy.heartbeat(), busy.heartbeat(), busy.heartbeat():
+        assert busy.next_heartbeat_ms(1) == 45000  # At target: no push back yet
+        with busy.heartbeat(), busy.heartbeat(), busy.heartbeat(), busy.heartbeat():
+            assert busy.in_flight == 8
+            assert busy.next_heartbeat_ms(1) == 90000
+            assert busy.next_possess_ms() == 20000
+    assert busy.in_flight == 0
+
+    assert cadence(queue_share=1.0).next_heartbeat_ms(1) == 90000
+    assert cadence(queue_share=50.0).next_heartbeat_ms(1) == 300000  # Clamped
+
+
+def test_quota_backoff_is_waited_out():
+    backing_off = cadence(backoff=120)
+    assert backing_off.next_heartbeat_ms(10) == 120000
+    assert backing_off.next_possess_ms() == 10000  # Possession never calls Gemini
+    assert backing_off.stats()["heartbeat_ms"] == 120000
+
+
+def test_jitter_spreads_the_fleet():
+    hints = {cadence(jitter=0.33).next_heartbeat_ms(1) for _ in range(200)}
+    assert len(hints) > 100
+    assert min(hints) >= 45000 * 0.67 and max(hints) <= 45000 * 1.33
+
+
+if __name__ == "__main__":
+    print("🧪 Testing heartbeat cadence...")
+    print("=" * 50)
+    for test in (test_deeper_haunts_come_back_sooner, test_load_slows_everyone_down,
+                 test_quota_backoff_is_waited_out, test_jitter_spreads_the_fleet):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Test for heartbeat frame ingest (backend/frame_ingest.py)
+
+Run with `python test_frame_ingest.py` or `pytest test_frame_ingest.py` - no server needed.
+"""
+import asyncio
+from io import BytesIO
+
+from PIL import Image
+
+from backend import frame_ingest
+from backend.frame_ingest import decode_draft, ingest_jpeg, shrink_jpeg, shutdown_ingest_pool, start_ingest_pool
+
+
+def jpeg(width, height):
+    out = BytesIO()
+    Image.new('RGB', (width, height), (90, 20, 20)).save(out, format='JPEG')
+    return out.getvalue()
+
+
+def test_webcam_frames_decode_below_full_size():
+    assert decode_draft(jpeg(1280, 720), 512).size == (640, 360)
+    assert decode_draft(jpeg(720, 1280), 512).size == (360, 640)
+    assert decode_draft(jpeg(1920, 1080), 512).size == (960, 540)
+
+
+def test_small_frames_are_left_alone():
+    assert decode_draft(jpeg(320, 240), 512).size == (320, 240)
+    assert decode_draft(jpeg(640, 480), 512).size == (640, 480)  # 1/2 would drop below 512
+
+
+def test_shrink_keeps_aspect_ratio():
+    frame = shrink_jpeg(jpeg(1280, 720), 512)
+    assert frame.size == (512, 288)
+    assert Image.open(BytesIO(frame.jpeg)).size == (512, 288)
+
+
+def test_pool_workers_are_not_forked():
+    workers, frame_ingest.INGEST_WORKERS = frame_ingest.INGEST_WORKERS, 1
+    start_ingest_pool()
+    try:
+        assert frame_ingest._pool._mp_context.get_start_method() != 'fork'
+        frame = asyncio.run(ingest_jpeg(jpeg(1280, 720), 512))
+        assert frame.size == (512, 288)
+    finally:
+        shutdown_ingest_pool()
+        frame_ingest.INGEST_WORKERS = workers
+
+
+if __name__ == "__main__":
+    print("🧪 Testing frame ingest...")
+    print("=" * 50)
+    for test in (test_webcam_frames_decode_below_full_size, test_small_frames_are_left_alone,
+                 test_shrink_keeps_aspect_ratio, test_pool_workers_are_not_forked):
+        test()
+        print(f"✅ {test.__name__}")
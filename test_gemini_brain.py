@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test for the Gemini model registry and token accounting (backend/gemini_brain.py)
+
+Runs against the stub SDK (backend/gemini_stub.py), which reports
+usage_metadata the way the API bills it.
+
+Run with `python test_gemini_brain.py` or `pytest test_gemini_brain.py` - no server needed.
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+from backend import gemini_brain
+from backend.gemini_brain import LatencyBudgetExceeded, TokenUsage, summon_gemini, summon_gemini_stream, vision_model
+from backend.persona import GENERATION_CONFIG, SYSTEM_INSTRUCTION, haunt_context
+
+FRAME_PART = {"mime_type": "image/jpeg", "data": b"\xff\xd8\xff\xd9"}
+
+
+def use_stub():
+    gemini_brain.GEMINI_BACKEND = 'stub'
+    gemini_brain._genai = None
+    gemini_brain._vision_model = None
+
+
+def test_model_is_built_once_with_the_persona():
+    use_stub()
+    model = vision_model()
+    assert vision_model() is model
+    assert model.system_instruction == SYSTEM_INSTRUCTION
+
+
+def test_calls_carry_only_the_context():
+    context = haunt_context(7, 'http://www.heavensgate.com/', 42, 3, ['Turn around.'])
+    assert 'MALEVOLENT' not in context and 'Haunt Level: 7/10' in context and 'Turn around.' in context
+    assert len(context) < len(SYSTEM_INSTRUCTION) / 5
+
+
+def test_usage_is_recorded_per_call():
+    use_stub()
+    gemini_brain.gemini_usage = usage = TokenUsage()
+    context = haunt_context(1, 'unknown page', 80, 12, [])
+    first_guess = usage.expected_tokens(context)
+
+    response = asyncio.run(summon_gemini(vision_model(), [context, FRAME_PART]))
+    assert response.text
+    stats = usage.stats()
+    assert stats["calls"] == 1 and stats["input_tokens"] == response.usage_metadata.prompt_token_count
+    assert usage.expected_tokens(context) == stats["input_tokens"] + GENERATION_CONFIG["max_output_tokens"]
+    assert abs(first_guess - usage.expected_tokens(context)) < 50  # The estimate was close
+
+
+class SlowStreamModel:
+    """Streams `pieces`, sleeping `delays[i]` seconds before piece i"""
+
+    def __init__(self, pieces, delays):
+        self.pieces, self.delays = pieces, delays
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        for piece, delay in zip(self.pieces, self.delays):
+            time.sleep(delay)
+            yield SimpleNamespace(text=piece, usage_metadata=None)
+
+
+def stream_within(model, budget):
+    spoken, late = [], []
+
+    async def on_sentence(text):
+        spoken.append(text)
+
+    async def run():
+        try:
+            result = await summon_gemini_stream(model, ["context"], on_sentence, on_late=late.append, budget=budget)
+        except LatencyBudgetExceeded:
+            result = None
+        await asyncio.sleep(0.5)  # Let a late stream finish
+        return result
+    return asyncio.run(run()), spoken, late
+
+
+def test_stream_that_misses_the_budget_is_kept_not_spoken():
+    model = SlowStreamModel(["Turn around. ", "Slowly. "], [0.3, 0.05])
+    result, spoken, late = stream_within(model, budget=0.1)
+    assert result is None and spoken == []
+    assert late == ["Turn around. Slowly."]
+
+
+def test_first_sentence_in_time_streams_past_the_budget():
+    model = SlowStreamModel(["Turn around. ", "Slowly. "], [0.02, 0.3])
+    result, spoken, late = stream_within(model, budget=0.1)
+    assert result == "Turn around. Slowly." and spoken == ["Turn around.", "Slowly."]
+    assert late == []
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Gemini brain...")
+    print("=" * 50)
+    for test in (test_model_is_built_once_with_the_persona, test_calls_carry_only_the_context,
+                 test_usage_is_recorded_per_call, test_stream_that_misses_the_budget_is_kept_not_spoken,
+                 test_first_sentence_in_time_streams_past_the_budget):
+        test()
+        print(f"✅ {test.__name__}")
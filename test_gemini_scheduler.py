@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test for the Gemini admission scheduler (backend/gemini_scheduler.py)
+
+Buckets are drained by hand so the tests don't wait a minute for the quota
+window; refill rates are high enough that queued calls finish in ~0.1s.
+
+Run with `python test_gemini_scheduler.py` or `pytest test_gemini_scheduler.py` - no server needed.
+"""
+import asyncio
+import time
+
+from backend.gemini_scheduler import GEMINI_QUOTA_BACKOFF_SECONDS, GeminiScheduler, GeminiShed, estimate_tokens, quota_retry_after
+from backend.gemini_stub import ResourceExhausted
+
+
+async def shed_reason(call):
+    try:
+        await call
+    except GeminiShed as shed:
+        return shed.reason
+    return None
+
+
+def test_burst_then_immediate_shed():
+    async def run():
+        scheduler = GeminiScheduler(rpm=5, tpm=0, queue_size=8, max_wait=3)
+        for _ in range(5):
+            await scheduler.admit(1)
+
+        started = time.perf_counter()
+        assert await shed_reason(scheduler.admit(1)) == 'quota'  # Next token is 12s away
+        assert time.perf_counter() - started < 0.001
+        assert scheduler.stats()["shed"] == 1
+    asyncio.run(run())
+
+
+def test_token_quota_counts_too():
+    async def run():
+        scheduler = GeminiScheduler(rpm=100, tpm=1000, max_wait=1)
+        await scheduler.admit(1, estimate_tokens(2000, max_output_tokens=150))  # 500 + 258 + 150
+        assert await shed_reason(scheduler.admit(1, 200)) == 'quota'
+        assert await shed_reason(scheduler.admit(1, 5000)) == 'quota'  # Bigger than the whole bucket
+    asyncio.run(run())
+
+
+def test_most_haunted_soul_goes_first():
+    async def run():
+        scheduler = GeminiScheduler(rpm=600, tpm=0, queue_size=8, max_wait=2)
+        scheduler.requests.tokens = 0
+        order = []
+
+        async def call(level):
+            await scheduler.admit(level)
+            order.append(level)
+
+        await asyncio.gather(call(1), call(9), call(4), call(9))
+        assert order == [9, 9, 4, 1]
+    asyncio.run(run())
+
+
+def test_full_queue_preempts_lower_levels():
+    async def run():
+        scheduler = GeminiScheduler(rpm=60, tpm=0, queue_size=2, max_wait=5)
+        scheduler.requests.tokens = 0
+        low = [asyncio.create_task(shed_reason(scheduler.admit(2))) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        assert await shed_reason(scheduler.admit(2)) == 'queue_full'
+        high = asyncio.create_task(shed_reason(scheduler.admit(8)))
+        await asyncio.sleep(0)
+        assert await low[1] == 'preempted'  # The newest of the lowest level makes room
+
+        scheduler.penalize(30)
+        assert await low[0] == 'backoff' and await high == 'backoff'
+        assert await shed_reason(scheduler.admit(10)) == 'backoff'
+        assert scheduler.stats()["waiting"] == 0
+    asyncio.run(run())
+
+
+def test_quota_errors_are_recognized():
+    error = ResourceExhausted("429 Resource has been exhausted (e.g. check quota). retry_delay { seconds: 41 }")
+    assert quota_retry_after(error) == 41
+    assert quota_retry_after(ValueError("Response has no text")) is None
+
+
+def test_429_in_the_message_is_not_a_quota_error():
+    assert quota_retry_after(ValueError("Prompt mentions room 429")) is None
+    assert quota_retry_after(RuntimeError("Deadline exceeded after 4290 ms")) is None
+
+    class TooManyRequests(Exception):
+        status_code = 429
+    assert quota_retry_after(TooManyRequests("slow down")) == GEMINI_QUOTA_BACKOFF_SECONDS
+
+
+def test_disabled_scheduler_admits_everything():
+    async def run():
+        scheduler = GeminiScheduler(rpm=0)
+        for _ in range(1000):
+            await scheduler.admit(1, 10 ** 6)
+        assert scheduler.stats()["admitted"] == 1000
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Gemini scheduler...")
+    print("=" * 50)
+    for test in (test_burst_then_immediate_shed, test_token_quota_counts_too, test_most_haunted_soul_goes_first,
+                 test_full_queue_preempts_lower_levels, test_quota_errors_are_recognized,
+                 test_429_in_the_message_is_not_a_quota_error, test_disabled_scheduler_admits_everything):
+        test()
+        print(f"✅ {test.__name__}")
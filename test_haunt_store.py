@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test for the per-session haunt state stores (backend/haunt_store.py)
+
+The SQLite store is shared by workers: two store instances on one file stand
+in for two uvicorn workers.
+
+Run with `python test_haunt_store.py` or `pytest test_haunt_store.py` - no server needed.
+"""
+import os
+import tempfile
+import threading
+import time
+
+from backend import haunt_store
+from backend.haunt_store import HAUNT_HISTORY_SIZE, HAUNT_STEP_SECONDS, MemoryHauntStore, SQLiteHauntStore
+
+
+def stores(directory):
+    path = os.path.join(directory, 'sessions.db')
+    return [MemoryHauntStore(), SQLiteHauntStore(path)]
+
+
+def test_history_is_capped_per_session():
+    with tempfile.TemporaryDirectory() as directory:
+        for store in stores(directory):
+            for i in range(HAUNT_HISTORY_SIZE + 3):
+                store.remember('soul', f"line {i}")
+            store.remember('other soul', "hello")
+            history = store.get('soul').history
+            assert history == [f"line {i}" for i in range(3, HAUNT_HISTORY_SIZE + 3)], type(store).__name__
+            assert store.get('other soul').history == ["hello"]
+            assert store.count() == 2
+
+
+def test_haunt_level_escalates_and_expired_sessions_start_over():
+    with tempfile.TemporaryDirectory() as directory:
+        for store in stores(directory):
+            store.ttl = 0.2
+            store.remember('soul', "I see you.")
+            session = store.get('soul')
+            assert session.haunt_level() == 1
+            assert session.haunt_level(now=session.started_at + 3 * HAUNT_STEP_SECONDS) == 4
+            assert session.haunt_level(now=session.started_at + 100 * HAUNT_STEP_SECONDS) == 10
+
+            time.sleep(0.3)
+            fresh = store.get('soul')
+            assert fresh.history == [] and fresh.started_at > session.started_at, type(store).__name__
+
+
+def test_workers_do_not_lose_each_others_lines():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'sessions.db')
+        workers = [SQLiteHauntStore(path), SQLiteHauntStore(path)]
+        lines = 100
+        haunt_store.HAUNT_HISTORY_SIZE = 2 * lines  # Keep everything so a lost write shows
+        try:
+            def speak(store, name):
+                for i in range(lines):
+                    store.remember('soul', f"{name} {i}")
+
+            threads = [threading.Thread(target=speak, args=(store, f"worker{n}")) for n, store in enumerate(workers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            haunt_store.HAUNT_HISTORY_SIZE = HAUNT_HISTORY_SIZE
+        assert len(workers[0].get('soul').history) == 2 * lines
+
+
+def test_first_heartbeats_from_two_workers_share_one_session():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'sessions.db')
+        one, two = SQLiteHauntStore(path), SQLiteHauntStore(path)
+        started = one.get('soul').started_at
+        two.remember('soul', "Turn around.")
+        assert one.get('soul').started_at == two.get('soul').started_at == started
+        assert one.get('soul').history == ["Turn around."]
+
+
+if __name__ == "__main__":
+    print("🧪 Testing haunt store...")
+    print("=" * 50)
+    for test in (test_history_is_capped_per_session, test_haunt_level_escalates_and_expired_sessions_start_over,
+                 test_workers_do_not_lose_each_others_lines, test_first_heartbeats_from_two_workers_share_one_session):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test for structured logging (backend/logs.py)
+
+Run with `python test_logs.py` or `pytest test_logs.py` - no server needed.
+"""
+import json
+import logging
+
+from backend.logs import JSONFormatter, TextFormatter, get_logger
+
+
+def capture(formatter):
+    records = []
+
+    class Keep(logging.Handler):
+        def emit(self, record):
+            records.append(self.format(record))
+
+    handler = Keep()
+    handler.setFormatter(formatter)
+    logger = logging.getLogger('backend.test_logs')
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    return records, lambda: logger.removeHandler(handler)
+
+
+def test_keyword_arguments_become_fields():
+    records, done = capture(TextFormatter())
+    try:
+        get_logger('backend.test_logs').info("🗃️ Wayback cache hit", url="http://geocities.com", timestamp="1998")
+    finally:
+        done()
+    assert records[0].endswith("backend.test_logs: 🗃️ Wayback cache hit url=http://geocities.com timestamp=1998")
+
+
+def test_json_format_is_one_object_per_line():
+    records, done = capture(JSONFormatter())
+    log = get_logger('backend.test_logs')
+    try:
+        log.warning("⏱️ Gemini missed the deadline - falling back", session="soul", timeout_seconds=12.0)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            log.exception("❌ Heartbeat error")
+    finally:
+        done()
+    first, second = (json.loads(record) for record in records)
+    assert "\n" not in records[0]
+    assert first["level"] == "warning" and first["logger"] == "backend.test_logs"
+    assert first["msg"] == "⏱️ Gemini missed the deadline - falling back"
+    assert first["session"] == "soul" and first["timeout_seconds"] == 12.0
+    assert second["level"] == "error" and "ValueError: boom" in second["exc"]
+
+
+def test_main_module_logs_under_backend():
+    assert get_logger('__main__').logger.name == 'backend.main'
+
+
+if __name__ == "__main__":
+    print("🧪 Testing logs...")
+    print("=" * 50)
+    for test in (test_keyword_arguments_become_fields, test_json_format_is_one_object_per_line,
+                 test_main_module_logs_under_backend):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test for the Prometheus exposition (backend/metrics.py, /metrics)
+
+Run with `python test_metrics.py` or `pytest test_metrics.py` - no server needed.
+"""
+import os
+import re
+from io import BytesIO
+
+os.environ.update(PAGE_CACHE_DIR='', WARM_TARGETS='', THREAT_CORPUS_PATH='', LOG_LEVEL='ERROR')
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from backend import main
+from backend.metrics import CONTENT_TYPE, Registry
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*"'
+                    r'(?:,[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*")*\})? (\S+)$')
+
+
+def parse(text):
+    """Exposition text -> {family: type}, {sample line without value: value}; asserts the format"""
+    assert text.endswith("\n")
+    kinds, samples, helped = {}, {}, set()
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            name = line.split(" ")[2]
+            assert name not in helped, f"{name} declared twice"
+            helped.add(name)
+        elif line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            assert name in helped and kind in ("counter", "gauge", "histogram"), line
+            kinds[name] = kind
+        else:
+            match = SAMPLE.match(line)
+            assert match, f"not a sample line: {line!r}"
+            name = match.group(1)
+            family = re.sub(r'_(bucket|sum|count)$', '', name) if name not in kinds else name
+            assert family in kinds, f"{name} has no # TYPE"
+            float(match.group(3))
+            samples[name + (match.group(2) or "")] = float(match.group(3))
+    return kinds, samples
+
+
+def fallbacks(samples):
+    return sum(value for key, value in samples.items() if key.startswith("dead_web_fallback_threats_total"))
+
+
+def test_registry_renders_every_kind():
+    registry = Registry()
+    counter = registry.counter('events_total', 'Events', ('kind',))
+    histogram = registry.histogram('wait_seconds', 'Waits', buckets=(0.1, 1))
+    registry.gauge('depth', 'Queue depth').set(3)
+    counter.inc(kind='quote"and\nnewline')
+    counter.inc(2, kind='plain')
+    histogram.observe(0.5)
+    registry.add_collector(lambda: [('cache_hits', 'counter', 'Hits', [({}, 7)])])
+
+    kinds, samples = parse(registry.render())
+    assert kinds == {"dead_web_events_total": "counter", "dead_web_wait_seconds": "histogram",
+                     "dead_web_depth": "gauge", "dead_web_cache_hits": "counter"}
+    assert samples['dead_web_events_total{kind="plain"}'] == 2
+    assert samples['dead_web_events_total{kind="quote\\"and\\nnewline"}'] == 1
+    assert samples['dead_web_wait_seconds_bucket{le="0.1"}'] == 0
+    assert samples['dead_web_wait_seconds_bucket{le="1"}'] == 1
+    assert samples['dead_web_wait_seconds_bucket{le="+Inf"}'] == 1
+    assert samples['dead_web_wait_seconds_count'] == 1 and samples['dead_web_depth'] == 3
+
+
+def test_scrape_counts_a_fallback_heartbeat():
+    frame = BytesIO()
+    Image.new('RGB', (64, 48), (40, 40, 40)).save(frame, format='JPEG')
+    real_key, main.GEMINI_API_KEY = main.GEMINI_API_KEY, ''  # No key: always answered from the corpus
+    try:
+        with TestClient(main.app) as client:
+            before = client.get('/metrics')
+            assert before.headers["content-type"] == CONTENT_TYPE
+            _, samples = parse(before.text)
+
+            reply = client.post('/api/heartbeat', content=frame.getvalue(), headers={'content-type': 'image/jpeg'},
+                                params={'battery': 0.5, 'platform': 'Win95', 'timestamp': 'unknown', 'session_id': 'm'})
+            assert reply.status_code == 200 and reply.json()["voice_text"]
+
+            kinds, after = parse(client.get('/metrics').text)
+            assert kinds["dead_web_fallback_threats_total"] == "counter"
+            assert fallbacks(after) == fallbacks(samples) + 1
+            assert after['dead_web_fallback_threats_total{reason="no_key"}'] >= 1
+    finally:
+        main.GEMINI_API_KEY = real_key
+
+
+if __name__ == "__main__":
+    print("🧪 Testing metrics...")
+    print("=" * 50)
+    for test in (test_registry_renders_every_kind, test_scrape_counts_a_fallback_heartbeat):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test for the gzip page cache and the ETag/304 answers built on it
+(backend/page_cache.py, /api/browse, /api/browse/stream)
+
+archive.org is replaced by an httpx.MockTransport on the shared archive client.
+
+Run with `python test_page_cache.py` or `pytest test_page_cache.py` - no server needed.
+"""
+import asyncio
+import gzip
+import os
+import tempfile
+
+os.environ.update(PAGE_CACHE_DIR='', WARM_TARGETS='', THREAT_CORPUS_PATH='', LOG_LEVEL='ERROR')
+
+import httpx
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.archive_http import close_archive_client, start_archive_client
+from backend.page_cache import PageCache, etag_matches, page_key
+
+SNAPSHOT = "https://web.archive.org/web/19981201000000/http://haunted.example/"
+PAGE = "<html><head><title>Haunted</title></head><body>" + "<p>Welcome to my homepage!</p>" * 2000 + "</body></html>"
+
+
+def use_archive(fetches):
+    def archive(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/wayback/available":
+            return httpx.Response(200, json={"archived_snapshots": {"closest": {
+                "available": True, "status": "200", "url": SNAPSHOT, "timestamp": "19981201000000"}}})
+        fetches.append(str(request.url))
+        return httpx.Response(200, html=PAGE)
+
+    asyncio.run(close_archive_client())
+    asyncio.run(start_archive_client(httpx.MockTransport(archive)))
+
+
+def browse(client, **headers):
+    return client.get('/api/browse/stream', params={'url': 'haunted.example', 'timestamp': '1998'}, headers=headers)
+
+
+def with_page_cache(directory, test):
+    real_cache, main.page_cache = main.page_cache, PageCache(directory)
+    try:
+        with TestClient(main.app) as client:
+            test(client)
+    finally:
+        main.page_cache = real_cache
+
+
+def test_memory_and_disk_round_trip():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = PageCache(directory)
+        assert cache.get(SNAPSHOT) is None
+        page = cache.put(SNAPSHOT, "19981201000000", PAGE)
+        assert len(page.compressed) < len(PAGE) // 10
+        assert cache.get(SNAPSHOT).html == PAGE
+
+        restarted = PageCache(directory)  # Another worker, same directory
+        assert restarted.contains(SNAPSHOT)
+        from_disk = restarted.get(SNAPSHOT)
+        assert from_disk.html == PAGE and from_disk.timestamp == "19981201000000" and from_disk.etag == page.etag
+        assert restarted.stats()["disk_hits"] == 1
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_disk_layer_stays_under_its_bound():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = PageCache(directory, disk_bytes=3 * 1024)
+        for n in range(10):
+            cache.put(f"{SNAPSHOT}{n}", "1998", os.urandom(1024).hex())
+        used = sum(entry.stat().st_size for entry in os.scandir(directory))
+        assert used <= 3 * 1024
+        assert PageCache(directory).get(f"{SNAPSHOT}9") is not None
+
+
+def test_if_none_match():
+    assert etag_matches('"abc"', '"abc"') and etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", "abc"', '"abc"') and etag_matches('*', '"abc"')
+    assert not etag_matches(None, '"abc"') and not etag_matches('"abcd"', '"abc"')
+
+    fetches = []
+    use_archive(fetches)
+
+    def test(client):
+        first = browse(client)
+        assert first.status_code == 200 and first.text == main.resurrect_html(
+            PAGE, "19981201000000", main.archive.capture_base(SNAPSHOT), main.ASSET_PREFIX)
+        etag = first.headers["etag"]
+
+        assert browse(client, **{"If-None-Match": etag}).status_code == 304
+        again = client.post('/api/browse', json={'url': 'haunted.example'}, headers={"If-None-Match": etag})
+        assert again.status_code == 304 and again.content == b""
+
+        zipped = browse(client, **{"Accept-Encoding": "gzip"})
+        assert zipped.headers["content-encoding"] == "gzip" and zipped.text == first.text
+        plain = browse(client, **{"Accept-Encoding": "identity"})  # iter_gunzip
+        assert "content-encoding" not in plain.headers and plain.text == first.text
+        assert len(fetches) == 1
+
+    with tempfile.TemporaryDirectory() as directory:
+        with_page_cache(directory, test)
+
+
+def test_corrupt_cache_file_is_fetched_again():
+    fetches = []
+    use_archive(fetches)
+    with tempfile.TemporaryDirectory() as directory:
+        with_page_cache(directory, lambda client: browse(client))
+        path = os.path.join(directory, f"{page_key(SNAPSHOT)}.page")
+        with open(path, 'rb') as f:
+            data = f.read()
+        with open(path, 'wb') as f:
+            f.write(data[:len(data) // 2])  # Truncated on disk (full disk, half-copied cache dir)
+
+        assert PageCache(directory).get(SNAPSHOT) is None
+        assert not os.path.exists(path)
+
+        with open(path, 'wb') as f:
+            f.write(data[:len(data) // 2])
+
+        def test(client):
+            page = browse(client, **{"Accept-Encoding": "identity"})
+            assert page.status_code == 200 and page.text.endswith("</html>")
+            assert len(fetches) == 2
+            assert gzip.decompress(main.page_cache.get(SNAPSHOT).compressed).decode('utf-8') == page.text
+
+        use_archive(fetches)  # The first app's shutdown closed the archive client
+        with_page_cache(directory, test)
+
+
+if __name__ == "__main__":
+    print("🧪 Testing page cache...")
+    print("=" * 50)
+    for test in (test_memory_and_disk_round_trip, test_disk_layer_stays_under_its_bound, test_if_none_match,
+                 test_corrupt_cache_file_is_fetched_again):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test for the favorites page warmer (backend/page_warmer.py)
+
+A fake fetcher stands in for archive.org + the rewriter; the last test warms
+through main.warm_favorite with archive.org replaced by an httpx.MockTransport.
+
+Run with `python test_page_warmer.py` or `pytest test_page_warmer.py` - no server needed.
+"""
+import asyncio
+import os
+import tempfile
+
+os.environ.update(PAGE_CACHE_DIR='', WARM_TARGETS='', THREAT_CORPUS_PATH='', LOG_LEVEL='ERROR')
+
+import httpx
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.archive_http import close_archive_client, start_archive_client
+from backend.page_cache import PageCache
+from backend.page_warmer import DEFAULT_WARM_TARGETS, PageWarmer, parse_targets
+
+PAGE = "<html><body>Space Jam</body></html>"
+
+
+def fake_fetcher(cache: PageCache, fetched: list):
+    async def warm_one(url, timestamp):
+        fetched.append((url, timestamp))
+        if "void" in url:
+            return None
+        if "broken" in url:
+            raise RuntimeError("archive.org is down")
+        snapshot_url = f"https://web.archive.org/web/{timestamp}/{url}"
+        cache.put(snapshot_url, timestamp, PAGE)
+        return snapshot_url
+    return warm_one
+
+
+def test_targets_parse():
+    assert parse_targets("http://www.spacejam.com@19961201, geocities.com ,,") == [
+        ("http://www.spacejam.com", "19961201"), ("geocities.com", "1998")]
+    assert len(parse_targets(DEFAULT_WARM_TARGETS)) == 5
+    assert parse_targets("") == []
+
+
+def test_empty_warm_targets_disable_warming():
+    async def run():
+        fetched = []
+        warmer = PageWarmer(fake_fetcher(PageCache(directory=''), fetched), targets=parse_targets(''))
+        warmer.start(delay=0)
+        await asyncio.sleep(0.05)
+        assert fetched == [] and warmer.status()["targets"] == 0
+        await warmer.stop()
+    asyncio.run(run())
+
+    with TestClient(main.app) as client:  # WARM_TARGETS='' above
+        assert client.get('/health').json()["page_warmer"]["targets"] == 0
+        assert main.page_warmer._task is None
+
+
+def test_targets_land_in_the_page_cache():
+    async def run():
+        cache, fetched = PageCache(directory=''), []
+        targets = parse_targets("http://www.spacejam.com@19961201,http://void.example,http://broken.example")
+        warmer = PageWarmer(fake_fetcher(cache, fetched), targets=targets, refresh_seconds=0.05, concurrency=2)
+        warmer.start(delay=0)
+        await asyncio.sleep(0.2)
+        await warmer.stop()
+
+        assert cache.contains("https://web.archive.org/web/19961201/http://www.spacejam.com")
+        assert cache.get("https://web.archive.org/web/19961201/http://www.spacejam.com").html == PAGE
+        status = warmer.status()
+        assert status["runs"] >= 2 and status["warm"] == 1
+        assert [page["state"] for page in status["pages"]] == ["warm", "empty", "failed"]
+        assert "archive.org is down" in status["pages"][2]["error"]
+    asyncio.run(run())
+
+
+def test_warm_favorite_resurrects_into_the_page_cache():
+    snapshot = "https://web.archive.org/web/19961201000000/http://www.spacejam.com/"
+    fetches = []
+
+    def archive(request):
+        if request.url.path == "/wayback/available":
+            return httpx.Response(200, json={"archived_snapshots": {"closest": {
+                "available": True, "status": "200", "url": snapshot, "timestamp": "19961201000000"}}})
+        fetches.append(str(request.url))
+        return httpx.Response(200, html=PAGE)
+
+    async def run():
+        await close_archive_client()
+        await start_archive_client(httpx.MockTransport(archive))
+        warmer = PageWarmer(main.warm_favorite, targets=parse_targets("http://www.spacejam.com@19961201"))
+        await warmer.warm_all()
+        await warmer.warm_all()  # Already cached: nothing fetched again
+        await close_archive_client()
+        return warmer.status()
+
+    with tempfile.TemporaryDirectory() as directory:
+        real_cache, main.page_cache = main.page_cache, PageCache(directory)
+        try:
+            status = asyncio.run(run())
+            assert status["pages"][0]["snapshot_url"] == snapshot
+            assert "Space Jam" in main.page_cache.get(snapshot).html
+            assert len(fetches) == 1
+        finally:
+            main.page_cache = real_cache
+
+
+if __name__ == "__main__":
+    print("🧪 Testing page warmer...")
+    print("=" * 50)
+    for test in (test_targets_parse, test_empty_warm_targets_disable_warming, test_targets_land_in_the_page_cache,
+                 test_warm_favorite_resurrects_into_the_page_cache):
+        test()
+        print(f"✅ {test.__name__}")
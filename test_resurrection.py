@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Golden-file test for the resurrection rewriter (backend/resurrection.py)
+
+fixtures/resurrection/<name>.html is a recorded Wayback page and
+<name>.golden.html is what the old BeautifulSoup pipeline made of it. The
+streaming rewriter copies untouched markup through instead of re-serializing it,
+so pages are compared as token streams (tags, attributes, text), not bytes.
+
+Run with `python test_resurrection.py` or `pytest test_resurrection.py` - no server needed.
+"""
+import glob
+import os
+from html.parser import HTMLParser
+
+from backend.resurrection import Resurrector, resurrect_html
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'resurrection')
+RESURRECTION_TIME = '19970327'
+
+
+class TokenStream(HTMLParser):
+    """Start tags (attrs sorted), whitespace-collapsed text and comments - end tags ignored"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tokens = []
+
+    def handle_starttag(self, tag, attrs):
+        self.tokens.append(('tag', tag, tuple(sorted((k, v or '') for k, v in attrs))))
+
+    handle_startendtag = handle_starttag
+
+    def handle_data(self, data):
+        text = ' '.join(data.split())
+        if not text:
+            return
+        if self.tokens and self.tokens[-1][0] == 'text':
+            self.tokens[-1] = ('text', f"{self.tokens[-1][1]} {text}")
+        else:
+            self.tokens.append(('text', text))
+
+    def handle_comment(self, data):
+        self.tokens.append(('comment', ' '.join(data.split())))
+
+
+def tokens(html):
+    stream = TokenStream()
+    stream.feed(html)
+    stream.close()
+    return stream.tokens
+
+
+def fixture_pairs():
+    for golden in sorted(glob.glob(os.path.join(FIXTURES, '*.golden.html'))):
+        source = golden.replace('.golden.html', '.html')
+        with open(source, encoding='utf-8') as f, open(golden, encoding='utf-8') as g:
+            yield os.path.basename(source), f.read(), g.read()
+
+
+def resurrect_in_chunks(html, size):
+    resurrector = Resurrector(RESURRECTION_TIME)
+    parts = [resurrector.feed(html[i:i + size]) for i in range(0, len(html), size)]
+    parts.append(resurrector.close())
+    return ''.join(parts)
+
+
+def test_golden_parity():
+    """Same tags, attributes and text as the old multi-pass pipeline"""
+    pairs = list(fixture_pairs())
+    assert pairs, f"no fixtures in {FIXTURES}"
+    for name, source, golden in pairs:
+        assert tokens(resurrect_html(source, RESURRECTION_TIME)) == tokens(golden), name
+
+
+def test_chunked_feed_matches_whole_page():
+    """Chunk boundaries (even mid-URL) never change the output"""
+    for name, source, _ in fixture_pairs():
+        whole = resurrect_html(source, RESURRECTION_TIME)
+        for size in (1, 7, 64, 4096):
+            assert resurrect_in_chunks(source, size) == whole, f"{name} @ {size}"
+
+
+def test_parasites_removed():
+    html = resurrect_html(
+        '<html><head><meta http-equiv="refresh" content="0; url=/web/2/http://x.com">'
+        '<script src="//archive.org/includes/athena.js"></script></head>'
+        '<body><div id="wm-ipp"><div><a href="/web/">toolbar</a></div></div>'
+        '<p class="wayback-note">note</p><p>alive</p>'
+        '<script>location.replace("/elsewhere")</script><script>var ok = 1;</script></body></html>',
+        RESURRECTION_TIME
+    )
+    for parasite in ('refresh', 'athena.js', 'wm-ipp', 'toolbar', 'wayback-note', 'location.replace'):
+        assert parasite not in html, parasite
+    assert '<p>alive</p>' in html
+    assert '<script>var ok = 1;</script>' in html
+
+
+def test_urls_fixed():
+    html = resurrect_html(
+        '<html><head></head><body>'
+        '<img src="/web/1997/http://x.com/a.gif"><a href="/web/1997/http://x.com/">x</a>'
+        '<a href=\'http://x.com/\'>x</a><img lowsrc="http://x.com/low.gif" src="http://x.com/b.gif">'
+        '<p>see http://web.archive.org/web/1997/</p></body></html>',
+        RESURRECTION_TIME
+    )
+    assert 'src="https://web.archive.org/web/1997/http://x.com/a.gif"' in html
+    assert '<a href="/web/1997/http://x.com/">' in html  # Only subresources are absolutized
+    assert 'href="https://x.com/"' in html
+    assert 'lowsrc="https://x.com/low.gif" src="https://x.com/b.gif"' in html
+    assert 'see https://web.archive.org/web/1997/' in html
+
+
+if __name__ == "__main__":
+    print("🧪 Testing resurrection rewriter...")
+    print("=" * 50)
+    for test in (test_golden_parity, test_chunked_feed_matches_whole_page, test_parasites_removed, test_urls_fixed):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test for the per-session scene response cache (backend/scene_cache.py)
+
+Run with `python test_scene_cache.py` or `pytest test_scene_cache.py` - no server needed.
+"""
+import time
+
+from backend.scene_cache import SceneCache
+
+BLACK_FRAME = 0  # Covered camera: every session's frame hashes to 0
+ROOM = 0x0F0F_F0F0_0F0F_F0F0
+
+
+def test_sessions_never_hear_each_others_rooms():
+    cache = SceneCache()
+    for session in ("s1", "s2", "s3"):
+        scene = cache.observe(session, BLACK_FRAME)
+        assert cache.lookup(scene, 0, []) is None
+        cache.store(scene, 0, f"{session}: that cup next to you has gone cold.")
+    assert cache.lookup(cache.observe("s2", BLACK_FRAME), 0, []) == "s2: that cup next to you has gone cold."
+
+
+def test_second_answer_gives_the_first_hit_and_variants_rotate():
+    cache = SceneCache()
+    scene = cache.observe("soul", ROOM)
+    cache.store(scene, 0, "A")
+    assert cache.lookup(scene, 0, ["A"]) is None  # Never the line just spoken
+    cache.store(scene, 0, "B")
+
+    same_scene = cache.observe("soul", ROOM ^ 0b111)  # A few bits of webcam noise
+    assert same_scene == scene
+    heard = ["B"]
+    for _ in range(4):
+        heard.append(cache.lookup(scene, 0, heard[-1:]))
+    assert heard == ["B", "A", "B", "A", "B"]
+    assert cache.lookup(scene, 1, []) is None  # Other haunt bucket
+
+
+def test_scene_change_moves_the_anchor():
+    cache = SceneCache()
+    scene = cache.observe("soul", ROOM)
+    cache.store(scene, 0, "A")
+    moved = cache.observe("soul", ~ROOM & (2 ** 64 - 1))
+    assert moved != scene and cache.lookup(moved, 0, []) is None
+    assert cache.stats()["scene_changes"] == 1
+
+
+def test_ttl_runs_from_the_newest_answer():
+    cache = SceneCache(ttl=0.3)
+    scene = cache.observe("soul", ROOM)
+    cache.store(scene, 0, "A")
+    time.sleep(0.2)
+    cache.store(scene, 0, "B")  # Refreshes the scene
+    time.sleep(0.2)
+    assert cache.lookup(scene, 0, ["B"]) == "A"
+    time.sleep(0.35)
+    assert cache.lookup(scene, 0, []) is None
+
+
+if __name__ == "__main__":
+    print("🧪 Testing scene cache...")
+    print("=" * 50)
+    for test in (test_sessions_never_hear_each_others_rooms, test_second_answer_gives_the_first_hit_and_variants_rotate,
+                 test_scene_change_moves_the_anchor, test_ttl_runs_from_the_newest_answer):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test for the WebSocket broadcast hub (backend/soul_hub.py)
+
+Fake sockets stand in for /ws/soul clients: a fast one, and a stuck one whose
+send_text never returns - the slow consumer every policy has to survive.
+
+Run with `python test_soul_hub.py` or `pytest test_soul_hub.py` - no server needed.
+"""
+import asyncio
+import json
+import time
+
+from backend.soul_hub import SLOW_CLOSE_CODE, SoulHub
+
+
+class FakeSocket:
+    def __init__(self, stuck=False):
+        self.stuck = stuck
+        self.sent = []
+        self.close_code = None
+
+    async def send_text(self, text):
+        if self.stuck:
+            await asyncio.Event().wait()
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+
+async def settle():
+    await asyncio.sleep(0.01)
+
+
+def test_broadcast_does_not_wait_for_slow_souls():
+    async def run():
+        hub = SoulHub(queue_size=4, policy='drop_oldest')
+        fast, stuck = FakeSocket(), FakeSocket(stuck=True)
+        hub.register(fast)
+        hub.register(stuck)
+
+        for i in range(10):
+            started = time.perf_counter()
+            assert hub.broadcast({"type": "WITNESS_EVENT", "n": i}) == 2
+            assert time.perf_counter() - started < 0.01
+            await settle()
+
+        assert [m["n"] for m in fast.sent] == list(range(10))
+        assert hub.stats()["dropped"] > 0  # the stuck soul kept only the newest events
+        await hub.close()
+    asyncio.run(run())
+
+
+def test_drop_newest_keeps_the_backlog():
+    async def run():
+        hub = SoulHub(queue_size=2, policy='drop_newest')
+        stuck = hub.register(FakeSocket(stuck=True))
+        await settle()  # sender takes the first message and blocks on it
+        for i in range(5):
+            hub.broadcast({"n": i})
+        assert [json.loads(t)["n"] for t in list(stuck.queue._queue)] == [0, 1]
+        await hub.close()
+    asyncio.run(run())
+
+
+def test_disconnect_policy_closes_slow_soul():
+    async def run():
+        hub = SoulHub(queue_size=2, policy='disconnect')
+        socket = FakeSocket(stuck=True)
+        soul = hub.register(socket)
+        for i in range(5):
+            hub.broadcast({"n": i})
+        await settle()
+        assert soul.closed and socket.close_code == SLOW_CLOSE_CODE
+        assert hub.stats()["disconnected"] == 1
+        assert hub.broadcast({"n": 99}) == 0
+        await hub.unregister(soul)
+        assert len(hub) == 0
+    asyncio.run(run())
+
+
+def test_replies_keep_order_and_time_out():
+    async def run():
+        hub = SoulHub(queue_size=1, send_timeout=0.05)
+        fast = FakeSocket()
+        soul = hub.register(fast)
+        for i in range(5):
+            assert await hub.send(soul, {"type": "VOICE_CHUNK", "n": i})
+        await settle()
+        assert [m["n"] for m in fast.sent] == list(range(5))
+
+        stuck = hub.register(FakeSocket(stuck=True))
+        results = [await hub.send(stuck, {"n": i}) for i in range(4)]
+        assert results[-1] is False and stuck.closed
+        await hub.close()
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    print("🧪 Testing soul hub...")
+    print("=" * 50)
+    for test in (test_broadcast_does_not_wait_for_slow_souls, test_drop_newest_keeps_the_backlog,
+                 test_disconnect_policy_closes_slow_soul, test_replies_keep_order_and_time_out):
+        test()
+        print(f"✅ {test.__name__}")
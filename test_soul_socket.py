@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Test the /ws/soul message loop (backend/main.py)
+
+A heartbeat still waiting on Gemini must not hold up POSSESS messages on the
+same socket. channel_spirit is swapped for a slow fake.
+
+Run with `python test_soul_socket.py` or `pytest test_soul_socket.py` - no server needed.
+"""
+import asyncio
+import json
+import os
+import time
+
+os.environ.update(PAGE_CACHE_DIR='', WARM_TARGETS='', THREAT_CORPUS_PATH='', LOG_LEVEL='ERROR')
+
+from fastapi.testclient import TestClient
+
+from backend import main
+
+GEMINI_SECONDS = 1.0
+HEARTBEAT = {"type": "HEARTBEAT", "battery": 0.5, "platform": "Win95", "timestamp": "unknown", "session_id": "soul"}
+POSSESS = {"type": "POSSESS", "battery": 0.9, "volume": 1, "timestamp": "now"}
+
+
+async def slow_spirit(data, frame_task, on_sentence=None):
+    frame_task.close()  # The fake never looks at the frame
+    await asyncio.sleep(GEMINI_SECONDS)
+    return {"voice_text": "Finally, I see you.", "glitch_intensity": 1, "haunt_level": 1, "next_interval_ms": 45000}
+
+
+def test_possession_is_not_stuck_behind_a_heartbeat():
+    real_spirit, main.channel_spirit = main.channel_spirit, slow_spirit
+    try:
+        with TestClient(main.app) as client, client.websocket_connect('/ws/soul') as ws:
+            assert ws.receive_json()["type"] == "CONNECTION"
+            ws.send_text(json.dumps(HEARTBEAT))
+            ws.send_bytes(b"\xff\xd8\xff\xd9")
+            started = time.perf_counter()
+            ws.send_text(json.dumps(POSSESS))
+
+            possession = ws.receive_json()
+            assert possession["type"] == "POSSESSION"
+            assert time.perf_counter() - started < GEMINI_SECONDS / 2
+
+            ws.send_text(json.dumps(HEARTBEAT))
+            ws.send_bytes(b"\xff\xd8\xff\xd9")
+            assert ws.receive_json()["type"] == "ERROR"  # One heartbeat at a time per soul
+
+            heartbeat = ws.receive_json()
+            assert heartbeat["type"] == "HEARTBEAT" and heartbeat["voice_text"] == "Finally, I see you."
+    finally:
+        main.channel_spirit = real_spirit
+
+
+def test_closing_the_socket_cancels_its_heartbeat():
+    cancelled = []
+
+    async def endless_spirit(data, frame_task, on_sentence=None):
+        frame_task.close()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(data.session_id)
+            raise
+
+    real_spirit, main.channel_spirit = main.channel_spirit, endless_spirit
+    try:
+        with TestClient(main.app) as client:
+            with client.websocket_connect('/ws/soul') as ws:
+                ws.receive_json()
+                ws.send_text(json.dumps(HEARTBEAT))
+                ws.send_bytes(b"\xff\xd8\xff\xd9")
+                ws.send_text(json.dumps(POSSESS))
+                ws.receive_json()
+            deadline = time.monotonic() + 5
+            while not cancelled and time.monotonic() < deadline:
+                time.sleep(0.01)
+        assert cancelled == ["soul"]
+    finally:
+        main.channel_spirit = real_spirit
+
+
+if __name__ == "__main__":
+    print("🧪 Testing /ws/soul message loop...")
+    print("=" * 50)
+    for test in (test_possession_is_not_stuck_behind_a_heartbeat, test_closing_the_socket_cancels_its_heartbeat):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test for the cold-start report (backend/startup_report.py, /debug/startup)
+
+subprocess.run is swapped for a slow fake, so no interpreter is spawned.
+
+Run with `python test_startup_report.py` or `pytest test_startup_report.py` - no server needed.
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+
+os.environ.update(PAGE_CACHE_DIR='', WARM_TARGETS='', THREAT_CORPUS_PATH='', LOG_LEVEL='ERROR')
+
+from fastapi.testclient import TestClient
+
+from backend import main, startup_report
+
+IMPORTTIME_STDERR = """import time: self [us] | cumulative | imported package
+import time:       900 |       1200 |   json.decoder
+import time:      3000 |       4200 | json
+"""
+
+
+def fake_run(returncode, runs):
+    def run(*args, **kwargs):
+        runs.append(args)
+        time.sleep(0.2)
+        return subprocess.CompletedProcess(args, returncode, stdout='', stderr=IMPORTTIME_STDERR)
+    return run
+
+
+def measure(returncode, callers=4):
+    runs, results = [], []
+    real_run, subprocess.run = subprocess.run, fake_run(returncode, runs)
+    startup_report._importtime = None
+    try:
+        threads = [threading.Thread(target=lambda: results.append(startup_report.importtime_breakdown()))
+                   for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        results.append(startup_report.importtime_breakdown())
+    finally:
+        subprocess.run = real_run
+        startup_report._importtime = None
+    return runs, results
+
+
+def test_concurrent_first_requests_spawn_one_subprocess():
+    runs, results = measure(returncode=0)
+    assert len(runs) == 1
+    assert all(result is results[0] for result in results)
+    assert results[0]["total_ms"] == 4.2 and results[0]["slowest"][0]["module"] == "json"
+
+
+def test_failed_measurement_is_cached_too():
+    runs, results = measure(returncode=1)
+    assert len(runs) == 1
+    assert all("error" in result for result in results)
+
+
+def test_debug_route_is_off_by_default():
+    with TestClient(main.app) as client:
+        assert not main.DEBUG_ROUTES
+        assert client.get('/debug/startup', params={'importtime': 1}).status_code == 404
+
+        main.DEBUG_ROUTES = True
+        try:
+            report = client.get('/debug/startup').json()
+        finally:
+            main.DEBUG_ROUTES = False
+        assert "phases" in report and "importtime" not in report
+
+
+def test_mcp_server_is_built_on_first_access():
+    script = ("import sys\n"
+              "from backend import main\n"
+              "assert 'fastmcp' not in sys.modules\n"
+              "from backend.main import mcp\n"
+              "assert mcp is main.mcp and mcp.name == 'ghost_brain'\n")
+    env = {**os.environ, 'PAGE_CACHE_DIR': '', 'WARM_TARGETS': '', 'THREAT_CORPUS_PATH': '', 'LOG_LEVEL': 'ERROR'}
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                            cwd=startup_report.PROJECT_ROOT, env=env)
+    assert result.returncode == 0, result.stderr
+
+
+if __name__ == "__main__":
+    print("🧪 Testing startup report...")
+    print("=" * 50)
+    for test in (test_concurrent_first_requests_spawn_one_subprocess, test_failed_measurement_is_cached_too,
+                 test_debug_route_is_off_by_default, test_mcp_server_is_built_on_first_access):
+        test()
+        print(f"✅ {test.__name__}")
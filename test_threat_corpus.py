@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test for the pre-generated threat corpus (backend/threat_corpus.py)
+
+Covers per-session non-repeating picks, persistence (merging what another
+worker wrote), the background filler with a fake generator, and the latency
+budget that sends slow heartbeats to the corpus (backend/gemini_brain.py).
+
+Run with `python test_threat_corpus.py` or `pytest test_threat_corpus.py` - no server needed.
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+from backend.gemini_brain import LatencyBudgetExceeded, within_budget
+from backend.threat_corpus import (
+    ALL_KEYS, SEED_THREATS, UNIVERSAL_THREATS, CorpusFiller, CorpusKey, ThreatCorpus, parse_batch,
+)
+
+KEY = CorpusKey.of(haunt_level=9, hour=3, battery_percent=12)
+
+
+def test_keys():
+    assert KEY == CorpusKey(4, 'night', 'low')
+    assert CorpusKey.parse(str(KEY)) == KEY
+    assert CorpusKey.of(1, 23, 100) == CorpusKey(0, 'evening', 'full')
+    assert len(ALL_KEYS) == 60
+
+
+def test_session_hears_every_line_before_any_repeat():
+    corpus = ThreatCorpus(path='')
+    size = len(SEED_THREATS[4]) + len(UNIVERSAL_THREATS)
+
+    first_lap = [corpus.pick('soul', KEY) for _ in range(size)]
+    assert len(set(first_lap)) == size
+    second_lap = [corpus.pick('soul', KEY) for _ in range(size)]
+    assert set(second_lap) == set(first_lap) and second_lap[0] != first_lap[-1]
+
+    other = [corpus.pick('other soul', KEY) for _ in range(size)]
+    assert len(set(other)) == size  # Rings are per session
+
+
+def test_pick_is_constant_time():
+    corpus = ThreatCorpus(path='')
+    corpus.add(KEY, [f"Generated line number {i} is watching you." for i in range(40)])
+    corpus.pick('soul', KEY)
+    started = time.perf_counter()
+    for _ in range(10000):
+        corpus.pick('soul', KEY, ['I see you.'])
+    assert (time.perf_counter() - started) / 10000 < 50e-6
+
+
+def test_persistence_merges_workers():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'corpus.json')
+        one, two = ThreatCorpus(path), ThreatCorpus(path)
+        one.add(KEY, ["The first worker wrote this line for you."])
+        one.save()
+        two.add(CorpusKey(0, 'morning', 'full'), ["The second worker wrote this one for you."])
+        two.save()
+
+        reloaded = ThreatCorpus(path)
+        assert reloaded.stats()["generated_lines"] == 2
+        assert len(reloaded.missing(target=1)) == len(ALL_KEYS) - 2
+
+
+def test_parse_batch():
+    text = '1. "The first line is long enough to keep."\n- Too short\n* Another line that is long enough to keep.\n\n'
+    assert parse_batch(text) == ["The first line is long enough to keep.", "Another line that is long enough to keep."]
+
+
+def test_filler_tops_up_the_neediest_key():
+    async def run():
+        corpus = ThreatCorpus(path='')
+        requested = []
+
+        async def generate(key, count):
+            requested.append((key, count))
+            return [f"Fresh line {i} for {key} - do not look away." for i in range(count)]
+
+        filler = CorpusFiller(corpus, generate, is_quiet=lambda: True, batch_size=3, target=3)
+        assert await filler.fill_once() == 3
+        key, count = requested[0]
+        assert count == 3 and len(corpus.missing(target=3)) == len(ALL_KEYS) - 1
+        assert any(line.startswith("Fresh line") for line in (corpus.pick('soul', key) for _ in range(20)))
+    asyncio.run(run())
+
+
+def test_slow_answers_miss_the_budget_but_are_kept():
+    async def run():
+        late = []
+
+        async def slow_gemini():
+            await asyncio.sleep(0.1)
+            return "the live answer"
+
+        assert await within_budget(slow_gemini(), late.append, budget=1) == "the live answer"
+        try:
+            await within_budget(slow_gemini(), late.append, budget=0.01)
+        except LatencyBudgetExceeded:
+            pass
+        else:
+            raise AssertionError("should have missed the budget")
+        await asyncio.sleep(0.15)
+        assert late == ["the live answer"]
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    print("🧪 Testing threat corpus...")
+    print("=" * 50)
+    for test in (test_keys, test_session_hears_every_line_before_any_repeat, test_pick_is_constant_time,
+                 test_persistence_merges_workers, test_parse_batch, test_filler_tops_up_the_neediest_key,
+                 test_slow_answers_miss_the_budget_but_are_kept):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test for the local WARC/CDX archive backend (backend/warc_archive.py)
+
+Writes small WARC files (plain and per-record gzip) into a temp directory,
+indexes them with build_cdx and resurrects pages from them - the same path
+/api/browse takes with ARCHIVE_BACKEND=local.
+
+Run with `python test_warc_archive.py` or `pytest test_warc_archive.py` - no server needed.
+"""
+import asyncio
+import gzip
+import os
+import tempfile
+
+from backend.archive_backend import ArchiveError
+from backend.resurrection import resurrect_html
+from backend.warc_archive import LocalWarcArchive, build_cdx, surt
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'resurrection')
+
+RAW_PAGE = ('<html><head><title>Shadowlands</title></head><body background="img/stars.gif">'
+            '<img src="ghost.gif"><a href="/faq.html">FAQ</a><p>Caf\xe9 of the d\xe9funts</p></body></html>')
+
+
+def warc_record(url: str, date: str, html: bytes, status: int = 200, headers: str = '') -> bytes:
+    http = (f"HTTP/1.1 {status} OK\r\nContent-Type: text/html{headers}\r\n"
+            f"Content-Length: {len(html)}\r\n\r\n").encode('latin-1') + html
+    warc = (f"WARC/1.0\r\nWARC-Type: response\r\nWARC-Target-URI: {url}\r\nWARC-Date: {date}\r\n"
+            f"Content-Type: application/http; msgtype=response\r\nContent-Length: {len(http)}\r\n\r\n").encode()
+    return warc + http + b"\r\n\r\n"
+
+
+def write_corpus(directory: str) -> str:
+    with open(os.path.join(FIXTURES, 'heavensgate.html'), 'rb') as f:
+        heavensgate = f.read()
+    # Per-record gzip members, like wget --warc-file / warcio
+    with open(os.path.join(directory, 'cults.warc.gz'), 'wb') as f:
+        for record in (
+            warc_record('http://www.heavensgate.com/', '1997-03-27T00:00:00Z', heavensgate),
+            warc_record('http://www.heavensgate.com/', '1999-01-01T00:00:00Z', b'<html>later</html>'),
+            warc_record('http://www.heavensgate.com/gone.html', '1997-03-27T00:00:00Z', b'', status=404),
+        ):
+            f.write(gzip.compress(record))
+    # Plain WARC, latin-1 page with its charset declared in the HTTP headers
+    with open(os.path.join(directory, 'ghosts.warc'), 'wb') as f:
+        f.write(warc_record('http://theshadowlands.net/', '1997-07-10T12:00:00Z',
+                            RAW_PAGE.encode('latin-1'), headers='; charset=iso-8859-1'))
+        for i in range(50):
+            f.write(warc_record(f'http://site{i:02d}.example.com/', '1998-01-01T00:00:00Z', b'<html></html>'))
+
+    cdx = os.path.join(directory, 'index.cdx')
+    lines = build_cdx([os.path.join(directory, name) for name in ('cults.warc.gz', 'ghosts.warc')], directory)
+    with open(cdx, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    return cdx
+
+
+def test_surt():
+    assert surt('http://www.HeavensGate.com') == 'com,heavensgate)/'
+    assert surt('heavensgate.com/index.html') == 'com,heavensgate)/index.html'
+    assert surt('http://www2.cnn.com:8080/a?b=1') == 'com,cnn:8080)/a?b=1'
+
+
+def test_closest_and_fetch():
+    with tempfile.TemporaryDirectory() as directory:
+        archive = LocalWarcArchive(write_corpus(directory))
+        assert archive.status()["captures"] == 54
+
+        closest = asyncio.run(archive.closest('http://www.heavensgate.com', '19970327'))
+        assert closest["timestamp"] == '19970327000000'
+        assert closest["url"] == 'https://web.archive.org/web/19970327000000/http://www.heavensgate.com/'
+        assert asyncio.run(archive.closest('heavensgate.com'))["timestamp"] == '19990101000000'
+        assert asyncio.run(archive.closest('http://www.heavensgate.com/gone.html')) is None  # 404 capture
+        assert asyncio.run(archive.closest('http://www.spacejam.com', '1996')) is None
+        for i in (0, 17, 49):
+            assert asyncio.run(archive.closest(f'site{i:02d}.example.com'))["timestamp"] == '19980101000000'
+
+        with open(os.path.join(FIXTURES, 'heavensgate.html'), encoding='utf-8') as f:
+            assert asyncio.run(archive.fetch(closest["url"])) == f.read()
+
+        ghost = asyncio.run(archive.closest('http://theshadowlands.net/'))["url"]
+        assert asyncio.run(archive.fetch(ghost)) == RAW_PAGE
+
+        try:
+            asyncio.run(archive.fetch('https://web.archive.org/web/1997/http://nowhere.example/'))
+        except ArchiveError:
+            pass
+        else:
+            raise AssertionError("missing snapshot should raise ArchiveError")
+
+
+def test_raw_capture_urls_point_at_archive():
+    with tempfile.TemporaryDirectory() as directory:
+        archive = LocalWarcArchive(write_corpus(directory))
+        ghost = asyncio.run(archive.closest('http://theshadowlands.net/'))["url"]
+        html = resurrect_html(asyncio.run(archive.fetch(ghost)), '19970710120000', archive.capture_base(ghost))
+
+    assert 'src="https://web.archive.org/web/19970710120000im_/http://theshadowlands.net/ghost.gif"' in html
+    assert 'background="https://web.archive.org/web/19970710120000im_/http://theshadowlands.net/img/stars.gif"' in html
+    assert '<a href="/faq.html">' in html  # Links are dead anyway
+
+
+if __name__ == "__main__":
+    print("🧪 Testing local WARC archive...")
+    print("=" * 50)
+    for test in (test_surt, test_closest_and_fetch, test_raw_capture_urls_point_at_archive):
+        test()
+        print(f"✅ {test.__name__}")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test for the archive.org availability cache (backend/wayback_cache.py)
+
+Run with `python test_wayback_cache.py` or `pytest test_wayback_cache.py` - no server needed.
+"""
+import os
+import tempfile
+import time
+
+from backend.wayback_cache import AvailabilityCache
+
+CLOSEST = {"available": True, "status": "200", "timestamp": "19981201000000",
+           "url": "http://web.archive.org/web/19981201000000/http://www.geocities.com/"}
+
+
+def test_miss_then_hit():
+    cache = AvailabilityCache(db_path=None)
+    assert cache.get("geocities.com", "1998") == (False, None)
+    cache.put("geocities.com", "1998", CLOSEST)
+    assert cache.get("geocities.com", "1998") == (True, CLOSEST)
+    assert cache.get("geocities.com", None) == (False, None)  # Other timestamp, other answer
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_negative_entries():
+    cache = AvailabilityCache(db_path=None)
+    cache.put("never-archived.example", "1998", None)
+    assert cache.get("never-archived.example", "1998") == (True, None)  # A cached "nothing", not a miss
+    assert cache.contains("never-archived.example", "1998")
+    assert cache.stats()["negative_hits"] == 1
+
+
+def test_ttl_expiry():
+    cache = AvailabilityCache(ttl=0.3, negative_ttl=0.1, db_path=None)
+    cache.put("geocities.com", "1998", CLOSEST)
+    cache.put("never-archived.example", "1998", None)
+    time.sleep(0.15)
+    assert cache.get("never-archived.example", "1998") == (False, None)  # Negative TTL is shorter
+    assert cache.get("geocities.com", "1998") == (True, CLOSEST)
+    time.sleep(0.2)
+    assert cache.get("geocities.com", "1998") == (False, None)
+    assert not cache.contains("geocities.com", "1998")
+
+
+def test_lru_cap():
+    cache = AvailabilityCache(max_entries=2, db_path=None)
+    for url in ("a.example", "b.example", "c.example"):
+        cache.put(url, None, CLOSEST)
+    assert cache.get("a.example", None) == (False, None)
+    assert cache.get("c.example", None) == (True, CLOSEST)
+
+
+def test_persisted_answers_survive_a_restart():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'wayback.db')
+        first = AvailabilityCache(negative_ttl=0.1, db_path=path)
+        first.put("geocities.com", "1998", CLOSEST)
+        first.put("never-archived.example", "1998", None)
+
+        restarted = AvailabilityCache(db_path=path)
+        assert restarted.get("geocities.com", "1998") == (True, CLOSEST)
+        assert restarted.get("never-archived.example", "1998") == (True, None)
+
+        time.sleep(0.15)
+        assert AvailabilityCache(db_path=path).get("never-archived.example", "1998") == (False, None)
+
+
+if __name__ == "__main__":
+    print("🧪 Testing Wayback availability cache...")
+    print("=" * 50)
+    for test in (test_miss_then_hit, test_negative_entries, test_ttl_expiry, test_lru_cap,
+                 test_persisted_answers_survive_a_restart):
+        test()
+        print(f"✅ {test.__name__}")